@@ -0,0 +1,44 @@
+import os
+import time
+import hashlib
+from traceback import print_exc
+from utility.setting import BACK_CHECKPOINT
+from utility.static import pickle_read, pickle_write, pickle_delete
+
+
+class BackCheckpoint:
+    """
+    최적화 프로세스의 진행상태를 작업별 파일에 저장하고, 같은 작업을 다시 시작하면 저장된 단계부터 이어서 진행하도록 불러온다.
+    작업키는 최적화 구분과 전달된 작업정보(평가 컨텍스트, 변수설정, 최적화 옵션 등)의 해시이며, 최적화가 완료되면 파일을 삭제한다.
+    이미 연산한 변수조합의 기준값은 평가캐시에 저장되므로 체크포인트에는 탐색 상태만 보관한다.
+    interval 초 이내의 저장 요청은 단계가 끝난 경우(force)가 아니면 생략하며, interval 이 0 이면 사용하지 않는다.
+    """
+    def __init__(self, interval, backname, *args):
+        self.interval = interval
+        self.file     = f"{BACK_CHECKPOINT}/{backname}_{hashlib.sha1(repr(args).encode()).hexdigest()}"
+        self.last     = time.time()
+
+    def Load(self):
+        if not self.interval:
+            return None
+        try:
+            return pickle_read(self.file)
+        except:
+            print_exc()
+            return None
+
+    def Save(self, state, force=False):
+        if not self.interval or (not force and time.time() - self.last < self.interval):
+            return
+        temp = f'{self.file}_{os.getpid()}'
+        try:
+            os.makedirs(BACK_CHECKPOINT, exist_ok=True)
+            pickle_write(temp, state)
+            os.replace(f'{temp}.pkl', f'{self.file}.pkl')
+            self.last = time.time()
+        except:
+            print_exc()
+            pickle_delete(f'{temp}.pkl')
+
+    def Delete(self):
+        pickle_delete(f'{self.file}.pkl')
@@ -0,0 +1,132 @@
+import os
+import time
+import pickle
+import sqlite3
+import hashlib
+from traceback import print_exc
+
+# 백테스트 결과에 영향을 주는 설정의 접두어, 해당 설정이 바뀌면 캐시키가 달라진다.
+EVAL_SET_PREFIX = ('주식', '코인', '바이낸스선물', '백테주문관리적용', '백테매수시간기준', '교차검증가중치', '보조지표설정',
+                   '최적화기준값제한', '블랙리스트추가', '백테피처캐시', '백테커널모드')
+EVAL_SET_EXCEPT = ('알림소리', '리시버', '트레이더', '데이터저장', '프로세스종료', '컴퓨터종료', '모의투자')
+
+
+def GetEvalContext(dict_set, ui_gubun, db, *args):
+    """
+    평가캐시 키의 접두어를 만든다.
+    전달된 백테정보(배팅금, 시간, 매수도전략, 기준값, 기간 목록 등)와 결과에 영향을 주는 설정, 백테DB 수정시간을 함께 해시한다.
+    """
+    settings = sorted(
+        (k, repr(v)) for k, v in dict_set.items()
+        if k.startswith(EVAL_SET_PREFIX) and not any(x in k for x in EVAL_SET_EXCEPT)
+    )
+    try:
+        mtime = os.path.getmtime(db)
+    except:
+        mtime = None
+    return hashlib.sha1(repr((ui_gubun, mtime, settings, args)).encode()).hexdigest()
+
+
+def GetGridCache(cache, vars_, startday, endday):
+    """
+    그리드 최적화 한 단계의 변수조합 중 캐시에 저장된 조합을 제외한 전송용 변수목록과 캐시결과 [(vturn, 변수값, 기준값)]를 반환한다.
+    엔진은 범위가 2개 이상인 변수만 연산하므로 연산할 값이 하나만 남으면 캐시된 값 하나를 함께 전송한다.
+    """
+    base_vars  = [var[1] for var in vars_]
+    vars_send  = []
+    cache_list = []
+    for vturn, var in enumerate(vars_):
+        if len(var[0]) < 2 or cache is None:
+            vars_send.append([var[0], var[1]])
+            continue
+
+        dict_std = {}
+        for curr_var in var[0]:
+            vars_list = base_vars[:]
+            vars_list[vturn] = curr_var
+            std = cache.Get(startday, endday, vars_list)
+            if std is not None:
+                dict_std[curr_var] = std
+
+        send_list = [x for x in var[0] if x not in dict_std.keys()]
+        if len(send_list) == 1:
+            send_list = [x for x in var[0] if x in send_list or x == list(dict_std.keys())[0]]
+        elif not send_list:
+            send_list = [var[1]]
+        vars_send.append([send_list, var[1]])
+        for curr_var, std in dict_std.items():
+            if curr_var not in send_list or len(send_list) == 1:
+                cache_list.append((vturn, curr_var, std))
+
+    return vars_send, cache_list
+
+
+class BackEvalCache:
+    """
+    최적화 평가결과를 (컨텍스트, 기간, 변수조합)의 해시로 디스크에 보관하고 재사용한다.
+    집계 프로세스가 기준값과 학습/검증 결과를 저장하고, 최적화 프로세스는 엔진에 전송하기 전에 기준값을 조회한다.
+    저장된 행수가 limit 를 넘으면 가장 오래전에 사용한 결과부터 삭제한다.
+    """
+    def __init__(self, db_path, context, limit):
+        self.context = context
+        self.limit   = limit
+        self.count   = 0
+        self.sample  = 1
+        self.con     = None
+        try:
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            self.con = sqlite3.connect(db_path, timeout=30)
+            self.con.execute('PRAGMA journal_mode=WAL')
+            self.con.execute('CREATE TABLE IF NOT EXISTS evalcache (key TEXT PRIMARY KEY, std REAL, result BLOB, used REAL)')
+            self.con.execute('CREATE INDEX IF NOT EXISTS ix_evalcache_used ON evalcache (used)')
+            self.con.commit()
+        except:
+            print_exc()
+            self.con = None
+
+    def GetKey(self, startday, endday, vars_list):
+        return hashlib.sha1(f'{self.context}_{startday}_{endday}_{vars_list}'.encode()).hexdigest()
+
+    def Get(self, startday, endday, vars_list):
+        """
+        저장된 기준값을 반환하고 사용시간을 갱신한다. 저장된 결과가 없으면 None 을 반환한다.
+        """
+        if self.con is None:
+            return None
+        key = self.GetKey(startday, endday, vars_list)
+        try:
+            row = self.con.execute('SELECT std FROM evalcache WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            self.con.execute('UPDATE evalcache SET used = ? WHERE key = ?', (time.time(), key))
+            self.con.commit()
+            return row[0]
+        except:
+            print_exc()
+            return None
+
+    def SetSample(self, rate):
+        """
+        다단계 평가의 표본 단계 결과는 전체 종목의 결과가 아니므로 표본비율이 1 미만인 동안 저장하지 않는다.
+        """
+        self.sample = rate
+
+    def Put(self, startday, endday, vars_list, std, result):
+        """
+        기준값과 결과(학습 또는 전체 결과, 검증 결과)를 저장한다.
+        """
+        if self.con is None or self.sample < 1:
+            return
+        key = self.GetKey(startday, endday, vars_list)
+        try:
+            self.con.execute('INSERT OR REPLACE INTO evalcache VALUES (?, ?, ?, ?)',
+                             (key, float(std), pickle.dumps(result), time.time()))
+            if self.count % 1000 == 0:
+                total = self.con.execute('SELECT COUNT(*) FROM evalcache').fetchone()[0]
+                if total > self.limit:
+                    self.con.execute('DELETE FROM evalcache WHERE key IN '
+                                     '(SELECT key FROM evalcache ORDER BY used LIMIT ?)', (total - self.limit,))
+            self.con.commit()
+            self.count += 1
+        except:
+            print_exc()
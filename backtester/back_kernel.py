@@ -0,0 +1,607 @@
+import ast
+import numpy as np
+from traceback import print_exc
+
+
+class KernelUnsupported(Exception):
+    pass
+
+
+def _where(mask, a, b):
+    if isinstance(mask, np.ndarray):
+        return np.where(mask, a, b)
+    return a if mask else b
+
+
+def _any(mask):
+    if isinstance(mask, np.ndarray):
+        return bool(mask.any())
+    return bool(mask)
+
+
+def _and(a, func_b):
+    """
+    and 의 단락평가: 오른쪽 피연산자(func_b)는 왼쪽이 참인 변수조합이 있을 때만 연산한다.
+    """
+    if isinstance(a, np.ndarray):
+        a = a.astype(bool)
+        if not a.any():
+            return a
+        return np.logical_and(a, func_b())
+    if not a:
+        return False
+    b = func_b()
+    return b.astype(bool) if isinstance(b, np.ndarray) else bool(b)
+
+
+def _or(a, func_b):
+    """
+    or 의 단락평가: 오른쪽 피연산자(func_b)는 왼쪽이 거짓인 변수조합이 있을 때만 연산한다.
+    """
+    if isinstance(a, np.ndarray):
+        a = a.astype(bool)
+        if a.all():
+            return a
+        return np.logical_or(a, func_b())
+    if a:
+        return True
+    b = func_b()
+    return b.astype(bool) if isinstance(b, np.ndarray) else bool(b)
+
+
+def _ifexp(test, func_body, func_orelse):
+    if isinstance(test, np.ndarray):
+        if test.all():
+            return func_body()
+        if not test.any():
+            return func_orelse()
+        return np.where(test, func_body(), func_orelse())
+    return func_body() if test else func_orelse()
+
+
+def _not(a):
+    if isinstance(a, np.ndarray):
+        return np.logical_not(a)
+    return not a
+
+
+def _abs(a):
+    return np.abs(a) if isinstance(a, np.ndarray) else abs(a)
+
+
+def _round(a, n=None):
+    if isinstance(a, np.ndarray):
+        return np.round(a, 0 if n is None else n)
+    return round(a) if n is None else round(a, n)
+
+
+def _int(a):
+    return np.trunc(a) if isinstance(a, np.ndarray) else int(a)
+
+
+def _float(a):
+    return a.astype(np.float64) if isinstance(a, np.ndarray) else float(a)
+
+
+def _max(*args):
+    if len(args) == 2 and (isinstance(args[0], np.ndarray) or isinstance(args[1], np.ndarray)):
+        return np.maximum(args[0], args[1])
+    return max(*args)
+
+
+def _min(*args):
+    if len(args) == 2 and (isinstance(args[0], np.ndarray) or isinstance(args[1], np.ndarray)):
+        return np.minimum(args[0], args[1])
+    return min(*args)
+
+
+KERNEL_BUILTINS = {
+    '_where': _where, '_any': _any, '_and': _and, '_or': _or, '_ifexp': _ifexp, '_not': _not, '_abs': _abs,
+    '_round': _round, '_int': _int, '_float': _float, '_max': _max, '_min': _min
+}
+BUILTIN_NAMES = {'abs': '_abs', 'round': '_round', 'int': '_int', 'float': '_float', 'max': '_max', 'min': '_min'}
+COMPARE_OPS   = (ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE)
+ALLOWED_NODES = (ast.Name, ast.Constant, ast.BinOp, ast.UnaryOp, ast.BoolOp, ast.Compare, ast.IfExp, ast.Call,
+                 ast.Subscript, ast.keyword, ast.expr_context, ast.operator, ast.unaryop, ast.boolop, ast.cmpop)
+REJECT_NAMES  = ('self', 'vturn', 'vkey')
+
+
+class KernelStrategy:
+    def __init__(self, code, vars_in_calls, names_in_calls, uses_indexb, results):
+        self.code           = code
+        self.vars_in_calls  = vars_in_calls
+        self.names_in_calls = names_in_calls
+        self.uses_indexb    = uses_indexb
+        self.results        = results
+
+    def Run(self, env, _vars, lanes_env=None):
+        """
+        env: 전략 연산에 사용되는 지역변수 딕셔너리(Strategy 의 locals)
+        _vars: self.vars 를 대체하는 변수값 리스트(배열 또는 스칼라)
+        lanes_env: 변수별로 값이 다른 팩터(수익률, 보유시간 등)의 배열 딕셔너리
+        """
+        run_env = dict(env)
+        run_env.update(KERNEL_BUILTINS)
+        if lanes_env is not None:
+            run_env.update(lanes_env)
+        run_env['_vars'] = _vars
+        run_env['_old']  = run_env.get
+        with np.errstate(all='ignore'):
+            exec(self.code, run_env)
+        return [run_env[name] for name in self.results]
+
+
+class KernelCompiler(ast.NodeTransformer):
+    def __init__(self, lane_names):
+        self.lane_names     = set(lane_names)
+        self.vars_in_calls  = set()
+        self.names_in_calls = set()
+        self.uses_indexb    = False
+        self.dict_deps      = {name: {name} for name in lane_names}
+        self.mask_count     = 0
+        self.assigned       = set()
+        self.defined        = set()
+
+    def visit(self, node):
+        if not isinstance(node, ALLOWED_NODES):
+            raise KernelUnsupported(type(node).__name__)
+        return super().visit(node)
+
+    def GetDeps(self, node):
+        deps = set()
+        for child in ast.walk(node):
+            if isinstance(child, ast.Subscript):
+                deps.add(self.GetVarIndex(child))
+            elif isinstance(child, ast.Name) and child.id in self.dict_deps:
+                deps |= self.dict_deps[child.id]
+        deps.discard(None)
+        return deps
+
+    @staticmethod
+    def GetVarIndex(node):
+        if isinstance(node.value, ast.Attribute) and isinstance(node.value.value, ast.Name) and \
+                node.value.value.id == 'self' and node.value.attr == 'vars':
+            if isinstance(node.slice, ast.Constant) and type(node.slice.value) == int:
+                return node.slice.value
+        return None
+
+    def CheckCalls(self, node):
+        for child in ast.walk(node):
+            if isinstance(child, ast.Call) and isinstance(child.func, ast.Name) and child.func.id not in BUILTIN_NAMES:
+                for arg in child.args + [kw.value for kw in child.keywords]:
+                    for dep in self.GetDeps(arg):
+                        if type(dep) == int:
+                            self.vars_in_calls.add(dep)
+                        else:
+                            self.names_in_calls.add(dep)
+                    if isinstance(arg, ast.UnaryOp) and isinstance(arg.op, ast.USub) and \
+                            isinstance(arg.operand, ast.Constant) and arg.operand.value == 1:
+                        self.uses_indexb = True
+                    elif isinstance(arg, ast.Constant) and arg.value == -1:
+                        self.uses_indexb = True
+
+    def Expr(self, node):
+        self.CheckCalls(node)
+        return ast.fix_missing_locations(self.visit(node))
+
+    def visit_Name(self, node):
+        if node.id in REJECT_NAMES:
+            raise KernelUnsupported(node.id)
+        if node.id in self.assigned and node.id not in self.defined:
+            # 일부 분기에서만 대입된 변수를 분기 밖에서 읽으면 exec 에서는 NameError 가 날 수 있으므로 커널로 연산하지 않는다.
+            raise KernelUnsupported(f'conditional name {node.id}')
+        return node
+
+    def visit_Subscript(self, node):
+        vindex = self.GetVarIndex(node)
+        if vindex is None:
+            raise KernelUnsupported('subscript')
+        return ast.Subscript(value=ast.Name(id='_vars', ctx=ast.Load()), slice=ast.Constant(value=vindex), ctx=ast.Load())
+
+    @staticmethod
+    def Lazy(node):
+        return ast.Lambda(args=ast.arguments(posonlyargs=[], args=[], kwonlyargs=[], kw_defaults=[], defaults=[]), body=node)
+
+    def visit_BoolOp(self, node):
+        values = [self.visit(value) for value in node.values]
+        func   = '_and' if isinstance(node.op, ast.And) else '_or'
+        result = values[-1]
+        for value in reversed(values[:-1]):
+            result = ast.Call(func=ast.Name(id=func, ctx=ast.Load()), args=[value, self.Lazy(result)], keywords=[])
+        return result
+
+    def visit_UnaryOp(self, node):
+        operand = self.visit(node.operand)
+        if isinstance(node.op, ast.Not):
+            return ast.Call(func=ast.Name(id='_not', ctx=ast.Load()), args=[operand], keywords=[])
+        return ast.UnaryOp(op=node.op, operand=operand)
+
+    def visit_Compare(self, node):
+        for op in node.ops:
+            if not isinstance(op, COMPARE_OPS):
+                raise KernelUnsupported(type(op).__name__)
+        left     = self.visit(node.left)
+        compares = []
+        for op, right in zip(node.ops, node.comparators):
+            right = self.visit(right)
+            compares.append(ast.Compare(left=left, ops=[op], comparators=[right]))
+            left = right
+        result = compares[-1]
+        for compare in reversed(compares[:-1]):
+            result = ast.Call(func=ast.Name(id='_and', ctx=ast.Load()), args=[compare, self.Lazy(result)], keywords=[])
+        return result
+
+    def visit_IfExp(self, node):
+        args = [self.visit(node.test), self.Lazy(self.visit(node.body)), self.Lazy(self.visit(node.orelse))]
+        return ast.Call(func=ast.Name(id='_ifexp', ctx=ast.Load()), args=args, keywords=[])
+
+    def visit_Call(self, node):
+        if not isinstance(node.func, ast.Name):
+            raise KernelUnsupported('call')
+        func_name = BUILTIN_NAMES.get(node.func.id, node.func.id)
+        if func_name in REJECT_NAMES:
+            raise KernelUnsupported(func_name)
+        args     = [self.visit(arg) for arg in node.args]
+        keywords = [ast.keyword(arg=kw.arg, value=self.visit(kw.value)) for kw in node.keywords]
+        return ast.Call(func=ast.Name(id=func_name, ctx=ast.Load()), args=args, keywords=keywords)
+
+    def NewMask(self):
+        self.mask_count += 1
+        return f'_m{self.mask_count}'
+
+    def Assign(self, name, value, mask):
+        if mask is not None:
+            old   = ast.Call(func=ast.Name(id='_old', ctx=ast.Load()), args=[ast.Constant(value=name), ast.Constant(value=0)], keywords=[])
+            value = ast.Call(func=ast.Name(id='_where', ctx=ast.Load()), args=[ast.Name(id=mask, ctx=ast.Load()), value, old], keywords=[])
+        return ast.Assign(targets=[ast.Name(id=name, ctx=ast.Store())], value=value)
+
+    def LowerBody(self, body, mask, mask_deps):
+        stmts = []
+        for stmt in body:
+            if isinstance(stmt, ast.If):
+                stmts += self.LowerIf(stmt, mask, mask_deps)
+            elif isinstance(stmt, (ast.Assign, ast.AugAssign)):
+                if isinstance(stmt, ast.Assign):
+                    if len(stmt.targets) != 1: raise KernelUnsupported('assign')
+                    target, value_node = stmt.targets[0], stmt.value
+                else:
+                    target = stmt.target
+                    value_node = ast.BinOp(left=ast.Name(id=getattr(target, 'id', ''), ctx=ast.Load()), op=stmt.op, right=stmt.value)
+                if not isinstance(target, ast.Name) or target.id in REJECT_NAMES or target.id.startswith('_'):
+                    raise KernelUnsupported('assign target')
+                deps = self.GetDeps(value_node) | mask_deps
+                self.dict_deps[target.id] = self.dict_deps.get(target.id, set()) | deps
+                stmts.append(self.Assign(target.id, self.Expr(value_node), mask))
+                self.assigned.add(target.id)
+                self.defined.add(target.id)
+            elif isinstance(stmt, ast.Pass):
+                continue
+            elif isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Constant):
+                continue
+            else:
+                raise KernelUnsupported(type(stmt).__name__)
+        return stmts
+
+    def LowerIf(self, node, mask, mask_deps):
+        """
+        if 문을 마스크 대입과 마스크가 하나라도 참일 때만 실행되는 블록으로 변환한다.
+        exec 에서 도달하지 않는 분기(예: 데이터길이 조건 안의 N() 나눗셈)는 커널에서도 연산하지 않는다.
+        """
+        stmts = []
+        deps  = mask_deps | self.GetDeps(node.test)
+        test  = self.Expr(node.test)
+        name  = self.NewMask()
+        stmts.append(ast.Assign(targets=[ast.Name(id=name, ctx=ast.Store())], value=test))
+        defined = self.defined
+        self.defined = set(defined)
+        mask_true = self.NewMask()
+        value = ast.Name(id=name, ctx=ast.Load())
+        if mask is not None:
+            value = ast.Call(func=ast.Name(id='_and', ctx=ast.Load()), args=[ast.Name(id=mask, ctx=ast.Load()), self.Lazy(value)], keywords=[])
+        stmts.append(ast.Assign(targets=[ast.Name(id=mask_true, ctx=ast.Store())], value=value))
+        stmts.append(self.MaskedBlock(mask_true, self.LowerBody(node.body, mask_true, deps)))
+        defined_true = self.defined
+        defined_false = defined
+        if node.orelse:
+            self.defined = set(defined)
+            mask_false = self.NewMask()
+            value = ast.Call(func=ast.Name(id='_not', ctx=ast.Load()), args=[ast.Name(id=name, ctx=ast.Load())], keywords=[])
+            if mask is not None:
+                value = ast.Call(func=ast.Name(id='_and', ctx=ast.Load()), args=[ast.Name(id=mask, ctx=ast.Load()), self.Lazy(value)], keywords=[])
+            stmts.append(ast.Assign(targets=[ast.Name(id=mask_false, ctx=ast.Store())], value=value))
+            stmts.append(self.MaskedBlock(mask_false, self.LowerBody(node.orelse, mask_false, deps)))
+            defined_false = self.defined
+        self.defined = defined | (defined_true & defined_false)
+        return stmts
+
+    @staticmethod
+    def MaskedBlock(mask, body):
+        test = ast.Call(func=ast.Name(id='_any', ctx=ast.Load()), args=[ast.Name(id=mask, ctx=ast.Load())], keywords=[])
+        return ast.If(test=test, body=body or [ast.Pass()], orelse=[])
+
+
+def GetKernel(stgtxt, results, lane_names, gubun):
+    """
+    최적화 백테스트용 다중변수 전략 커널
+    전략 텍스트를 변수조합축으로 벡터화된 코드로 변환하여 한 틱당 한번만 전략을 연산한다.
+    if, elif, else 는 마스크로, and, or, not 은 단락평가를 유지하는 논리배열 연산으로 변환되며
+    self.vars[번호] 는 변수값 배열(_vars[번호])로 치환된다.
+    지원하지 않는 구문(반복문, 함수정의, self 속성 등)이 포함된 전략은 None 을 반환하며 기존 exec 방식으로 연산된다.
+    """
+    try:
+        tree     = ast.parse(stgtxt)
+        compiler = KernelCompiler(lane_names)
+        stmts    = compiler.LowerBody(tree.body, None, set())
+        module   = ast.fix_missing_locations(ast.Module(body=stmts, type_ignores=[]))
+        code     = compile(module, '<kernel>', 'exec')
+    except KernelUnsupported:
+        return None
+    except:
+        if gubun == 0: print_exc()
+        return None
+    return KernelStrategy(code, compiler.vars_in_calls, compiler.names_in_calls, compiler.uses_indexb, results)
+
+
+def GetBuyKernel(buytxt, gubun):
+    buytxt = '매수 = True\n' + buytxt.split('if 매수:')[0]
+    buytxt = '\n'.join([line for line in buytxt.split('\n') if 'self.indicator' not in line])
+    return GetKernel(buytxt, ('매수',), (), gubun)
+
+
+def GetSellKernel(selltxt, lane_names, gubun):
+    from backtester.back_static import SetSellCond
+    selltxt = 'sell_cond = 0\n매도 = False\n' + selltxt.split('if 매도:')[0]
+    selltxt, _ = SetSellCond(selltxt.split('\n'))
+    kernel = GetKernel(selltxt, ('매도', 'sell_cond'), lane_names, gubun)
+    if kernel is not None and (kernel.uses_indexb or kernel.names_in_calls):
+        kernel = None
+    return kernel
+
+
+def GetBuyKernelFuture(buytxt, gubun):
+    buytxt = 'BUY_LONG = True\nSELL_SHORT = True\n' + buytxt.split('if BUY_LONG or SELL_SHORT:')[0]
+    buytxt = '\n'.join([line for line in buytxt.split('\n') if 'self.indicator' not in line])
+    return GetKernel(buytxt, ('BUY_LONG', 'SELL_SHORT'), (), gubun)
+
+
+def GetSellKernelFuture(selltxt, lane_names, gubun):
+    from backtester.back_static import SetSellCondFuture
+    selltxt = 'sell_cond = 0\nSELL_LONG = False\nBUY_SHORT = False\n' + selltxt.split("if (포지션 == 'LONG' and SELL_LONG) or (포지션 == 'SHORT' and BUY_SHORT):")[0]
+    selltxt, _ = SetSellCondFuture(selltxt.split('\n'))
+    kernel = GetKernel(selltxt, ('SELL_LONG', 'BUY_SHORT', 'sell_cond'), lane_names, gubun)
+    if kernel is not None and (kernel.uses_indexb or kernel.names_in_calls):
+        kernel = None
+    return kernel
+
+
+def GetKernelGroups(opti_turn, vars_list, vars_lists, trade_info, buy_kernel, sell_kernel):
+    """
+    최적화 변수조합을 전략 내 함수의 인자로 사용되는 변수(self.vars[0] 포함)의 값으로 그룹화한다.
+    그룹 내에서 해당 변수들은 스칼라로, 나머지 변수들은 배열로 연산된다.
+    반환값: [(대표변수, vturn 리스트, vkey 리스트, 최소틱수 배열, 변수별 배열 리스트, 변수 리스트), ...]
+    """
+    key_index = {0}
+    for kernel in (buy_kernel, sell_kernel):
+        if kernel is not None:
+            key_index |= kernel.vars_in_calls
+    key_index = sorted(key_index)
+
+    variants = []
+    if opti_turn == 1:
+        base_vars = [var[1] for var in vars_list]
+        for vturn in trade_info.keys():
+            for vkey in trade_info[vturn].keys():
+                vars_ = base_vars[:]
+                vars_[vturn] = vars_list[vturn][0][vkey]
+                variants.append((vturn, vkey, vars_[0], vars_))
+    else:
+        for vturn in trade_info.keys():
+            min_tick = 0
+            for vkey in trade_info[vturn].keys():
+                index_ = vturn * 20 + vkey
+                if index_ >= len(vars_lists): break
+                vars_ = vars_lists[index_]
+                min_tick = max(min_tick, vars_[0])
+                variants.append((vturn, vkey, min_tick, vars_))
+
+    dict_group = {}
+    for variant in variants:
+        vars_ = variant[3]
+        if max(key_index) >= len(vars_): return None
+        group_key = tuple(vars_[i] for i in key_index)
+        if group_key not in dict_group:
+            dict_group[group_key] = []
+        dict_group[group_key].append(variant)
+
+    kernel_groups = []
+    for members in dict_group.values():
+        vturns     = [x[0] for x in members]
+        vkeys      = [x[1] for x in members]
+        min_ticks  = np.array([x[2] for x in members])
+        vars_list_ = [x[3] for x in members]
+        vars_arry  = []
+        for i in range(len(vars_list_[0])):
+            values = [vars_[i] for vars_ in vars_list_]
+            vars_arry.append(values[0] if len(set(values)) == 1 else np.array(values))
+        kernel_groups.append((vars_list_[0], vturns, vkeys, min_ticks, vars_arry, vars_list_))
+    return kernel_groups
+
+
+def GetLaneVars(vars_arry, lanes):
+    return [v[lanes] if isinstance(v, np.ndarray) else v for v in vars_arry]
+
+
+def GetLaneFlags(value, count):
+    return value if isinstance(value, np.ndarray) else [value] * count
+
+
+KIWOOM_TICK_SPEC = {
+    'factors': (
+        '현재가', '시가', '고가', '저가', '등락율', '당일거래대금', '체결강도', '거래대금증감', '전일비', '회전율', '전일동시간비', '시가총액',
+        '라운드피겨위5호가이내', '초당매수수량', '초당매도수량', 'VI해제시간', 'VI가격', 'VI호가단위', '초당거래대금', '고저평균대비등락율',
+        '매도총잔량', '매수총잔량', '매도호가5', '매도호가4', '매도호가3', '매도호가2', '매도호가1', '매수호가1', '매수호가2', '매수호가3',
+        '매수호가4', '매수호가5', '매도잔량5', '매도잔량4', '매도잔량3', '매도잔량2', '매도잔량1', '매수잔량1', '매수잔량2', '매수잔량3',
+        '매수잔량4', '매수잔량5', '매도수5호가잔량합', '관심종목'
+    ),
+    'excludes': ('VI해제시간',),
+    'moving': {60: 45, 300: 46, 600: 47, 1200: 48},
+    'moving_round': 3,
+    'area': {
+        '최고현재가': (49, 1, 'max', None), '최저현재가': (50, 1, 'min', None), '체결강도평균': (51, 7, 'mean', 3),
+        '최고체결강도': (52, 7, 'max', None), '최저체결강도': (53, 7, 'min', None), '최고초당매수수량': (54, 14, 'max', None),
+        '최고초당매도수량': (55, 15, 'max', None), '누적초당매수수량': (56, 14, 'sum', None), '누적초당매도수량': (57, 15, 'sum', None),
+        '초당거래대금평균': (58, 19, 'mean', 'int')
+    },
+    'dgree': {'등락율각도': (59, 5, 5), '당일거래대금각도': (60, 6, 0.01), '전일비각도': (61, 9, 1)},
+    'step': 13
+}
+
+COIN_TICK_SPEC = {
+    'factors': (
+        '현재가', '시가', '고가', '저가', '등락율', '당일거래대금', '체결강도', '초당매수수량', '초당매도수량', '초당거래대금', '고저평균대비등락율',
+        '매도총잔량', '매수총잔량', '매도호가5', '매도호가4', '매도호가3', '매도호가2', '매도호가1', '매수호가1', '매수호가2', '매수호가3',
+        '매수호가4', '매수호가5', '매도잔량5', '매도잔량4', '매도잔량3', '매도잔량2', '매도잔량1', '매수잔량1', '매수잔량2', '매수잔량3',
+        '매수잔량4', '매수잔량5', '매도수5호가잔량합', '관심종목'
+    ),
+    'excludes': (),
+    'moving': {60: 36, 300: 37, 600: 38, 1200: 39},
+    'moving_round': 8,
+    'area': {
+        '최고현재가': (40, 1, 'max', None), '최저현재가': (41, 1, 'min', None), '체결강도평균': (42, 7, 'mean', 3),
+        '최고체결강도': (43, 7, 'max', None), '최저체결강도': (44, 7, 'min', None), '최고초당매수수량': (45, 8, 'max', None),
+        '최고초당매도수량': (46, 9, 'max', None), '누적초당매수수량': (47, 8, 'sum', None), '누적초당매도수량': (48, 9, 'sum', None),
+        '초당거래대금평균': (49, 10, 'mean', 'int')
+    },
+    'dgree': {'등락율각도': (50, 5, 10), '당일거래대금각도': (51, 6, 0.00000001)},
+    'step': 12
+}
+
+
+def GetDayTickCount(arry_index):
+    """
+    BackTest 의 self.tick_count(데이터길이)와 동일한 일자별 틱순번 배열
+    """
+    digits = len(str(int(arry_index[0])))
+    days   = arry_index // 10 ** (digits - 8)
+    starts = np.r_[0, np.flatnonzero(days[1:] != days[:-1]) + 1]
+    return np.arange(len(days)) - np.repeat(starts, np.diff(np.r_[starts, len(days)])) + 1
+
+
+def ColumnPrevious(arry_col, pre, arry_count):
+    if type(pre) != int or pre < 0:
+        raise KernelUnsupported('pre')
+    arry_pre = np.zeros(len(arry_col))
+    if pre < len(arry_col):
+        arry_pre[pre:] = arry_col[:len(arry_col) - pre]
+    return np.where(pre < arry_count, arry_pre, 0)
+
+
+def GetWindowArray(arry_col, tick, gubun):
+    """
+    arry_col[i:i + tick] 구간의 max, min, sum, mean 을 i 번째 값으로 갖는 배열을 반환한다.
+    배열을 tick 개씩 블록으로 나누고 블록 안의 뒤쪽 누적값과 다음 블록의 앞쪽 누적값을 합치므로 틱수와 무관하게 O(n)이다.
+    max, min 은 구간마다 슬라이스로 계산한 값과 같고, sum, mean 은 tick 행마다 누적을 새로 시작하여 오차가 쌓이지 않지만
+    numpy 의 pairwise 합계와는 마지막 자리가 다를 수 있다.
+    """
+    count = len(arry_col) - tick + 1
+    if count <= 0:
+        return np.zeros(0)
+    if gubun == 'max':
+        func, fill = np.maximum, -np.inf
+    elif gubun == 'min':
+        func, fill = np.minimum, np.inf
+    else:
+        func, fill = np.add, 0.
+    blocks   = -(-len(arry_col) // tick)
+    arry_pad = np.full(blocks * tick, fill)
+    arry_pad[:len(arry_col)] = arry_col
+    arry_pad = arry_pad.reshape(blocks, tick)
+    arry_pre = func.accumulate(arry_pad, axis=1).ravel()[tick - 1:tick - 1 + count]
+    arry_suf = func.accumulate(arry_pad[:, ::-1], axis=1)[:, ::-1].ravel()[:count]
+    if func is np.add:
+        # 블록의 시작에서 끝나는 구간은 뒤쪽 누적값이 구간 전체이므로 앞쪽 누적값을 더하지 않는다.
+        arry_pre = arry_pre.copy()
+        arry_pre[::tick] = 0.
+    arry_win = func(arry_suf, arry_pre)
+    return arry_win / tick if gubun == 'mean' else arry_win
+
+
+def ColumnWindow(arry_col, tick, pre, arry_count, gubun):
+    if type(tick) != int or type(pre) != int or tick <= 0 or pre < 0:
+        raise KernelUnsupported('window')
+    arry_win = np.zeros(len(arry_col))
+    count = len(arry_col) - tick + 1 - pre
+    if count > 0:
+        arry_win[tick - 1 + pre:] = GetWindowArray(arry_col, tick, gubun)[:count]
+    return np.where(tick + pre <= arry_count, arry_win, 0)
+
+
+def ColumnDgree(arry_col, tick, pre, arry_count, cf):
+    if type(tick) != int or type(pre) != int or tick <= 0 or pre < 0:
+        raise KernelUnsupported('dgree')
+    arry_gap = np.zeros(len(arry_col))
+    count = len(arry_col) - tick + 1 - pre
+    if count > 0:
+        arry_gap[tick - 1 + pre:] = arry_col[tick - 1:tick - 1 + count] - arry_col[:count]
+    arry_dgree = np.round(np.arctan2(arry_gap * cf, tick) / (2 * np.pi) * 360, 2)
+    return np.where(tick + pre <= arry_count, arry_dgree, 0)
+
+
+def GetColumnEnv(spec, arry_data, avg_list, avg_index, code, name):
+    """
+    전략 연산에 사용되는 팩터 및 함수를 종목 전체 틱의 컬럼 배열로 반환하는 딕셔너리를 만든다.
+    """
+    arry_count = GetDayTickCount(arry_data[:, 0])
+    digits     = len(str(int(arry_data[0, 0])))
+    env = {'종목명': name, '종목코드': code, '데이터길이': arry_count, '시분초': arry_data[:, 0] % 10 ** (digits - 8)}
+    for i, factor in enumerate(spec['factors']):
+        if factor in spec['excludes']:
+            continue
+        env[factor] = arry_data[:, i + 1]
+        env[f'{factor}N'] = lambda pre, col=i + 1: ColumnPrevious(arry_data[:, col], pre, arry_count)
+    env['호가단위'] = env['매도호가2'] - env['매도호가1']
+
+    def 이동평균(tick, pre=0):
+        if tick in spec['moving']:
+            return ColumnPrevious(arry_data[:, spec['moving'][tick]], pre, arry_count)
+        return np.round(ColumnWindow(arry_data[:, 1], tick, pre, arry_count, 'mean'), spec['moving_round'])
+
+    def Parameter_Area(aindex, vindex, gubun, round_unit, tick, pre=0):
+        if tick in avg_list:
+            arry_area = ColumnPrevious(arry_data[:, aindex + spec['step'] * avg_index], pre, arry_count)
+        else:
+            arry_area = ColumnWindow(arry_data[:, vindex], tick, pre, arry_count, gubun)
+        if round_unit == 'int':
+            return np.trunc(arry_area)
+        elif round_unit is not None:
+            return np.round(arry_area, round_unit)
+        return arry_area
+
+    def Parameter_Dgree(aindex, vindex, cf, tick, pre=0):
+        if tick in avg_list:
+            return ColumnPrevious(arry_data[:, aindex + spec['step'] * avg_index], pre, arry_count)
+        return ColumnDgree(arry_data[:, vindex], tick, pre, arry_count, cf)
+
+    env['이동평균'] = 이동평균
+    for factor, args in spec['area'].items():
+        env[factor] = lambda tick, pre=0, args_=args: Parameter_Area(*args_, tick, pre)
+    for factor, args in spec['dgree'].items():
+        env[factor] = lambda tick, pre=0, args_=args: Parameter_Dgree(*args_, tick, pre)
+    return env
+
+
+def GetSignalArray(kernel, spec, arry_data, avg_list, avgtime, vars_, code, name):
+    """
+    종목 전체 틱에 대하여 매수 전략을 컬럼 단위로 한번에 연산하여 진입 시그널 배열을 반환한다.
+    시그널이 없고 보유중이 아닌 틱은 Strategy 를 호출하지 않는다.
+    컬럼 연산이 불가능한 전략(now, 경과틱수, pre=-1 등 사용)은 None 을 반환한다.
+    """
+    try:
+        env = GetColumnEnv(spec, arry_data, avg_list, avg_list.index(avgtime), code, name)
+        arry_signal = False
+        for result in kernel.Run(env, vars_):
+            arry_signal = np.logical_or(arry_signal, result)
+        arry_signal = np.broadcast_to(arry_signal, (len(arry_data),))
+        return arry_signal & (env['관심종목'] != 0) & (env['데이터길이'] >= avgtime)
+    except:
+        return None
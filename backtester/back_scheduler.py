@@ -0,0 +1,60 @@
+from collections import deque
+
+
+class BackScheduler:
+    """
+    최적화 라운드마다 백테엔진이 작업을 요청하면 (엔진번호, 종목코드) 단위로 하나씩 배정한다.
+    이전 라운드에서 측정한 종목별 연산시간이 큰 순서대로 배정하며, 측정값이 없는 첫 라운드는 틱수 순서를 사용한다.
+    엔진은 공유메모리 정보로 다른 엔진의 데이터를 복사 없이 연결하므로 라운드 중간에 데이터를 이동할 필요가 없다.
+    """
+    def __init__(self, beq_list, multi):
+        self.beq_list  = beq_list
+        self.multi     = multi
+        self.round     = None
+        self.regist    = 0
+        self.dict_info = {}
+        self.dict_tick = {}
+        self.dict_cost = {}
+        self.work_list = deque()
+        self.wait_list = []
+
+    def Regist(self, gubun, round_, work_list):
+        if round_ != self.round:
+            self.round     = round_
+            self.regist    = 0
+            self.dict_info = {}
+            self.work_list = deque()
+            self.wait_list = []
+
+        for code, info, ticks in work_list:
+            self.dict_info[(gubun, code)] = info
+            self.dict_tick[(gubun, code)] = ticks
+        self.regist += 1
+
+        if self.regist == self.multi:
+            keys = list(self.dict_info.keys())
+            if all(key in self.dict_cost.keys() for key in keys):
+                keys.sort(key=lambda x: self.dict_cost[x], reverse=True)
+            else:
+                keys.sort(key=lambda x: self.dict_tick[x], reverse=True)
+            self.work_list = deque(keys)
+            for gubun_ in self.wait_list:
+                self.Send(gubun_)
+            self.wait_list = []
+
+    def Request(self, gubun, round_, key, cost):
+        if key is not None:
+            self.dict_cost[key] = cost
+        if round_ != self.round:
+            self.beq_list[gubun].put(('작업할당', None, None, None))
+        elif self.regist < self.multi:
+            self.wait_list.append(gubun)
+        else:
+            self.Send(gubun)
+
+    def Send(self, gubun):
+        if self.work_list:
+            owner, code = self.work_list.popleft()
+            self.beq_list[gubun].put(('작업할당', owner, code, self.dict_info[(owner, code)]))
+        else:
+            self.beq_list[gubun].put(('작업할당', None, None, None))
@@ -0,0 +1,38 @@
+import numpy as np
+from traceback import print_exc
+from multiprocessing import shared_memory
+
+
+def CreateSharedArray(arry):
+    """
+    배열을 공유메모리에 한번 복사하고 (공유메모리, 공유배열, (이름, shape, dtype)) 를 반환한다.
+    다른 엔진은 (이름, shape, dtype) 만 전달받아 복사 없이 같은 메모리를 참조한다.
+    """
+    shm = shared_memory.SharedMemory(create=True, size=max(arry.nbytes, 1))
+    arry_shm = np.ndarray(arry.shape, dtype=arry.dtype, buffer=shm.buf)
+    arry_shm[:] = arry
+    return shm, arry_shm, (shm.name, arry.shape, arry.dtype.str)
+
+
+def AttachSharedArray(info):
+    name, shape, dtype = info
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def ReleaseSharedArray(shm, unlink=True):
+    """
+    공유메모리 핸들을 닫고, 소유한 엔진이면(unlink=True) 세그먼트를 해제한다.
+    닫기에 실패해도 해제는 시도하며, 실패 내용은 출력하여 누수를 확인할 수 있게 한다.
+    """
+    try:
+        shm.close()
+    except:
+        print_exc()
+    if unlink:
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+        except:
+            print_exc()
@@ -1,5 +1,6 @@
-import math
+import zlib
 import random
+import datetime
 import pyupbit
 import sqlite3
 import operator
@@ -34,7 +35,7 @@ def GetTradeInfo(gubun):
             '최고수익률': 0.,
             '최저수익률': 0.,
             '매수틱번호': 0,
-            '매수시간': strp_time('%Y%m%d', '20000101')
+            '매수시간': 0
         }
     elif gubun == 2:
         v = {
@@ -46,7 +47,7 @@ def GetTradeInfo(gubun):
             '최고수익률': 0.,
             '최저수익률': 0.,
             '매수틱번호': 0,
-            '매수시간': strp_time('%Y%m%d', '20000101'),
+            '매수시간': 0,
             '추가매수시간': [],
             '매수호가': 0,
             '매도호가': 0,
@@ -59,19 +60,118 @@ def GetTradeInfo(gubun):
             '매도정정횟수': 0,
             '매수분할횟수': 0,
             '매도분할횟수': 0,
-            '매수주문취소시간': strp_time('%Y%m%d', '20000101'),
-            '매도주문취소시간': strp_time('%Y%m%d', '20000101')
+            '매수주문취소시간': 0,
+            '매도주문취소시간': 0
         }
     else:
         v = {
             '손절횟수': 0,
             '거래횟수': 0,
-            '직전거래시간': strp_time('%Y%m%d', '20000101'),
-            '손절매도시간': strp_time('%Y%m%d', '20000101')
+            '직전거래시간': 0,
+            '손절매도시간': 0
         }
     return v
 
 
+def GetTradeInfoArray(count):
+    """
+    GetTradeInfo(1) 과 같은 필드를 변수조합별 행으로 갖는 배열을 반환한다.
+    컬럼: 보유중, 매수가, 매도가, 주문수량, 보유수량, 최고수익률, 최저수익률, 매수틱번호, 매수시간
+    """
+    return np.zeros((count, 9), dtype=np.float64)
+
+
+def IsSampleCode(code, rate):
+    """
+    다단계 평가의 표본 단계에서 연산할 종목인지 반환한다.
+    종목코드의 crc32 값으로 정하므로 표본비율이 커지면 이전 단계의 종목을 모두 포함한다.
+    """
+    return rate >= 1 or zlib.crc32(code.encode()) % 10000 < rate * 10000
+
+
+def GetSampleRates(eta, rungs=3):
+    """
+    다단계 평가 단계별 종목 표본비율 목록을 반환한다. eta 가 3이면 [1/9, 1/3, 1] 이며 1 이하이면 단일 단계 [1] 이다.
+    """
+    return [eta ** -(rungs - 1 - r) for r in range(rungs)] if eta > 1 else [1]
+
+
+def GetBatchLanes(count):
+    """
+    변수조합 count 개를 GA최적화와 같은 vturn * 20 + vkey 순서의 {vturn: [vkey, ...]} 레인으로 나눈다.
+    """
+    return {t: list(range(min(20, count - t * 20))) for t in range((count + 19) // 20)}
+
+
+def GetTradeLimit(std_list, day_count):
+    """
+    최적화기준값제한의 일평균거래횟수 상한(atc_high)을 만족하는 최대 거래횟수를 반환한다.
+    GetBackResult 의 round(tc / day_count, 1) 과 같은 방식으로 비교한다.
+    """
+    atc_high = std_list[9]
+    limit = max(int(atc_high * day_count), 0)
+    while limit > 0 and round(limit / day_count, 1) > atc_high:
+        limit -= 1
+    while round((limit + 1) / day_count, 1) <= atc_high:
+        limit += 1
+    return limit
+
+
+def GetLaneGroups(lane_days):
+    """
+    전진분석 구간 병렬 연산에서 레인별 (시작일자, 종료일자) 목록을 같은 기간의 레인끼리 묶는다.
+    반환값: [(시작일자, 종료일자, {vturn: [vkey, ...]}), ...]
+    """
+    dict_group = {}
+    for index_, (startday, endday) in enumerate(lane_days):
+        lanes = dict_group.setdefault((startday, endday), {})
+        lanes.setdefault(index_ // 20, []).append(index_ % 20)
+    return [(startday, endday, lanes) for (startday, endday), lanes in dict_group.items()]
+
+
+def GetIndexSecond(arry_index):
+    """
+    index(%Y%m%d%H%M%S 또는 %Y%m%d%H%M) 배열을 1970-01-01 00:00:00 기준 초 단위 정수 배열로 변환한다.
+    백테엔진은 종목 데이터마다 한번 변환해두고 보유시간, 주문 취소시간 등을 정수 연산으로 비교한다.
+    """
+    arry_index = arry_index.astype(np.int64)
+    arry_index = np.where(arry_index < 10 ** 13, arry_index * 100, arry_index)
+    arry_day, arry_hms = np.divmod(arry_index, 1000000)
+    arry_date = ((arry_day // 10000 - 1970).astype('datetime64[Y]') +
+                 (arry_day // 100 % 100 - 1).astype('timedelta64[M]')).astype('datetime64[D]') + \
+        (arry_day % 100 - 1).astype('timedelta64[D]')
+    return arry_date.astype(np.int64) * 86400 + arry_hms // 10000 * 3600 + arry_hms // 100 % 100 * 60 + arry_hms % 100
+
+
+def GetDayEndArray(arry_index):
+    """
+    다음 행과 일자가 다르거나 마지막 행이면 True 인 배열을 반환한다.
+    """
+    arry_index = arry_index.astype(np.int64)
+    arry_day   = np.where(arry_index < 10 ** 13, arry_index // 10000, arry_index // 1000000)
+    return np.r_[arry_day[1:] != arry_day[:-1], True]
+
+
+def GetIndexDatetime(index):
+    """
+    index 정수를 datetime 으로 변환한다. 전략에 노출되는 now(), VI해제시간에만 사용한다.
+    """
+    index = int(index)
+    if index < 10 ** 13: index *= 100
+    day, hms = divmod(index, 1000000)
+    return datetime.datetime(day // 10000, day // 100 % 100, day % 100, hms // 10000, hms // 100 % 100, hms % 100)
+
+
+def GetSecondDatetime(second):
+    """
+    GetIndexSecond 의 초 단위 정수를 datetime 으로 변환한다. 전략에 노출되는 매수시간, 매수주문취소시간, 매도주문취소시간에만 사용하며,
+    거래정보 초기값 0 은 종전 초기값인 2000-01-01 로 변환한다.
+    """
+    if second == 0:
+        return datetime.datetime(2000, 1, 1)
+    return datetime.datetime(1970, 1, 1) + datetime.timedelta(seconds=int(second))
+
+
 def GetBackloadCodeQuery(code, days, starttime, endtime):
     last = len(days) - 1
     like_text = '( '
@@ -128,59 +228,85 @@ def GetMoneytopQuery(gubun, startday, endday, starttime, endtime):
     return query
 
 
-def AddAvgData(df, round_unit, is_tick, avg_list):
+def GetMovingData(df, round_unit, is_tick):
     if is_tick:
-        df['이평0060'] = df['현재가'].rolling(window=60).mean().round(round_unit)
-        df['이평0300'] = df['현재가'].rolling(window=300).mean().round(round_unit)
-        df['이평0600'] = df['현재가'].rolling(window=600).mean().round(round_unit)
-        df['이평1200'] = df['현재가'].rolling(window=1200).mean().round(round_unit)
+        names, windows = ('이평0060', '이평0300', '이평0600', '이평1200'), (60, 300, 600, 1200)
     else:
-        df['이평005'] = df['현재가'].rolling(window=5).mean().round(round_unit)
-        df['이평010'] = df['현재가'].rolling(window=10).mean().round(round_unit)
-        df['이평020'] = df['현재가'].rolling(window=20).mean().round(round_unit)
-        df['이평060'] = df['현재가'].rolling(window=60).mean().round(round_unit)
-        df['이평120'] = df['현재가'].rolling(window=120).mean().round(round_unit)
-    for avg in avg_list:
-        df[f'최고현재가{avg}'] = df['현재가'].rolling(window=avg).max()
-        df[f'최저현재가{avg}'] = df['현재가'].rolling(window=avg).min()
-        if not is_tick:
-            df[f'최고분봉고가{avg}'] = df['분봉고가'].rolling(window=avg).max()
-            df[f'최저분봉저가{avg}'] = df['분봉저가'].rolling(window=avg).min()
-        df[f'체결강도평균{avg}'] = df['체결강도'].rolling(window=avg).mean().round(3)
-        df[f'최고체결강도{avg}'] = df['체결강도'].rolling(window=avg).max()
-        df[f'최저체결강도{avg}'] = df['체결강도'].rolling(window=avg).min()
-        if is_tick:
-            df[f'최고초당매수수량{avg}'] = df['초당매수수량'].rolling(window=avg).max()
-            df[f'최고초당매도수량{avg}'] = df['초당매도수량'].rolling(window=avg).max()
-            df[f'누적초당매수수량{avg}'] = df['초당매수수량'].rolling(window=avg).sum()
-            df[f'누적초당매도수량{avg}'] = df['초당매도수량'].rolling(window=avg).sum()
-            df[f'초당거래대금평균{avg}'] = df['초당거래대금'].rolling(window=avg).mean().round(0)
-        else:
-            df[f'최고분당매수수량{avg}'] = df['분당매수수량'].rolling(window=avg).max()
-            df[f'최고분당매도수량{avg}'] = df['분당매도수량'].rolling(window=avg).max()
-            df[f'누적분당매수수량{avg}'] = df['분당매수수량'].rolling(window=avg).sum()
-            df[f'누적분당매도수량{avg}'] = df['분당매도수량'].rolling(window=avg).sum()
-            df[f'분당거래대금평균{avg}'] = df['분당거래대금'].rolling(window=avg).mean().round(0)
-        if round_unit == 3:
-            df2 = df[['등락율', '당일거래대금', '전일비']].copy()
-            df2[f'등락율N{avg}'] = df2['등락율'].shift(avg - 1)
-            df2['등락율차이'] = df2['등락율'] - df2[f'등락율N{avg}']
-            df2[f'당일거래대금N{avg}'] = df2['당일거래대금'].shift(avg - 1)
-            df2['당일거래대금차이'] = df2['당일거래대금'] - df2[f'당일거래대금N{avg}']
-            df2[f'전일비N{avg}'] = df2['전일비'].shift(avg - 1)
-            df2['전일비차이'] = df2['전일비'] - df2[f'전일비N{avg}']
-            df['등락율각도'] = df2['등락율차이'].apply(lambda x: round(math.atan2(x * 5, avg) / (2 * math.pi) * 360, 2))
-            df['당일거래대금각도'] = df2['당일거래대금차이'].apply(lambda x: round(math.atan2(x / 100, avg) / (2 * math.pi) * 360, 2))
-            df['전일비각도'] = df2['전일비차이'].apply(lambda x: round(math.atan2(x, avg) / (2 * math.pi) * 360, 2))
-        else:
-            df2 = df[['등락율', '당일거래대금']].copy()
-            df2[f'등락율N{avg}'] = df2['등락율'].shift(avg - 1)
-            df2['등락율차이'] = df2['등락율'] - df2[f'등락율N{avg}']
-            df2[f'당일거래대금N{avg}'] = df2['당일거래대금'].shift(avg - 1)
-            df2['당일거래대금차이'] = df2['당일거래대금'] - df2[f'당일거래대금N{avg}']
-            df['등락율각도'] = df2['등락율차이'].apply(lambda x: round(math.atan2(x * 10, avg) / (2 * math.pi) * 360, 2))
-            df['당일거래대금각도'] = df2['당일거래대금차이'].apply(lambda x: round(math.atan2(x / 100_000_000, avg) / (2 * math.pi) * 360, 2))
-    return df
+        names, windows = ('이평005', '이평010', '이평020', '이평060', '이평120'), (5, 10, 20, 60, 120)
+    return {name: df['현재가'].rolling(window=window).mean().round(round_unit).to_numpy()
+            for name, window in zip(names, windows)}
+
+
+def GetAvgGroupData(df, is_tick, avg):
+    dict_data = {
+        f'최고현재가{avg}': df['현재가'].rolling(window=avg).max()
+    }
+    dict_data[f'최저현재가{avg}'] = df['현재가'].rolling(window=avg).min()
+    if not is_tick:
+        dict_data[f'최고분봉고가{avg}'] = df['분봉고가'].rolling(window=avg).max()
+        dict_data[f'최저분봉저가{avg}'] = df['분봉저가'].rolling(window=avg).min()
+    dict_data[f'체결강도평균{avg}'] = df['체결강도'].rolling(window=avg).mean().round(3)
+    dict_data[f'최고체결강도{avg}'] = df['체결강도'].rolling(window=avg).max()
+    dict_data[f'최저체결강도{avg}'] = df['체결강도'].rolling(window=avg).min()
+    if is_tick:
+        dict_data[f'최고초당매수수량{avg}'] = df['초당매수수량'].rolling(window=avg).max()
+        dict_data[f'최고초당매도수량{avg}'] = df['초당매도수량'].rolling(window=avg).max()
+        dict_data[f'누적초당매수수량{avg}'] = df['초당매수수량'].rolling(window=avg).sum()
+        dict_data[f'누적초당매도수량{avg}'] = df['초당매도수량'].rolling(window=avg).sum()
+        dict_data[f'초당거래대금평균{avg}'] = df['초당거래대금'].rolling(window=avg).mean().round(0)
+    else:
+        dict_data[f'최고분당매수수량{avg}'] = df['분당매수수량'].rolling(window=avg).max()
+        dict_data[f'최고분당매도수량{avg}'] = df['분당매도수량'].rolling(window=avg).max()
+        dict_data[f'누적분당매수수량{avg}'] = df['분당매수수량'].rolling(window=avg).sum()
+        dict_data[f'누적분당매도수량{avg}'] = df['분당매도수량'].rolling(window=avg).sum()
+        dict_data[f'분당거래대금평균{avg}'] = df['분당거래대금'].rolling(window=avg).mean().round(0)
+    return {name: sr.to_numpy() for name, sr in dict_data.items()}
+
+
+def GetAngleData(df, round_unit, avg):
+    def diff_n(column):
+        arry = df[column].to_numpy(dtype=np.float64)
+        arry_pre = np.full(len(arry), np.nan)
+        if avg - 1 < len(arry):
+            arry_pre[avg - 1:] = arry[:len(arry) - avg + 1]
+        return arry - arry_pre
+
+    def angle(arry):
+        return np.round(np.arctan2(arry, avg) / (2 * np.pi) * 360, 2)
+
+    if round_unit == 3:
+        return {
+            '등락율각도': angle(diff_n('등락율') * 5),
+            '당일거래대금각도': angle(diff_n('당일거래대금') / 100),
+            '전일비각도': angle(diff_n('전일비'))
+        }
+    return {
+        '등락율각도': angle(diff_n('등락율') * 10),
+        '당일거래대금각도': angle(diff_n('당일거래대금') / 100_000_000)
+    }
+
+
+def GetAvgDataGroups(round_unit, is_tick, avg_list):
+    """
+    AddAvgData 가 추가하는 컬럼을 (그룹명, 필요한 이전 행수 + 1, 계산함수) 목록으로 반환한다.
+    각도 컬럼은 첫번째 평균값틱수 그룹 뒤에 위치하고 마지막 평균값틱수로 계산된 값을 가진다.
+    """
+    groups = [('moving', 1200 if is_tick else 120, lambda x: GetMovingData(x, round_unit, is_tick))]
+    for i, avg in enumerate(avg_list):
+        groups.append((f'avg{avg}', avg, lambda x, avg_=avg: GetAvgGroupData(x, is_tick, avg_)))
+        if i == 0:
+            last = avg_list[-1]
+            groups.append((f'angle{last}', last, lambda x: GetAngleData(x, round_unit, last)))
+    return groups
+
+
+def AddAvgData(df, round_unit, is_tick, avg_list):
+    dict_data = {}
+    for _, _, func in GetAvgDataGroups(round_unit, is_tick, avg_list):
+        for name, arry in func(df).items():
+            if name not in dict_data.keys():
+                dict_data[name] = arry
+    return pd.concat([df, pd.DataFrame(dict_data, index=df.index)], axis=1)
 
 
 def LoadOrderSetting(gubun):
@@ -343,6 +469,46 @@ def GetSellCondsFuture(is_long, sell_conds, gubun):
     return sell_conds, dict_cond
 
 
+def GetCondMatrix(list_conds, gubun):
+    """
+    백테조건행렬 사용 시 조건최적화 레인들의 매수조건을 하나의 조건 목록으로 모아 틱마다 한번만 평가하도록 컴파일한다.
+    레인별 조건조합은 조건 목록 인덱스의 비트셋으로 보관하며, 컴파일 오류가 나면 None 을 반환한다.
+    반환값: (조건 목록 일괄평가 코드, 조건별 평가 코드 목록, 레인별 조건 비트셋)
+    """
+    pool  = sorted(set(cond for conds in list_conds for cond in conds))
+    index = {cond: i for i, cond in enumerate(pool)}
+    try:
+        cond_code  = compile('(' + ', '.join(f'bool({cond})' for cond in pool) + ',)', '<string>', 'eval')
+        cond_codes = [compile(f'bool({cond})', '<string>', 'eval') for cond in pool]
+    except:
+        if gubun == 0: print_exc()
+        return None
+    arry_cond = np.zeros((len(list_conds), len(pool)), dtype=bool)
+    for i, conds in enumerate(list_conds):
+        arry_cond[i, [index[cond] for cond in conds]] = True
+    return cond_code, cond_codes, np.packbits(arry_cond, axis=1)
+
+
+def GetCondBlocked(cond_matrix, genv, lenv):
+    """
+    GetCondMatrix 의 조건 목록을 현재 틱의 전략 변수(genv, lenv)로 한번 평가하여 레인 순서(vturn * 20 + vkey)의 매수금지 여부 배열을 반환한다.
+    매수조건은 하나라도 참이면 매수하지 않으므로 틱의 조건 비트셋과 AND 한 값이 0 이 아닌 레인은 매수하지 않는다.
+    평가 중 오류가 나면 조건마다 따로 평가하며, 오류가 난 조건은 매수금지로 보지 않는다.
+    """
+    cond_code, cond_codes, cond_masks = cond_matrix
+    try:
+        list_value = eval(cond_code, genv, lenv)
+    except:
+        list_value = []
+        for code in cond_codes:
+            try:
+                list_value.append(eval(code, genv, lenv))
+            except:
+                list_value.append(False)
+    arry_bits = np.packbits(np.array(list_value, dtype=bool))
+    return (cond_masks & arry_bits).any(axis=1)
+
+
 def SetSellCondFuture(selllist):
     count = 1
     sellstg = ''
@@ -362,7 +528,7 @@ def SetSellCondFuture(selllist):
     return sellstg, dict_cond
 
 
-def SendTextAndStd(result, dict_train, dict_valid=None, exponential=False):
+def SendTextAndStd(result, dict_train, dict_valid=None, exponential=False, cache=None):
     gubun, ui_gubun, wq, mq, stdp, optistd, opti_turn, vturn, vkey, vars_list, startday, endday, std_list, betting = result
     if gubun in ('최적화', '최적화테스트'):
         text1 = GetText1(opti_turn, vturn, vars_list)
@@ -415,6 +581,8 @@ def SendTextAndStd(result, dict_train, dict_valid=None, exponential=False):
         wq.put((ui_num[f'{ui_gubun}백테스트'], f'{text1}{text2}'))
 
     if opti_turn != 2:
+        if cache is not None:
+            cache.Put(startday, endday, vars_list, std, (dict_train, dict_valid))
         mq.put((vturn, vkey, std))
     return stdp_
 
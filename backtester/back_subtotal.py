@@ -1,6 +1,20 @@
 import numpy as np
-import pandas as pd
-from backtester.back_static import GetBackResult, AddMdd
+
+
+def GetArrayTsg(list_data):
+    """
+    [index, 보유시간, 매도시간, 수익률, 수익금] 거래 목록을 index 순으로 정렬하고 수익금합계 컬럼을 추가한 float64 배열로 반환한다.
+    index 가 이미 정렬되어 있으면 그대로 두고, 아니면 DataFrame.sort_index 와 같은 순서(문자열 quicksort)로 정렬한다.
+    엔진이 배열로 보낸 거래 목록은 index 가 숫자 컬럼이므로 숫자 순서로 정렬한다.
+    """
+    if type(list_data) == np.ndarray:
+        arry_tsg = list_data[list_data[:, 0].argsort(kind='stable'), 1:5]
+        return np.column_stack((arry_tsg, np.cumsum(arry_tsg[:, 3])))
+    arry_index = np.array([x[0] for x in list_data], dtype=object)
+    arry_tsg   = np.array([x[1:5] for x in list_data], dtype=np.float64)
+    if len(arry_index) > 1 and not (arry_index[:-1] <= arry_index[1:]).all():
+        arry_tsg = arry_tsg[arry_index.argsort(kind='quicksort')]
+    return np.column_stack((arry_tsg, np.cumsum(arry_tsg[:, 3])))
 
 
 class BackSubTotal:
@@ -25,9 +39,12 @@ class BackSubTotal:
         self.list_days  = None
         self.valid_days = None
         self.arry_bct_  = None
+        self.bct_order  = None
+        self.bct_times  = None
         self.betting    = None
         self.day_count  = None
         self.in_out_cnt = None
+        self.prune_lanes = set()
         self.MainLoop()
 
     def MainLoop(self):
@@ -35,6 +52,8 @@ class BackSubTotal:
             data = self.bstq.get()
             if data[0] == '백테결과':
                 self.CollectData(data)
+            elif data[0] == '백테결과배열':
+                self.CollectArray(data[1])
             elif data[0] == '백테완료':
                 self.complete1 = True
                 self.separation = data[1]
@@ -44,11 +63,15 @@ class BackSubTotal:
                 self.ConcatData(data)
             elif data == '결과전송':
                 self.complete2 = True
+            elif data[0] == '가지치기':
+                self.prune_lanes.add((data[1], data[2]))
             elif data[0] == '백테정보':
                 self.ui_gubun   = data[1]
                 self.list_days  = data[2]
                 self.valid_days = data[3]
                 self.arry_bct_  = data[4]
+                self.bct_order  = np.argsort(self.arry_bct_[:, 0], kind='stable')
+                self.bct_times  = self.arry_bct_[self.bct_order, 0]
                 self.betting    = data[5]
                 self.day_count  = data[6]
             elif data[0] == '백테시작':
@@ -61,6 +84,7 @@ class BackSubTotal:
                 self.separation = None
                 self.complete1  = False
                 self.complete2  = False
+                self.prune_lanes = set()
                 if len(data) == 2:
                     self.in_out_cnt = None
                 else:
@@ -90,7 +114,7 @@ class BackSubTotal:
         if vkey not in self.ddict_tsg[vturn].keys():
             self.dummy_tsg[vturn][vkey] = 0
             self.ddict_tsg[vturn][vkey] = []
-            self.ddict_bct[vturn][vkey] = self.arry_bct_.copy()
+            self.ddict_bct[vturn][vkey] = []
 
         index = str(매수시간) if self.buystd else str(매도시간)
         if self.opti_turn != 2:
@@ -98,17 +122,48 @@ class BackSubTotal:
         else:
             data = [index, 종목명, 시가총액또는포지션, 매수시간, 매도시간, 보유시간, 매수가, 매도가, 매수금액, 매도금액, 수익률, 수익금, 매도조건, 추가매수시간]
         self.ddict_tsg[vturn][vkey].append(data)
+        self.ddict_bct[vturn][vkey].append((매수시간, 매도시간, 1 if 잔량없음 else 0, 매수금액))
+
+    def CollectArray(self, arry_result):
+        """
+        엔진이 묶어 보낸 [vturn, vkey, 매수시간, 매도시간, 보유시간, 수익률, 수익금, 잔량없음, 매수금액] 배열을
+        [index, 보유시간, 매도시간, 수익률, 수익금, 매수시간, 매도시간, 잔량없음, 매수금액] 배열로 바꿔 레인별로 나눠 보관한다.
+        """
+        arry_lane = arry_result[:, 0] * 20 + arry_result[:, 1]
+        arry_sort = arry_lane.argsort(kind='stable')
+        arry_data = arry_result[arry_sort][:, [2 if self.buystd else 3, 4, 3, 5, 6, 2, 3, 7, 8]]
+        arry_lane = arry_lane[arry_sort]
+        list_split = np.flatnonzero(arry_lane[1:] != arry_lane[:-1]) + 1
+        for sindex, arry_tsg in zip(np.r_[0, list_split], np.split(arry_data, list_split)):
+            vturn, vkey = int(arry_result[arry_sort[sindex], 0]), int(arry_result[arry_sort[sindex], 1])
+            if vturn not in self.ddict_tsg.keys():
+                self.dummy_tsg[vturn] = {}
+                self.ddict_tsg[vturn] = {}
+                self.ddict_bct[vturn] = {}
+            if vkey not in self.ddict_tsg[vturn].keys():
+                self.dummy_tsg[vturn][vkey] = 0
+                self.ddict_tsg[vturn][vkey] = []
+                self.ddict_bct[vturn][vkey] = []
+            self.ddict_tsg[vturn][vkey].append(arry_tsg)
 
-        arry_bct  = self.ddict_bct[vturn][vkey]
-        arry_bct_ = arry_bct[(매수시간 <= arry_bct[:, 0]) & (arry_bct[:, 0] <= 매도시간)]
-        arry_bct_[:, 2] += 매수금액
-        if 잔량없음: arry_bct_[:, 1] += 1
-        arry_bct[(매수시간 <= arry_bct[:, 0]) & (arry_bct[:, 0] <= 매도시간)] = arry_bct_
-        self.ddict_bct[vturn][vkey] = arry_bct
+    def GetArrayBct(self, list_hold):
+        """
+        거래별 (매수시간, 매도시간, 보유종목수, 매수금액)을 체결시간 배열의 차분 배열에 더한 후 한번에 누적하여
+        매수시간 <= 체결시간 <= 매도시간 구간의 보유종목수와 보유금액을 구한다.
+        """
+        arry_bct  = self.arry_bct_.copy()
+        arry_hold = np.array(list_hold, dtype=np.float64)
+        sindex    = np.searchsorted(self.bct_times, arry_hold[:, 0], side='left')
+        eindex    = np.searchsorted(self.bct_times, arry_hold[:, 1], side='right')
+        arry_diff = np.zeros((len(self.bct_times) + 1, 2), dtype=np.float64)
+        np.add.at(arry_diff, sindex, arry_hold[:, 2:])
+        np.add.at(arry_diff, eindex, -arry_hold[:, 2:])
+        arry_bct[self.bct_order, 1:] += np.cumsum(arry_diff[:-1], axis=0)
+        return arry_bct
 
     def DivideData(self):
         try:
-            self.bstqs[0].put(('분리결과', self.ddict_tsg[0][0], self.ddict_bct[0][0]))
+            self.bstqs[0].put(('분리결과', self.ddict_tsg[0][0], self.GetArrayBct(self.ddict_bct[0][0])))
         except:
             pass
         self.tq.put('분리완료')
@@ -124,13 +179,21 @@ class BackSubTotal:
 
     def SendSubTotal1(self):
         if self.ddict_tsg:
-            columns = ['index', '보유시간', '매도시간', '수익률', '수익금']
             for vturn, dict_tsg in self.ddict_tsg.items():
                 for vkey, list_tsg in dict_tsg.items():
-                    arry_bct = self.ddict_bct[vturn][vkey]
-                    data = (columns, list_tsg, arry_bct)
+                    if type(list_tsg[0]) == np.ndarray:
+                        arry_tsg = np.concatenate(list_tsg)
+                        list_tsg = arry_tsg[:, :5]
+                        self.ddict_bct[vturn][vkey] = arry_tsg[:, 5:]
+                    if (vturn, vkey) in self.prune_lanes:
+                        # 엔진이 가지치기한 레인은 기준값 제한을 만족할 수 없으므로 보유종목수 배열을 만들지 않는다.
+                        arry_bct = self.arry_bct_[:0]
+                    else:
+                        arry_bct = self.GetArrayBct(self.ddict_bct[vturn][vkey])
+                    data = (list_tsg, arry_bct)
                     if self.list_days is not None:
-                        train_days, valid_days, test_days = self.list_days if self.in_out_cnt is None else self.list_days[self.in_out_cnt]
+                        in_out_cnt = self.in_out_cnt[vturn * 20 + vkey] if type(self.in_out_cnt) == list else self.in_out_cnt
+                        train_days, valid_days, test_days = self.list_days if in_out_cnt is None else self.list_days[in_out_cnt]
                         if valid_days is not None:
                             for i, vdays in enumerate(valid_days):
                                 data_ = data + (vdays[0], vdays[1], test_days[0], train_days[2] - vdays[2], vdays[2], i, vturn, vkey)
@@ -153,8 +216,7 @@ class BackSubTotal:
             self.tq.put(('결과없음',))
             return
 
-        columns = ['index', '보유시간', '매도시간', '수익률', '수익금']
-        data = (columns, self.list_tsg, self.arry_bct)
+        data = (self.list_tsg, self.arry_bct)
         if self.list_days is not None:
             train_days, valid_days, test_days = self.list_days if self.in_out_cnt is None else self.list_days[self.in_out_cnt]
             if valid_days is not None:
@@ -179,16 +241,13 @@ class BackSubTotal:
         보유시간, 매도시간, 수익률, 수익금, 수익금합계
           0       1       2       3      4
         """
-        columns, list_data, arry_bct = data[:3]
-        df_tsg = pd.DataFrame(list_data, columns=columns)
-        df_tsg.set_index('index', inplace=True)
-        df_tsg.sort_index(inplace=True)
-        df_tsg['수익금합계'] = df_tsg['수익금'].cumsum()
-        arry_tsg = np.array(df_tsg, dtype='float64')
+        from backtester.back_static import GetBackResult, AddMdd
+        list_data, arry_bct = data[:2]
+        arry_tsg = GetArrayTsg(list_data)
         arry_bct = arry_bct[arry_bct[:, 1] > 0]
         arry_bct = np.sort(arry_bct, axis=0)[::-1]
-        if len(data) == 11:
-            vsday, veday, tsday, tdaycnt, vdaycnt, index, vturn, vkey = data[3:]
+        if len(data) == 10:
+            vsday, veday, tsday, tdaycnt, vdaycnt, index, vturn, vkey = data[2:]
             if gubun:
                 arry_tsg = arry_tsg[(arry_tsg[:, 1] < vsday * 1000000) | ((veday * 1000000 + 240000 < arry_tsg[:, 1]) & (arry_tsg[:, 1] < tsday * 1000000))]
                 arry_bct = arry_bct[(arry_bct[:, 0] < vsday * 1000000) | ((veday * 1000000 + 240000 < arry_bct[:, 0]) & (arry_bct[:, 0] < tsday * 1000000))]
@@ -199,8 +258,8 @@ class BackSubTotal:
                 result   = GetBackResult(arry_tsg, arry_bct, self.betting, self.ui_gubun, vdaycnt)
             result = AddMdd(arry_tsg, result)
             self.tq.put(('TRAIN' if gubun else 'VALID', index, result, vturn, vkey))
-        elif len(data) == 10:
-            vsday, veday, tdaycnt, vdaycnt, index, vturn, vkey = data[3:]
+        elif len(data) == 9:
+            vsday, veday, tdaycnt, vdaycnt, index, vturn, vkey = data[2:]
             if gubun:
                 arry_tsg = arry_tsg[(arry_tsg[:, 1] < vsday * 1000000) | (veday * 1000000 + 240000 < arry_tsg[:, 1])]
                 arry_bct = arry_bct[(vsday * 1000000 < arry_bct[:, 0]) | (arry_bct[:, 0] > veday * 1000000 + 240000)]
@@ -212,7 +271,7 @@ class BackSubTotal:
             result = AddMdd(arry_tsg, result)
             self.tq.put(('TRAIN' if gubun else 'VALID', index, result, vturn, vkey))
         else:
-            daycnt, vturn, vkey = data[3:]
+            daycnt, vturn, vkey = data[2:]
             result = GetBackResult(arry_tsg, arry_bct, self.betting, self.ui_gubun, daycnt)
             result = AddMdd(arry_tsg, result)
             self.tq.put(('ALL', 0, result, vturn, vkey))
@@ -0,0 +1,234 @@
+import os
+import pickle
+import sqlite3
+import numpy as np
+import pandas as pd
+from traceback import print_exc
+
+
+def GetStoreFile(store, db_path, code):
+    return f"{store}/{os.path.basename(db_path).split('.')[0]}/{code}"
+
+
+def ReadStoreInfo(file):
+    try:
+        with open(f'{file}.pkl', 'rb') as f:
+            return pickle.load(f)
+    except:
+        return None
+
+
+def WriteStoreInfo(file, data):
+    temp = f'{file}_{os.getpid()}.pkl'
+    try:
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        with open(temp, 'wb') as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp, f'{file}.pkl')
+    except:
+        print_exc()
+        if os.path.isfile(temp): os.remove(temp)
+
+
+def GetCodeSign(con, code):
+    """
+    종목 테이블의 (행수, 처음 index, 마지막 index) - DB 파일 전체가 아닌 종목별로 저장소 갱신 여부를 판단한다.
+    """
+    return tuple(con.execute(f"SELECT COUNT(*), MIN(`index`), MAX(`index`) FROM '{code}'").fetchone())
+
+
+def UpdateTickStore(con, store, db_path, code):
+    """
+    백테DB 종목 테이블을 index 순으로 정렬된 float64 블록(.npy)과 일자별 오프셋 정보(.pkl)로 저장한다.
+    종목 테이블의 행수와 처음, 마지막 index 가 같다면 저장된 블록을 memmap 으로 열어 반환한다.
+    종목서명 조회는 테이블 전체를 읽으므로 엔진은 데이터 로딩 한번에 종목마다 한번만 호출하고 반환값을 재사용한다.
+    반환값: (배열, {'sign': 종목서명, 'columns': 컬럼명 리스트, 'days': {일자: (시작행, 끝행)}}) 또는 (None, None)
+    """
+    file = GetStoreFile(store, db_path, code)
+    try:
+        sign = GetCodeSign(con, code)
+    except:
+        RemoveTickStore(store, db_path, code)
+        return None, None
+    info = ReadStoreInfo(file)
+    if info is not None and info.get('sign') == sign and os.path.isfile(f'{file}.npy'):
+        return np.load(f'{file}.npy', mmap_mode='r'), info
+
+    try:
+        df = pd.read_sql(f"SELECT * FROM '{code}'", con)
+        arry = np.array(df, dtype=np.float64)
+    except:
+        return None, None
+    if len(arry) == 0:
+        RemoveTickStore(store, db_path, code)
+        return None, None
+
+    arry   = arry[np.argsort(arry[:, 0], kind='stable')]
+    digits = len(str(int(arry[0, 0])))
+    days   = (arry[:, 0] // 10 ** (digits - 8)).astype(np.int64)
+    starts = np.r_[0, np.flatnonzero(np.diff(days)) + 1]
+    ends   = np.r_[starts[1:], len(days)]
+    info   = {
+        'sign': sign,
+        'columns': list(df.columns),
+        'days': dict(zip(days[starts].tolist(), zip(starts.tolist(), ends.tolist())))
+    }
+
+    temp = f'{file}_{os.getpid()}.npy'
+    try:
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        np.save(temp, arry)
+        os.replace(temp, f'{file}.npy')
+    except:
+        print_exc()
+        if os.path.isfile(temp): os.remove(temp)
+        return arry, info
+    WriteStoreInfo(file, info)
+    return arry, info
+
+
+def GetStoreRanges(arry, info, days, starttime, endtime):
+    """
+    요청한 일자들의 행 구간 목록 [[시작행, 끝행]]과 시간 범위로 행을 더 걸러야 하는지 여부를 반환한다. 이어지는 구간은 합친다.
+    일자 안의 행은 index 순이므로 index 의 시간 자리수가 시간 범위의 자리수와 같으면 이진탐색으로 구간을 좁히며,
+    이때는 시간 범위 밖의 행이 남지 않는다.
+    """
+    unit   = 10 ** (len(str(int(arry[0, 0]))) - 8)
+    search = unit == (10000 if len(str(endtime)) < 5 else 1000000)
+    ranges = []
+    for day in sorted(set(int(day) for day in days)):
+        if day not in info['days']:
+            continue
+        sindex, eindex = info['days'][day]
+        if search:
+            arry_index = arry[sindex:eindex, 0]
+            sindex, eindex = sindex + int(np.searchsorted(arry_index, day * unit + starttime, 'left')), \
+                sindex + int(np.searchsorted(arry_index, day * unit + endtime, 'right'))
+            if sindex >= eindex:
+                continue
+        if ranges and ranges[-1][1] == sindex:
+            ranges[-1][1] = eindex
+        else:
+            ranges.append([sindex, eindex])
+    return ranges, not search
+
+
+def GetTimeFilter(arry, starttime, endtime):
+    arry_time = arry[:, 0] % (10000 if len(str(endtime)) < 5 else 1000000)
+    return (arry_time >= starttime) & (arry_time <= endtime)
+
+
+def LoadTickStore(arry, info, days, starttime, endtime):
+    """
+    UpdateTickStore 로 연 저장소에서 GetBackloadCodeQuery 와 동일한 조건(일자 목록, 시간 범위)의 데이터를 읽어
+    (배열, 컬럼명 리스트)로 반환한다. 요청한 구간이 연속된 행이면 memmap 의 뷰를 복사 없이 반환한다.
+    """
+    ranges, need_filter = GetStoreRanges(arry, info, days, starttime, endtime)
+    if not ranges:
+        return arry[:0], info['columns']
+
+    if len(ranges) == 1:
+        arry_day = arry[ranges[0][0]:ranges[0][1]]
+    else:
+        arry_day = np.concatenate([arry[sindex:eindex] for sindex, eindex in ranges])
+    if need_filter:
+        arry_bool = GetTimeFilter(arry_day, starttime, endtime)
+        if not arry_bool.all():
+            arry_day = arry_day[arry_bool]
+    return arry_day, info['columns']
+
+
+def CountTickStore(arry, info, days, starttime, endtime):
+    """
+    LoadTickStore 가 반환할 행수를 데이터를 읽지 않고 일자별 오프셋과 index 이진탐색으로 계산한다.
+    """
+    ranges, need_filter = GetStoreRanges(arry, info, days, starttime, endtime)
+    if need_filter:
+        return sum(int(GetTimeFilter(arry[sindex:eindex], starttime, endtime).sum()) for sindex, eindex in ranges)
+    return sum(eindex - sindex for sindex, eindex in ranges)
+
+
+def RemoveTickStore(store, db_path, code):
+    file = GetStoreFile(store, db_path, code)
+    for store_file in [f'{file}.npy', f'{file}.pkl']:
+        try:
+            if os.path.isfile(store_file): os.remove(store_file)
+        except:
+            print_exc()
+    feature_path = os.path.dirname(GetFeatureFile(store, db_path, code, ''))
+    if os.path.isdir(feature_path):
+        for feature_file in os.listdir(feature_path):
+            if feature_file.startswith(f'{code}_'):
+                try:
+                    os.remove(f'{feature_path}/{feature_file}')
+                except:
+                    print_exc()
+
+
+def CleanTickStore(store, db_path):
+    """
+    백테DB에 더이상 존재하지 않는 종목의 저장소 파일과 피처캐시 파일을 삭제한다.
+    삭제된 일자는 종목서명이 바뀌어 블록이 다시 저장될 때와 피처캐시가 갱신될 때 제거된다.
+    """
+    store_path = os.path.dirname(GetStoreFile(store, db_path, ''))
+    if not os.path.isdir(store_path):
+        return
+    con = sqlite3.connect(db_path)
+    try:
+        table_list = set(pd.read_sql("SELECT name FROM sqlite_master WHERE TYPE = 'table'", con)['name'].to_list())
+    except:
+        print_exc()
+        return
+    finally:
+        con.close()
+    for store_file in os.listdir(store_path):
+        code, ext = os.path.splitext(store_file)
+        if ext in ('.npy', '.pkl') and code not in table_list:
+            RemoveTickStore(store, db_path, code)
+
+
+def GetFeatureFile(store, db_path, code, name):
+    return f"{store}/feature/{os.path.basename(db_path).split('.')[0]}/{code}_{name}"
+
+
+def LoadAvgData(df, store, db_path, code, round_unit, groups):
+    """
+    AddAvgData 와 같은 컬럼을 (종목코드, 반올림단위, 평균값틱수 그룹) 파일에 일자별 구간으로 보관하고 재사용한다.
+    groups 는 GetAvgDataGroups 의 (그룹명, 틱수, 계산함수) 목록이며, 각 일자 구간은 그 일자의 행 앞에 로딩된 (틱수 - 1)개 행을 붙여 계산한다.
+    구간 서명은 앞에 붙인 행과 일자 행의 (행수, 처음 index, 마지막 index)이므로 기간을 옮기거나 일자를 추가해도
+    서명이 같은 일자는 저장된 구간을 그대로 사용하고 새 일자와 앞 행이 달라진 일자만 계산한다.
+    롤링 평균과 합계는 계산 시작 행부터 누적된 연산오차가 남으므로 AddAvgData 의 전체 구간 계산과 상대오차 1e-12 이내로 다를 수 있고,
+    반올림한 컬럼은 드물게 마지막 자리가 한 단위 다를 수 있다. 같은 일자 구간은 로딩 기간과 무관하게 항상 같은 값이다.
+    """
+    arry_index = df['index'].to_numpy(dtype=np.int64)
+    days   = arry_index // 10 ** (len(str(arry_index[0])) - 8)
+    starts = np.r_[0, np.flatnonzero(np.diff(days)) + 1]
+    ends   = np.r_[starts[1:], len(days)]
+
+    dict_data = {}
+    for name, window, func in groups:
+        file     = GetFeatureFile(store, db_path, code, f'{round_unit}_{name}')
+        segments = ReadStoreInfo(file) or {}
+        columns  = None
+        blocks   = []
+        update   = False
+        for sindex, eindex in zip(starts.tolist(), ends.tolist()):
+            pindex = max(sindex - window + 1, 0)
+            sign   = (sindex - pindex, int(arry_index[pindex]), int(arry_index[sindex - 1]) if pindex < sindex else 0,
+                      eindex - sindex, int(arry_index[sindex]), int(arry_index[eindex - 1]))
+            day    = int(days[sindex])
+            if day not in segments.keys() or segments[day][0] != sign:
+                data = func(df.iloc[pindex:eindex])
+                segments[day] = (sign, list(data.keys()), np.column_stack(list(data.values()))[sindex - pindex:])
+                update = True
+            columns = segments[day][1]
+            blocks.append(segments[day][2])
+        if update:
+            WriteStoreInfo(file, segments)
+
+        block = blocks[0] if len(blocks) == 1 else np.concatenate(blocks)
+        for i, column in enumerate(columns):
+            if column not in dict_data.keys():
+                dict_data[column] = block[:, i]
+
+    return pd.concat([df, pd.DataFrame(dict_data, index=df.index)], axis=1)
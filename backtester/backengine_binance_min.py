@@ -1,6 +1,6 @@
 import math
 from talib import stream
-from backtester.back_static import GetIndicator
+from backtester.back_static import GetIndicator, GetIndexDatetime, GetCondBlocked
 from backtester.backengine_binance_tick import BackEngineBinanceTick
 from utility.setting import BACK_TEMP
 # noinspection PyUnresolvedReferences
@@ -20,27 +20,29 @@ class BackEngineBinanceMin(BackEngineBinanceTick):
             value_list = [compile_condition(x) for x in value_list]
             self.dict_condition = dict(zip(key_list, value_list))
 
-    def SetArrayTick(self, code, same_days, same_time):
-        if not self.dict_set['백테일괄로딩']:
-            self.dict_arry = {code: pickle_read(f'{BACK_TEMP}/{self.gubun}_{code}_tick')}
+    def SetArrayTick(self, code, same_days, same_time, arry=None):
+        if arry is None:
+            if not self.dict_set['백테일괄로딩']:
+                self.dict_arry = {code: pickle_read(f'{BACK_TEMP}/{self.gubun}_{code}_tick')}
+            arry = self.dict_arry[code]
 
         if same_days and same_time:
-            self.arry_data = self.dict_arry[code]
+            self.arry_data = arry
         elif same_time:
-            self.arry_data = self.dict_arry[code][(self.dict_arry[code][:, 0] >= self.startday * 10000) &
-                                                  (self.dict_arry[code][:, 0] <= self.endday * 10000 + 2400)]
+            self.arry_data = arry[(arry[:, 0] >= self.startday * 10000) &
+                                  (arry[:, 0] <= self.endday * 10000 + 2400)]
         elif same_days:
-            self.arry_data = self.dict_arry[code][(self.dict_arry[code][:, 0] % 10000 >= self.starttime) &
-                                                  (self.dict_arry[code][:, 0] % 10000 <= self.endtime)]
+            self.arry_data = arry[(arry[:, 0] % 10000 >= self.starttime) &
+                                  (arry[:, 0] % 10000 <= self.endtime)]
         else:
-            self.arry_data = self.dict_arry[code][(self.dict_arry[code][:, 0] >= self.startday * 10000) &
-                                                  (self.dict_arry[code][:, 0] <= self.endday * 10000 + 2400) &
-                                                  (self.dict_arry[code][:, 0] % 10000 >= self.starttime) &
-                                                  (self.dict_arry[code][:, 0] % 10000 <= self.endtime)]
+            self.arry_data = arry[(arry[:, 0] >= self.startday * 10000) &
+                                  (arry[:, 0] <= self.endday * 10000 + 2400) &
+                                  (arry[:, 0] % 10000 >= self.starttime) &
+                                  (arry[:, 0] % 10000 <= self.endtime)]
 
     def Strategy(self):
         def now_utc():
-            return strp_time('%Y%m%d%H%M', str(self.index))
+            return GetIndexDatetime(self.index)
 
         def Parameter_Previous(aindex, pre):
             if pre < 데이터길이:
@@ -176,8 +178,7 @@ class BackEngineBinanceMin(BackEngineBinanceTick):
             else:
                 if tick + pre <= 데이터길이:
                     sindex = (self.indexn + 1 - pre - tick) if pre != -1  else self.indexb + 1 - tick
-                    eindex = (self.indexn + 1 - pre) if pre != -1  else self.indexb + 1
-                    return round(self.arry_data[sindex:eindex, 1].mean(), 8)
+                    return round(self.GetWindowValue(1, tick, 'mean', sindex), 8)
                 return 0
 
         def GetArrayIndex(aindex):
@@ -189,15 +190,7 @@ class BackEngineBinanceMin(BackEngineBinanceTick):
             else:
                 if tick + pre <= 데이터길이:
                     sindex = (self.indexn + 1 - pre - tick) if pre != -1  else self.indexb + 1 - tick
-                    eindex = (self.indexn + 1 - pre) if pre != -1  else self.indexb + 1
-                    if gubun_ == 'max':
-                        return self.arry_data[sindex:eindex, vindex].max()
-                    elif gubun_ == 'min':
-                        return self.arry_data[sindex:eindex, vindex].min()
-                    elif gubun_ == 'sum':
-                        return self.arry_data[sindex:eindex, vindex].sum()
-                    else:
-                        return self.arry_data[sindex:eindex, vindex].mean()
+                    return self.GetWindowValue(vindex, tick, gubun_, sindex)
                 return 0
 
         def 최고현재가(tick, pre=0):
@@ -404,9 +397,7 @@ class BackEngineBinanceMin(BackEngineBinanceTick):
             고저평균대비등락율, 매도총잔량, 매수총잔량, 매도호가5, 매도호가4, 매도호가3, 매도호가2, 매도호가1, 매수호가1, 매수호가2, \
             매수호가3, 매수호가4, 매수호가5, 매도잔량5, 매도잔량4, 매도잔량3, 매도잔량2, 매도잔량1, 매수잔량1, 매수잔량2, 매수잔량3, \
             매수잔량4, 매수잔량5, 매도수5호가잔량합, 관심종목 = self.arry_data[self.indexn, 1:39]
-        종목코드, 데이터길이, 시분초, 호가단위 = self.code, self.tick_count, int(str(self.index)[8:] + '00'), 매도호가2 - 매도호가1
-        self.bhogainfo = ((매도호가1, 매도잔량1), (매도호가2, 매도잔량2), (매도호가3, 매도잔량3), (매도호가4, 매도잔량4), (매도호가5, 매도잔량5))
-        self.shogainfo = ((매수호가1, 매수잔량1), (매수호가2, 매수잔량2), (매수호가3, 매수잔량3), (매수호가4, 매수잔량4), (매수호가5, 매수잔량5))
+        종목코드, 데이터길이, 시분초, 호가단위 = self.code, self.tick_count, self.index % 10000 * 100, 매도호가2 - 매도호가1
 
         start, end = self.indexn+1-self.tick_count, self.indexn+1
         mc = self.arry_data[start:end, 1]
@@ -424,6 +415,8 @@ class BackEngineBinanceMin(BackEngineBinanceTick):
                     self.vars[vturn] = self.vars_list[vturn][0][vkey]
                     if self.tick_count < self.vars[0]:
                         continue
+                    if self.prune_lanes and (vturn, vkey) in self.prune_lanes:
+                        continue
 
                     if self.indistg is not None:
                         exec(self.indistg)
@@ -439,16 +432,17 @@ class BackEngineBinanceMin(BackEngineBinanceTick):
 
                     BUY_LONG, SELL_SHORT = True, True
                     SELL_LONG, BUY_SHORT = False, False
-                    if not self.trade_info[vturn][vkey]['보유중']:
+                    if not self.arry_trade[self.trade_info[vturn][vkey], 0]:
                         if not 관심종목: continue
                         self.SetBuyCount(vturn, vkey, 현재가, 고가, 저가, 등락율각도(30), 당일거래대금각도(30))
                         exec(self.buystg)
                     else:
-                        수익률, 최고수익률, 최저수익률, 보유시간, 매수틱번호 = self.SetSellCount(vturn, vkey, 현재가, now_utc())
-                        포지션 = 'LONG' if self.trade_info[vturn][vkey]['보유중'] == 1 else 'SHORT'
+                        수익률, 최고수익률, 최저수익률, 보유시간, 매수틱번호 = self.SetSellCount(vturn, vkey, 현재가, self.indext)
+                        포지션 = 'LONG' if self.arry_trade[self.trade_info[vturn][vkey], 0] == 1 else 'SHORT'
                         exec(self.sellstg)
 
         elif self.opti_turn == 3:
+            self.cond_blocked = None
             for vturn in self.trade_info.keys():
                 for vkey in self.trade_info[vturn].keys():
                     index_ = vturn * 20 + vkey
@@ -458,6 +452,8 @@ class BackEngineBinanceMin(BackEngineBinanceTick):
                             break
                     elif self.tick_count < self.avgtime:
                         break
+                    if self.prune_lanes and (vturn, vkey) in self.prune_lanes:
+                        continue
 
                     if self.indistg is not None:
                         exec(self.indistg)
@@ -473,16 +469,19 @@ class BackEngineBinanceMin(BackEngineBinanceTick):
 
                     BUY_LONG, SELL_SHORT = True, True
                     SELL_LONG, BUY_SHORT = False, False
-                    if not self.trade_info[vturn][vkey]['보유중']:
+                    if not self.arry_trade[self.trade_info[vturn][vkey], 0]:
                         if not 관심종목: continue
                         self.SetBuyCount(vturn, vkey, 현재가, 고가, 저가, 등락율각도(30), 당일거래대금각도(30))
                         if self.back_type != '조건최적화':
                             exec(self.buystg)
-                        else:
+                        elif self.cond_matrix is None:
                             exec(self.dict_buystg[index_])
+                        else:
+                            if self.cond_blocked is None: self.cond_blocked = GetCondBlocked(self.cond_matrix, globals(), locals())
+                            if not self.cond_blocked[index_]: self.Buy(vturn, vkey, 'LONG' if self.is_long else 'SHORT')
                     else:
-                        수익률, 최고수익률, 최저수익률, 보유시간, 매수틱번호 = self.SetSellCount(vturn, vkey, 현재가, now_utc())
-                        포지션 = 'LONG' if self.trade_info[vturn][vkey]['보유중'] == 1 else 'SHORT'
+                        수익률, 최고수익률, 최저수익률, 보유시간, 매수틱번호 = self.SetSellCount(vturn, vkey, 현재가, self.indext)
+                        포지션 = 'LONG' if self.arry_trade[self.trade_info[vturn][vkey], 0] == 1 else 'SHORT'
                         if self.back_type != '조건최적화':
                             exec(self.sellstg)
                         else:
@@ -510,11 +509,11 @@ class BackEngineBinanceMin(BackEngineBinanceTick):
 
             BUY_LONG, SELL_SHORT = True, True
             SELL_LONG, BUY_SHORT = False, False
-            if not self.trade_info[vturn][vkey]['보유중']:
+            if not self.arry_trade[self.trade_info[vturn][vkey], 0]:
                 if not 관심종목: return
                 self.SetBuyCount(vturn, vkey, 현재가, 고가, 저가, 등락율각도(30), 당일거래대금각도(30))
                 exec(self.buystg)
             else:
-                수익률, 최고수익률, 최저수익률, 보유시간, 매수틱번호 = self.SetSellCount(vturn, vkey, 현재가, now_utc())
-                포지션 = 'LONG' if self.trade_info[vturn][vkey]['보유중'] == 1 else 'SHORT'
+                수익률, 최고수익률, 최저수익률, 보유시간, 매수틱번호 = self.SetSellCount(vturn, vkey, 현재가, self.indext)
+                포지션 = 'LONG' if self.arry_trade[self.trade_info[vturn][vkey], 0] == 1 else 'SHORT'
                 exec(self.sellstg)
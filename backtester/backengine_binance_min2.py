@@ -1,6 +1,6 @@
 import math
 from talib import stream
-from backtester.back_static import GetIndicator
+from backtester.back_static import GetIndicator, GetIndexDatetime, GetSecondDatetime, GetCondBlocked
 from backtester.backengine_binance_tick2 import BackEngineBinanceTick2
 from utility.setting import BACK_TEMP
 # noinspection PyUnresolvedReferences
@@ -20,27 +20,29 @@ class BackEngineBinanceMin2(BackEngineBinanceTick2):
             value_list = [compile_condition(x) for x in value_list]
             self.dict_condition = dict(zip(key_list, value_list))
 
-    def SetArrayTick(self, code, same_days, same_time):
-        if not self.dict_set['백테일괄로딩']:
-            self.dict_arry = {code: pickle_read(f'{BACK_TEMP}/{self.gubun}_{code}_tick')}
+    def SetArrayTick(self, code, same_days, same_time, arry=None):
+        if arry is None:
+            if not self.dict_set['백테일괄로딩']:
+                self.dict_arry = {code: pickle_read(f'{BACK_TEMP}/{self.gubun}_{code}_tick')}
+            arry = self.dict_arry[code]
 
         if same_days and same_time:
-            self.arry_data = self.dict_arry[code]
+            self.arry_data = arry
         elif same_time:
-            self.arry_data = self.dict_arry[code][(self.dict_arry[code][:, 0] >= self.startday * 10000) &
-                                                  (self.dict_arry[code][:, 0] <= self.endday * 10000 + 2400)]
+            self.arry_data = arry[(arry[:, 0] >= self.startday * 10000) &
+                                  (arry[:, 0] <= self.endday * 10000 + 2400)]
         elif same_days:
-            self.arry_data = self.dict_arry[code][(self.dict_arry[code][:, 0] % 10000 >= self.starttime) &
-                                                  (self.dict_arry[code][:, 0] % 10000 <= self.endtime)]
+            self.arry_data = arry[(arry[:, 0] % 10000 >= self.starttime) &
+                                  (arry[:, 0] % 10000 <= self.endtime)]
         else:
-            self.arry_data = self.dict_arry[code][(self.dict_arry[code][:, 0] >= self.startday * 10000) &
-                                                  (self.dict_arry[code][:, 0] <= self.endday * 10000 + 2400) &
-                                                  (self.dict_arry[code][:, 0] % 10000 >= self.starttime) &
-                                                  (self.dict_arry[code][:, 0] % 10000 <= self.endtime)]
+            self.arry_data = arry[(arry[:, 0] >= self.startday * 10000) &
+                                  (arry[:, 0] <= self.endday * 10000 + 2400) &
+                                  (arry[:, 0] % 10000 >= self.starttime) &
+                                  (arry[:, 0] % 10000 <= self.endtime)]
 
     def Strategy(self):
         def now_utc():
-            return strp_time('%Y%m%d%H%M', str(self.index))
+            return GetIndexDatetime(self.index)
 
         def Parameter_Previous(aindex, pre):
             if pre < 데이터길이:
@@ -176,8 +178,7 @@ class BackEngineBinanceMin2(BackEngineBinanceTick2):
             else:
                 if tick + pre <= 데이터길이:
                     sindex = (self.indexn + 1 - pre - tick) if pre != -1  else self.indexb + 1 - tick
-                    eindex = (self.indexn + 1 - pre) if pre != -1  else self.indexb + 1
-                    return round(self.arry_data[sindex:eindex, 1].mean(), 8)
+                    return round(self.GetWindowValue(1, tick, 'mean', sindex), 8)
                 return 0
 
         def GetArrayIndex(aindex):
@@ -189,15 +190,7 @@ class BackEngineBinanceMin2(BackEngineBinanceTick2):
             else:
                 if tick + pre <= 데이터길이:
                     sindex = (self.indexn + 1 - pre - tick) if pre != -1  else self.indexb + 1 - tick
-                    eindex = (self.indexn + 1 - pre) if pre != -1  else self.indexb + 1
-                    if gubun_ == 'max':
-                        return self.arry_data[sindex:eindex, vindex].max()
-                    elif gubun_ == 'min':
-                        return self.arry_data[sindex:eindex, vindex].min()
-                    elif gubun_ == 'sum':
-                        return self.arry_data[sindex:eindex, vindex].sum()
-                    else:
-                        return self.arry_data[sindex:eindex, vindex].mean()
+                    return self.GetWindowValue(vindex, tick, gubun_, sindex)
                 return 0
 
         def 최고현재가(tick, pre=0):
@@ -404,9 +397,7 @@ class BackEngineBinanceMin2(BackEngineBinanceTick2):
             고저평균대비등락율, 매도총잔량, 매수총잔량, 매도호가5, 매도호가4, 매도호가3, 매도호가2, 매도호가1, 매수호가1, 매수호가2, \
             매수호가3, 매수호가4, 매수호가5, 매도잔량5, 매도잔량4, 매도잔량3, 매도잔량2, 매도잔량1, 매수잔량1, 매수잔량2, 매수잔량3, \
             매수잔량4, 매수잔량5, 매도수5호가잔량합, 관심종목 = self.arry_data[self.indexn, 1:39]
-        종목코드, 데이터길이, 시분초, 호가단위 = self.code, self.tick_count, int(str(self.index)[8:] + '00'), 매도호가2 - 매도호가1
-        self.bhogainfo = ((매도호가1, 매도잔량1), (매도호가2, 매도잔량2), (매도호가3, 매도잔량3), (매도호가4, 매도잔량4), (매도호가5, 매도잔량5))
-        self.shogainfo = ((매수호가1, 매수잔량1), (매수호가2, 매수잔량2), (매수호가3, 매수잔량3), (매수호가4, 매수잔량4), (매수호가5, 매수잔량5))
+        종목코드, 데이터길이, 시분초, 호가단위 = self.code, self.tick_count, self.index % 10000 * 100, 매도호가2 - 매도호가1
 
         start, end = self.indexn+1-self.tick_count, self.indexn+1
         mc = self.arry_data[start:end, 1]
@@ -424,12 +415,16 @@ class BackEngineBinanceMin2(BackEngineBinanceTick2):
                     self.vars[vturn] = self.vars_list[vturn][0][vkey]
                     if self.tick_count < self.vars[0]:
                         continue
+                    if self.prune_lanes and (vturn, vkey) in self.prune_lanes:
+                        continue
 
                     보유중, 매수가, 매도가, 주문수량, 보유수량, 최고수익률, 최저수익률, 매수틱번호, 매수시간, 추가매수시간, 매수호가, \
                         매도호가, 매수호가_, 매도호가_, 추가매수가, 매수호가단위, 매도호가단위, 매수정정횟수, 매도정정횟수, 매수분할횟수, \
                         매도분할횟수, 매수주문취소시간, 매도주문취소시간, 주문포지션 = self.trade_info[vturn][vkey].values()
                     포지션, 수익금, 수익률, 최고수익률, 최저수익률, 보유시간 = \
-                        self.GetSellInfo(vturn, vkey, 매수틱번호, 보유수량, 매수가, 현재가, 최고수익률, 최저수익률, 매수시간, now_utc())
+                        self.GetSellInfo(vturn, vkey, 매수틱번호, 보유수량, 매수가, 현재가, 최고수익률, 최저수익률, 매수시간, self.indext)
+                    매수시간, 매수주문취소시간, 매도주문취소시간 = \
+                        GetSecondDatetime(매수시간), GetSecondDatetime(매수주문취소시간), GetSecondDatetime(매도주문취소시간)
 
                     gubun = self.CheckBuyOrSell(보유중, 현재가, 매수분할횟수, 매수호가, 매도호가, 관심종목, 관심종목N(1), vturn, vkey, 분봉저가=분봉저가, 분봉고가=분봉고가)
                     if gubun is None: continue
@@ -451,7 +446,7 @@ class BackEngineBinanceMin2(BackEngineBinanceTick2):
 
                     if '매수' in gubun:
                         if not 관심종목: continue
-                        if self.CancelBuyOrder(현재가, now_utc(), vturn, vkey): continue
+                        if self.CancelBuyOrder(현재가, self.indext, vturn, vkey): continue
                         self.SetBuyCount2(vturn, vkey, 보유중, 매수가, 현재가, 고가, 저가, 등락율각도(30), 당일거래대금각도(30), 매수분할횟수, 매도호가1, 매수호가1, 호가단위)
                         if not 보유중:
                             exec(self.buystg)
@@ -461,7 +456,7 @@ class BackEngineBinanceMin2(BackEngineBinanceTick2):
 
                     if '매도' in gubun:
                         if self.CheckSonjeol(수익률, 수익금, vturn, vkey): continue
-                        if self.CancelSellOrder(현재가, 매수분할횟수, now_utc(), vturn, vkey): continue
+                        if self.CancelSellOrder(현재가, 매수분할횟수, self.indext, vturn, vkey): continue
                         self.SetSellCount2(vturn, vkey, 보유수량, 현재가, 고가, 저가, 등락율각도(30), 당일거래대금각도(30), 매도분할횟수, 매도호가1, 매수호가1, 호가단위)
                         if self.dict_set['코인매도분할횟수'] == 1:
                             exec(self.sellstg)
@@ -470,6 +465,7 @@ class BackEngineBinanceMin2(BackEngineBinanceTick2):
                                 exec(self.sellstg)
 
         elif self.opti_turn == 3:
+            self.cond_blocked = None
             for vturn in self.trade_info.keys():
                 for vkey in self.trade_info[vturn].keys():
                     index_ = vturn * 20 + vkey
@@ -479,12 +475,16 @@ class BackEngineBinanceMin2(BackEngineBinanceTick2):
                             break
                     elif self.tick_count < self.avgtime:
                         break
+                    if self.prune_lanes and (vturn, vkey) in self.prune_lanes:
+                        continue
 
                     보유중, 매수가, 매도가, 주문수량, 보유수량, 최고수익률, 최저수익률, 매수틱번호, 매수시간, 추가매수시간, 매수호가, \
                         매도호가, 매수호가_, 매도호가_, 추가매수가, 매수호가단위, 매도호가단위, 매수정정횟수, 매도정정횟수, 매수분할횟수, \
                         매도분할횟수, 매수주문취소시간, 매도주문취소시간, 주문포지션 = self.trade_info[vturn][vkey].values()
                     포지션, 수익금, 수익률, 최고수익률, 최저수익률, 보유시간 = \
-                        self.GetSellInfo(vturn, vkey, 매수틱번호, 보유수량, 매수가, 현재가, 최고수익률, 최저수익률, 매수시간, now_utc())
+                        self.GetSellInfo(vturn, vkey, 매수틱번호, 보유수량, 매수가, 현재가, 최고수익률, 최저수익률, 매수시간, self.indext)
+                    매수시간, 매수주문취소시간, 매도주문취소시간 = \
+                        GetSecondDatetime(매수시간), GetSecondDatetime(매수주문취소시간), GetSecondDatetime(매도주문취소시간)
 
                     gubun = self.CheckBuyOrSell(보유중, 현재가, 매수분할횟수, 매수호가, 매도호가, 관심종목, 관심종목N(1), vturn, vkey, 분봉저가=분봉저가, 분봉고가=분봉고가)
                     if gubun is None: continue
@@ -506,23 +506,29 @@ class BackEngineBinanceMin2(BackEngineBinanceTick2):
 
                     if '매수' in gubun:
                         if not 관심종목: continue
-                        if self.CancelBuyOrder(현재가, now_utc(), vturn, vkey): continue
+                        if self.CancelBuyOrder(현재가, self.indext, vturn, vkey): continue
                         self.SetBuyCount2(vturn, vkey, 보유중, 매수가, 현재가, 고가, 저가, 등락율각도(30), 당일거래대금각도(30), 매수분할횟수, 매도호가1, 매수호가1, 호가단위)
                         if not 보유중:
                             if self.back_type != '조건최적화':
                                 exec(self.buystg)
-                            else:
+                            elif self.cond_matrix is None:
                                 exec(self.dict_buystg[index_])
+                            else:
+                                if self.cond_blocked is None: self.cond_blocked = GetCondBlocked(self.cond_matrix, globals(), locals())
+                                if not self.cond_blocked[index_]: self.Buy(vturn, vkey, 'LONG' if self.is_long else 'SHORT')
                         else:
                             if not self.CheckDividBuy(포지션, 현재가, 추가매수가, 수익률, vturn, vkey) and self.dict_set['코인매수분할시그널']:
                                 if self.back_type != '조건최적화':
                                     exec(self.buystg)
-                                else:
+                                elif self.cond_matrix is None:
                                     exec(self.dict_buystg[index_])
+                                else:
+                                    if self.cond_blocked is None: self.cond_blocked = GetCondBlocked(self.cond_matrix, globals(), locals())
+                                    if not self.cond_blocked[index_]: self.Buy(vturn, vkey, 'LONG' if self.is_long else 'SHORT')
 
                     if '매도' in gubun:
                         if self.CheckSonjeol(수익률, 수익금, vturn, vkey): continue
-                        if self.CancelSellOrder(현재가, 매수분할횟수, now_utc(), vturn, vkey): continue
+                        if self.CancelSellOrder(현재가, 매수분할횟수, self.indext, vturn, vkey): continue
                         self.SetSellCount2(vturn, vkey, 보유수량, 현재가, 고가, 저가, 등락율각도(30), 당일거래대금각도(30), 매도분할횟수, 매도호가1, 매수호가1, 호가단위)
                         if self.dict_set['코인매도분할횟수'] == 1:
                             if self.back_type != '조건최적화':
@@ -548,7 +554,9 @@ class BackEngineBinanceMin2(BackEngineBinanceTick2):
                 매도호가, 매수호가_, 매도호가_, 추가매수가, 매수호가단위, 매도호가단위, 매수정정횟수, 매도정정횟수, 매수분할횟수, \
                 매도분할횟수, 매수주문취소시간, 매도주문취소시간, 주문포지션 = self.trade_info[vturn][vkey].values()
             포지션, 수익금, 수익률, 최고수익률, 최저수익률, 보유시간 = \
-                self.GetSellInfo(vturn, vkey, 매수틱번호, 보유수량, 매수가, 현재가, 최고수익률, 최저수익률, 매수시간, now_utc())
+                self.GetSellInfo(vturn, vkey, 매수틱번호, 보유수량, 매수가, 현재가, 최고수익률, 최저수익률, 매수시간, self.indext)
+            매수시간, 매수주문취소시간, 매도주문취소시간 = \
+                GetSecondDatetime(매수시간), GetSecondDatetime(매수주문취소시간), GetSecondDatetime(매도주문취소시간)
 
             gubun = self.CheckBuyOrSell(보유중, 현재가, 매수분할횟수, 매수호가, 매도호가, 관심종목, 관심종목N(1), vturn, vkey, 분봉저가=분봉저가, 분봉고가=분봉고가)
             if gubun is None: return
@@ -570,7 +578,7 @@ class BackEngineBinanceMin2(BackEngineBinanceTick2):
 
             if '매수' in gubun:
                 if not 관심종목: return
-                if self.CancelBuyOrder(현재가, now_utc(), vturn, vkey): return
+                if self.CancelBuyOrder(현재가, self.indext, vturn, vkey): return
                 self.SetBuyCount2(vturn, vkey, 보유중, 매수가, 현재가, 고가, 저가, 등락율각도(30), 당일거래대금각도(30), 매수분할횟수, 매도호가1, 매수호가1, 호가단위)
                 if not 보유중:
                     exec(self.buystg)
@@ -580,7 +588,7 @@ class BackEngineBinanceMin2(BackEngineBinanceTick2):
 
             if '매도' in gubun:
                 if self.CheckSonjeol(수익률, 수익금, vturn, vkey): return
-                if self.CancelSellOrder(현재가, 매수분할횟수, now_utc(), vturn, vkey): return
+                if self.CancelSellOrder(현재가, 매수분할횟수, self.indext, vturn, vkey): return
                 self.SetSellCount2(vturn, vkey, 보유수량, 현재가, 고가, 저가, 등락율각도(30), 당일거래대금각도(30), 매도분할횟수, 매도호가1, 매수호가1, 호가단위)
                 if self.dict_set['코인매도분할횟수'] == 1:
                     exec(self.sellstg)
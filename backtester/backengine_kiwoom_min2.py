@@ -1,6 +1,6 @@
 import math
 from talib import stream
-from backtester.back_static import GetIndicator
+from backtester.back_static import GetIndicator, GetIndexDatetime, GetSecondDatetime, GetCondBlocked
 from backtester.backengine_kiwoom_tick2 import BackEngineKiwoomTick2
 from utility.setting import BACK_TEMP
 # noinspection PyUnresolvedReferences
@@ -20,27 +20,29 @@ class BackEngineKiwoomMin2(BackEngineKiwoomTick2):
             value_list = [compile_condition(x) for x in value_list]
             self.dict_condition = dict(zip(key_list, value_list))
 
-    def SetArrayTick(self, code, same_days, same_time):
-        if not self.dict_set['백테일괄로딩']:
-            self.dict_arry = {code: pickle_read(f'{BACK_TEMP}/{self.gubun}_{code}_tick')}
+    def SetArrayTick(self, code, same_days, same_time, arry=None):
+        if arry is None:
+            if not self.dict_set['백테일괄로딩']:
+                self.dict_arry = {code: pickle_read(f'{BACK_TEMP}/{self.gubun}_{code}_tick')}
+            arry = self.dict_arry[code]
 
         if same_days and same_time:
-            self.arry_data = self.dict_arry[code]
+            self.arry_data = arry
         elif same_time:
-            self.arry_data = self.dict_arry[code][(self.dict_arry[code][:, 0] >= self.startday * 10000) &
-                                                  (self.dict_arry[code][:, 0] <= self.endday * 10000 + 2400)]
+            self.arry_data = arry[(arry[:, 0] >= self.startday * 10000) &
+                                  (arry[:, 0] <= self.endday * 10000 + 2400)]
         elif same_days:
-            self.arry_data = self.dict_arry[code][(self.dict_arry[code][:, 0] % 10000 >= self.starttime) &
-                                                  (self.dict_arry[code][:, 0] % 10000 <= self.endtime)]
+            self.arry_data = arry[(arry[:, 0] % 10000 >= self.starttime) &
+                                  (arry[:, 0] % 10000 <= self.endtime)]
         else:
-            self.arry_data = self.dict_arry[code][(self.dict_arry[code][:, 0] >= self.startday * 10000) &
-                                                  (self.dict_arry[code][:, 0] <= self.endday * 10000 + 2400) &
-                                                  (self.dict_arry[code][:, 0] % 10000 >= self.starttime) &
-                                                  (self.dict_arry[code][:, 0] % 10000 <= self.endtime)]
+            self.arry_data = arry[(arry[:, 0] >= self.startday * 10000) &
+                                  (arry[:, 0] <= self.endday * 10000 + 2400) &
+                                  (arry[:, 0] % 10000 >= self.starttime) &
+                                  (arry[:, 0] % 10000 <= self.endtime)]
 
     def Strategy(self):
         def now():
-            return strp_time('%Y%m%d%H%M', str(self.index))
+            return GetIndexDatetime(self.index)
 
         def Parameter_Previous(aindex, pre):
             if pre < 데이터길이:
@@ -194,8 +196,7 @@ class BackEngineKiwoomMin2(BackEngineKiwoomTick2):
             else:
                 if tick + pre <= 데이터길이:
                     sindex = (self.indexn + 1 - pre - tick) if pre != -1  else self.indexb + 1 - tick
-                    eindex = (self.indexn + 1 - pre) if pre != -1  else self.indexb + 1
-                    return round(self.arry_data[sindex:eindex, 1].mean(), 3)
+                    return round(self.GetWindowValue(1, tick, 'mean', sindex), 3)
                 return 0
 
         def GetArrayIndex(aindex):
@@ -207,15 +208,7 @@ class BackEngineKiwoomMin2(BackEngineKiwoomTick2):
             else:
                 if tick + pre <= 데이터길이:
                     sindex = (self.indexn + 1 - pre - tick) if pre != -1  else self.indexb + 1 - tick
-                    eindex = (self.indexn + 1 - pre) if pre != -1  else self.indexb + 1
-                    if gubun_ == 'max':
-                        return self.arry_data[sindex:eindex, vindex].max()
-                    elif gubun_ == 'min':
-                        return self.arry_data[sindex:eindex, vindex].min()
-                    elif gubun_ == 'sum':
-                        return self.arry_data[sindex:eindex, vindex].sum()
-                    else:
-                        return self.arry_data[sindex:eindex, vindex].mean()
+                    return self.GetWindowValue(vindex, tick, gubun_, sindex)
                 return 0
 
         def 최고현재가(tick, pre=0):
@@ -421,18 +414,14 @@ class BackEngineKiwoomMin2(BackEngineKiwoomTick2):
             except: WILLR_ = 0
             return WILLR_
 
-        종목명, 종목코드, 데이터길이, 시분초 = self.name, self.code, self.tick_count, int(str(self.index)[8:] + '00')
+        종목명, 종목코드, 데이터길이, 시분초 = self.name, self.code, self.tick_count, self.index % 10000 * 100
         현재가, 시가, 고가, 저가, 등락율, 당일거래대금, 체결강도, 거래대금증감, 전일비, 회전율, 전일동시간비, 시가총액, \
             라운드피겨위5호가이내, 분당매수수량, 분당매도수량, VI해제시간, VI가격, VI호가단위, 분봉시가, 분봉고가, 분봉저가, 분당거래대금, \
             고저평균대비등락율, 매도총잔량, 매수총잔량, 매도호가5, 매도호가4, 매도호가3, 매도호가2, 매도호가1, 매수호가1, 매수호가2, \
             매수호가3, 매수호가4, 매수호가5, 매도잔량5, 매도잔량4, 매도잔량3, 매도잔량2, 매도잔량1, 매수잔량1, 매수잔량2, 매수잔량3, \
             매수잔량4, 매수잔량5, 매도수5호가잔량합, 관심종목 = self.arry_data[self.indexn, 1:48]
         호가단위 = 매도호가2 - 매도호가1
-        VI해제시간, VI아래5호가 = strp_time('%Y%m%d%H%M%S', str(int(VI해제시간))), GetUvilower5(VI가격, VI호가단위, self.index)
-        bhogainfo = ((매도호가1, 매도잔량1), (매도호가2, 매도잔량2), (매도호가3, 매도잔량3), (매도호가4, 매도잔량4), (매도호가5, 매도잔량5))
-        shogainfo = ((매수호가1, 매수잔량1), (매수호가2, 매수잔량2), (매수호가3, 매수잔량3), (매수호가4, 매수잔량4), (매수호가5, 매수잔량5))
-        self.bhogainfo = bhogainfo[:self.dict_set['주식매수시장가잔량범위']]
-        self.shogainfo = shogainfo[:self.dict_set['주식매도시장가잔량범위']]
+        VI해제시간, VI아래5호가 = GetIndexDatetime(VI해제시간), GetUvilower5(VI가격, VI호가단위, self.index)
 
         start, end = self.indexn+1-self.tick_count, self.indexn+1
         mc = self.arry_data[start:end, 1]
@@ -450,12 +439,16 @@ class BackEngineKiwoomMin2(BackEngineKiwoomTick2):
                     self.vars[vturn] = self.vars_list[vturn][0][vkey]
                     if self.tick_count < self.vars[0]:
                         continue
+                    if self.prune_lanes and (vturn, vkey) in self.prune_lanes:
+                        continue
 
                     보유중, 매수가, 매도가, 주문수량, 보유수량, 최고수익률, 최저수익률, 매수틱번호, 매수시간, 추가매수시간, 매수호가, \
                         매도호가, 매수호가_, 매도호가_, 추가매수가, 매수호가단위, 매도호가단위, 매수정정횟수, 매도정정횟수, 매수분할횟수, \
                         매도분할횟수, 매수주문취소시간, 매도주문취소시간 = self.trade_info[vturn][vkey].values()
                     수익금, 수익률, 최고수익률, 최저수익률, 보유시간 = \
-                        self.GetSellInfo(vturn, vkey, 매수틱번호, 보유수량, 매수가, 현재가, 최고수익률, 최저수익률, 매수시간, now())
+                        self.GetSellInfo(vturn, vkey, 매수틱번호, 보유수량, 매수가, 현재가, 최고수익률, 최저수익률, 매수시간, self.indext)
+                    매수시간, 매수주문취소시간, 매도주문취소시간 = \
+                        GetSecondDatetime(매수시간), GetSecondDatetime(매수주문취소시간), GetSecondDatetime(매도주문취소시간)
 
                     gubun = self.CheckBuyOrSell(보유중, 현재가, 매수분할횟수, 매수호가, 매도호가, 관심종목, 관심종목N(1), vturn, vkey, 분봉저가=분봉저가, 분봉고가=분봉고가)
                     if gubun is None: continue
@@ -475,7 +468,7 @@ class BackEngineKiwoomMin2(BackEngineKiwoomTick2):
                     매수, 매도 = True, False
                     if '매수' in gubun:
                         if not 관심종목: continue
-                        if self.CancelBuyOrder(현재가, now(), vturn, vkey): continue
+                        if self.CancelBuyOrder(현재가, self.indext, vturn, vkey): continue
                         self.SetBuyCount2(vturn, vkey, 보유중, 매수가, 현재가, 고가, 저가, 등락율각도(30), 당일거래대금각도(30),
                                           전일비, 회전율, 전일동시간비, 매수분할횟수, 매도호가1, 매수호가1, 호가단위)
                         if not 보유중:
@@ -486,7 +479,7 @@ class BackEngineKiwoomMin2(BackEngineKiwoomTick2):
 
                     if '매도' in gubun:
                         if self.CheckSonjeol(수익률, 수익금, vturn, vkey): continue
-                        if self.CancelSellOrder(현재가, 매수분할횟수, now(), vturn, vkey): continue
+                        if self.CancelSellOrder(현재가, 매수분할횟수, self.indext, vturn, vkey): continue
                         self.SetSellCount2(vturn, vkey, 보유수량, 현재가, 고가, 저가, 등락율각도(30), 당일거래대금각도(30),
                                            전일비, 회전율, 전일동시간비, 매도분할횟수, 매도호가1, 매수호가1, 호가단위)
                         if self.dict_set['주식매도분할횟수'] == 1:
@@ -496,6 +489,7 @@ class BackEngineKiwoomMin2(BackEngineKiwoomTick2):
                                 exec(self.sellstg)
 
         elif self.opti_turn == 3:
+            self.cond_blocked = None
             for vturn in self.trade_info.keys():
                 for vkey in self.trade_info[vturn].keys():
                     index_ = vturn * 20 + vkey
@@ -505,12 +499,16 @@ class BackEngineKiwoomMin2(BackEngineKiwoomTick2):
                             break
                     elif self.tick_count < self.avgtime:
                         break
+                    if self.prune_lanes and (vturn, vkey) in self.prune_lanes:
+                        continue
 
                     보유중, 매수가, 매도가, 주문수량, 보유수량, 최고수익률, 최저수익률, 매수틱번호, 매수시간, 추가매수시간, 매수호가, \
                         매도호가, 매수호가_, 매도호가_, 추가매수가, 매수호가단위, 매도호가단위, 매수정정횟수, 매도정정횟수, 매수분할횟수, \
                         매도분할횟수, 매수주문취소시간, 매도주문취소시간 = self.trade_info[vturn][vkey].values()
                     수익금, 수익률, 최고수익률, 최저수익률, 보유시간 = \
-                        self.GetSellInfo(vturn, vkey, 매수틱번호, 보유수량, 매수가, 현재가, 최고수익률, 최저수익률, 매수시간, now())
+                        self.GetSellInfo(vturn, vkey, 매수틱번호, 보유수량, 매수가, 현재가, 최고수익률, 최저수익률, 매수시간, self.indext)
+                    매수시간, 매수주문취소시간, 매도주문취소시간 = \
+                        GetSecondDatetime(매수시간), GetSecondDatetime(매수주문취소시간), GetSecondDatetime(매도주문취소시간)
 
                     gubun = self.CheckBuyOrSell(보유중, 현재가, 매수분할횟수, 매수호가, 매도호가, 관심종목, 관심종목N(1), vturn, vkey, 분봉저가=분봉저가, 분봉고가=분봉고가)
                     if gubun is None: continue
@@ -530,24 +528,30 @@ class BackEngineKiwoomMin2(BackEngineKiwoomTick2):
                     매수, 매도 = True, False
                     if '매수' in gubun:
                         if not 관심종목: continue
-                        if self.CancelBuyOrder(현재가, now(), vturn, vkey): continue
+                        if self.CancelBuyOrder(현재가, self.indext, vturn, vkey): continue
                         self.SetBuyCount2(vturn, vkey, 보유중, 매수가, 현재가, 고가, 저가, 등락율각도(30), 당일거래대금각도(30),
                                           전일비, 회전율, 전일동시간비, 매수분할횟수, 매도호가1, 매수호가1, 호가단위)
                         if not 보유중:
                             if self.back_type != '조건최적화':
                                 exec(self.buystg)
-                            else:
+                            elif self.cond_matrix is None:
                                 exec(self.dict_buystg[index_])
+                            else:
+                                if self.cond_blocked is None: self.cond_blocked = GetCondBlocked(self.cond_matrix, globals(), locals())
+                                if not self.cond_blocked[index_]: self.Buy(vturn, vkey)
                         else:
                             if not self.CheckDividBuy(현재가, 추가매수가, 수익률, vturn, vkey) and self.dict_set['주식매도분할시그널']:
                                 if self.back_type != '조건최적화':
                                     exec(self.buystg)
-                                else:
+                                elif self.cond_matrix is None:
                                     exec(self.dict_buystg[index_])
+                                else:
+                                    if self.cond_blocked is None: self.cond_blocked = GetCondBlocked(self.cond_matrix, globals(), locals())
+                                    if not self.cond_blocked[index_]: self.Buy(vturn, vkey)
 
                     if '매도' in gubun:
                         if self.CheckSonjeol(수익률, 수익금, vturn, vkey): continue
-                        if self.CancelSellOrder(현재가, 매수분할횟수, now(), vturn, vkey): continue
+                        if self.CancelSellOrder(현재가, 매수분할횟수, self.indext, vturn, vkey): continue
                         self.SetSellCount2(vturn, vkey, 보유수량, 현재가, 고가, 저가, 등락율각도(30), 당일거래대금각도(30),
                                            전일비, 회전율, 전일동시간비, 매도분할횟수, 매도호가1, 매수호가1, 호가단위)
                         if self.dict_set['주식매도분할횟수'] == 1:
@@ -575,7 +579,9 @@ class BackEngineKiwoomMin2(BackEngineKiwoomTick2):
                 매도호가, 매수호가_, 매도호가_, 추가매수가, 매수호가단위, 매도호가단위, 매수정정횟수, 매도정정횟수, 매수분할횟수, \
                 매도분할횟수, 매수주문취소시간, 매도주문취소시간 = self.trade_info[vturn][vkey].values()
             수익금, 수익률, 최고수익률, 최저수익률, 보유시간 = \
-                self.GetSellInfo(vturn, vkey, 매수틱번호, 보유수량, 매수가, 현재가, 최고수익률, 최저수익률, 매수시간, now())
+                self.GetSellInfo(vturn, vkey, 매수틱번호, 보유수량, 매수가, 현재가, 최고수익률, 최저수익률, 매수시간, self.indext)
+            매수시간, 매수주문취소시간, 매도주문취소시간 = \
+                GetSecondDatetime(매수시간), GetSecondDatetime(매수주문취소시간), GetSecondDatetime(매도주문취소시간)
 
             gubun = self.CheckBuyOrSell(보유중, 현재가, 매수분할횟수, 매수호가, 매도호가, 관심종목, 관심종목N(1), vturn, vkey, 분봉저가=분봉저가, 분봉고가=분봉고가)
             if gubun is None: return
@@ -595,7 +601,7 @@ class BackEngineKiwoomMin2(BackEngineKiwoomTick2):
             매수, 매도 = True, False
             if '매수' in gubun:
                 if not 관심종목: return
-                if self.CancelBuyOrder(현재가, now(), vturn, vkey): return
+                if self.CancelBuyOrder(현재가, self.indext, vturn, vkey): return
                 self.SetBuyCount2(vturn, vkey, 보유중, 매수가, 현재가, 고가, 저가, 등락율각도(30), 당일거래대금각도(30),
                                   전일비, 회전율, 전일동시간비, 매수분할횟수, 매도호가1, 매수호가1, 호가단위)
                 if not 보유중:
@@ -606,7 +612,7 @@ class BackEngineKiwoomMin2(BackEngineKiwoomTick2):
 
             if '매도' in gubun:
                 if self.CheckSonjeol(수익률, 수익금, vturn, vkey): return
-                if self.CancelSellOrder(현재가, 매수분할횟수, now(), vturn, vkey): return
+                if self.CancelSellOrder(현재가, 매수분할횟수, self.indext, vturn, vkey): return
                 self.SetSellCount2(vturn, vkey, 보유수량, 현재가, 고가, 저가, 등락율각도(30), 당일거래대금각도(30), 전일비,
                                    회전율, 전일동시간비, 매도분할횟수, 매도호가1, 매수호가1, 호가단위)
                 if self.dict_set['주식매도분할횟수'] == 1:
@@ -1,6 +1,6 @@
 import math
 from traceback import print_exc
-from backtester.back_static import GetTradeInfo
+from backtester.back_static import GetTradeInfo, GetBatchLanes, IsSampleCode, GetIndexDatetime, GetSecondDatetime, GetCondBlocked
 from backtester.backengine_kiwoom_tick import BackEngineKiwoomTick
 from utility.setting import dict_order_ratio
 from utility.static import strp_time, timedelta_sec, roundfigure_upper, roundfigure_lower, GetKiwoomPgSgSp, GetUvilower5
@@ -17,8 +17,10 @@ class BackEngineKiwoomTick2(BackEngineKiwoomTick):
             self.day_info   = {t: {k: v1 for k in range(len(x[0]))} for t, x in enumerate(self.vars_list) if len(x[0]) > 1}
             self.trade_info = {t: {k: v2 for k in range(len(x[0]))} for t, x in enumerate(self.vars_list) if len(x[0]) > 1}
         elif self.opti_turn == 3:
-            self.day_info   = {t: {k: v1 for k in range(20)} for t in range(50 if self.back_type == 'GA최적화' else 1)}
-            self.trade_info = {t: {k: v2 for k in range(20)} for t in range(50 if self.back_type == 'GA최적화' else 1)}
+            lanes = GetBatchLanes(len(self.vars_lists) if self.back_type != '조건최적화' else len(self.dict_buystg)) \
+                if self.batch_lanes is None else self.batch_lanes
+            self.day_info   = {t: {k: v1 for k in keys} for t, keys in lanes.items()}
+            self.trade_info = {t: {k: v2 for k in keys} for t, keys in lanes.items()}
         else:
             self.day_info   = {0: {0: v1}}
             self.trade_info = {0: {0: v2}}
@@ -40,23 +42,32 @@ class BackEngineKiwoomTick2(BackEngineKiwoomTick):
             self.tq.put(('전체틱수', int(total_ticks / 100)))
             self.tick_calcul = True
 
+        self.trade_count = {}
+        self.prune_lanes = set()
+        self.InitResult()
         j = 0
         len_codes = len(self.code_list)
-        for k, code in enumerate(self.code_list):
+        for k, (code, arry) in enumerate(self.GetWorkList()):
+            if not IsSampleCode(code, self.sample_rate):
+                self.tq.put(('백테완료', self.gubun, k+1, len_codes))
+                continue
+
             if self.dict_set['백테주문관리적용'] and self.dict_set['주식매수금지블랙리스트'] and code in self.dict_set['주식블랙리스트'] and self.back_type != '백파인더':
                 self.tq.put(('백테완료', 0, self.gubun, k+1, len_codes))
                 continue
 
             self.code = code
             self.name = self.dict_cn[self.code] if self.code in self.dict_cn.keys() else self.code
-            self.SetArrayTick(code, same_days, same_time)
+            self.SetArrayTick(code, same_days, same_time, arry)
             last = len(self.arry_data) - 1
             if last > 0:
+                arry_time, arry_dayend = self.SetTimeArray()
                 for i, index in enumerate(self.arry_data[:, 0]):
                     self.index  = int(index)
+                    self.indext = int(arry_time[i])
                     self.indexn = i
                     self.tick_count += 1
-                    next_day_change = i == last or str(index)[:8] != str(self.arry_data[i + 1, 0])[:8]
+                    next_day_change = arry_dayend[i]
                     if not next_day_change:
                         try:
                             self.Strategy()
@@ -71,13 +82,14 @@ class BackEngineKiwoomTick2(BackEngineKiwoomTick):
                     j += 1
                     if self.opti_turn in (1, 3) and j % 100 == 0: self.tq.put('탐색완료')
 
+            self.FlushResult()
             self.tq.put(('백테완료', self.gubun, k+1, len_codes))
 
         if self.profile: self.pr.print_stats(sort='cumulative')
 
     def Strategy(self):
         def now():
-            return strp_time('%Y%m%d%H%M%S', str(self.index))
+            return GetIndexDatetime(self.index)
 
         def Parameter_Previous(aindex, pre):
             if pre < 데이터길이:
@@ -220,8 +232,7 @@ class BackEngineKiwoomTick2(BackEngineKiwoomTick):
             else:
                 if tick + pre <= 데이터길이:
                     sindex = (self.indexn + 1 - pre - tick) if pre != -1  else self.indexb + 1 - tick
-                    eindex = (self.indexn + 1 - pre) if pre != -1  else self.indexb + 1
-                    return round(self.arry_data[sindex:eindex, 1].mean(), 3)
+                    return round(self.GetWindowValue(1, tick, 'mean', sindex), 3)
                 return 0
 
         def GetArrayIndex(aindex):
@@ -233,15 +244,7 @@ class BackEngineKiwoomTick2(BackEngineKiwoomTick):
             else:
                 if tick + pre <= 데이터길이:
                     sindex = (self.indexn + 1 - pre - tick) if pre != -1  else self.indexb + 1 - tick
-                    eindex = (self.indexn + 1 - pre) if pre != -1  else self.indexb + 1
-                    if gubun_ == 'max':
-                        return self.arry_data[sindex:eindex, vindex].max()
-                    elif gubun_ == 'min':
-                        return self.arry_data[sindex:eindex, vindex].min()
-                    elif gubun_ == 'sum':
-                        return self.arry_data[sindex:eindex, vindex].sum()
-                    else:
-                        return self.arry_data[sindex:eindex, vindex].mean()
+                    return self.GetWindowValue(vindex, tick, gubun_, sindex)
                 return 0
 
         def 최고현재가(tick, pre=0):
@@ -300,18 +303,14 @@ class BackEngineKiwoomTick2(BackEngineKiwoomTick):
                 return self.indexn - self.dict_cond_indexn[종목코드][조건명]
             return 0
 
-        종목명, 종목코드, 데이터길이, 시분초 = self.name, self.code, self.tick_count, int(str(self.index)[8:])
+        종목명, 종목코드, 데이터길이, 시분초 = self.name, self.code, self.tick_count, self.index % 1000000
         현재가, 시가, 고가, 저가, 등락율, 당일거래대금, 체결강도, 거래대금증감, 전일비, 회전율, 전일동시간비, 시가총액, 라운드피겨위5호가이내, \
             초당매수수량, 초당매도수량, VI해제시간, VI가격, VI호가단위, 초당거래대금, 고저평균대비등락율, 매도총잔량, 매수총잔량, \
             매도호가5, 매도호가4, 매도호가3, 매도호가2, 매도호가1, 매수호가1, 매수호가2, 매수호가3, 매수호가4, 매수호가5, \
             매도잔량5, 매도잔량4, 매도잔량3, 매도잔량2, 매도잔량1, 매수잔량1, 매수잔량2, 매수잔량3, 매수잔량4, 매수잔량5, \
             매도수5호가잔량합, 관심종목 = self.arry_data[self.indexn, 1:45]
         호가단위 = 매도호가2 - 매도호가1
-        VI해제시간, VI아래5호가 = strp_time('%Y%m%d%H%M%S', str(int(VI해제시간))), GetUvilower5(VI가격, VI호가단위, self.index)
-        bhogainfo = ((매도호가1, 매도잔량1), (매도호가2, 매도잔량2), (매도호가3, 매도잔량3), (매도호가4, 매도잔량4), (매도호가5, 매도잔량5))
-        shogainfo = ((매수호가1, 매수잔량1), (매수호가2, 매수잔량2), (매수호가3, 매수잔량3), (매수호가4, 매수잔량4), (매수호가5, 매수잔량5))
-        self.bhogainfo = bhogainfo[:self.dict_set['주식매수시장가잔량범위']]
-        self.shogainfo = shogainfo[:self.dict_set['주식매도시장가잔량범위']]
+        VI해제시간, VI아래5호가 = GetIndexDatetime(VI해제시간), GetUvilower5(VI가격, VI호가단위, self.index)
 
         if self.dict_condition:
             if 종목코드 not in self.dict_cond_indexn.keys():
@@ -329,12 +328,16 @@ class BackEngineKiwoomTick2(BackEngineKiwoomTick):
                     self.vars[vturn] = self.vars_list[vturn][0][vkey]
                     if self.tick_count < self.vars[0]:
                         continue
+                    if self.prune_lanes and (vturn, vkey) in self.prune_lanes:
+                        continue
 
                     보유중, 매수가, 매도가, 주문수량, 보유수량, 최고수익률, 최저수익률, 매수틱번호, 매수시간, 추가매수시간, 매수호가, \
                         매도호가, 매수호가_, 매도호가_, 추가매수가, 매수호가단위, 매도호가단위, 매수정정횟수, 매도정정횟수, 매수분할횟수, \
                         매도분할횟수, 매수주문취소시간, 매도주문취소시간 = self.trade_info[vturn][vkey].values()
                     수익금, 수익률, 최고수익률, 최저수익률, 보유시간 = \
-                        self.GetSellInfo(vturn, vkey, 매수틱번호, 보유수량, 매수가, 현재가, 최고수익률, 최저수익률, 매수시간, now())
+                        self.GetSellInfo(vturn, vkey, 매수틱번호, 보유수량, 매수가, 현재가, 최고수익률, 최저수익률, 매수시간, self.indext)
+                    매수시간, 매수주문취소시간, 매도주문취소시간 = \
+                        GetSecondDatetime(매수시간), GetSecondDatetime(매수주문취소시간), GetSecondDatetime(매도주문취소시간)
 
                     gubun = self.CheckBuyOrSell(보유중, 현재가, 매수분할횟수, 매수호가, 매도호가, 관심종목, 관심종목N(1), vturn, vkey)
                     if gubun is None: continue
@@ -342,7 +345,7 @@ class BackEngineKiwoomTick2(BackEngineKiwoomTick):
                     매수, 매도 = True, False
                     if '매수' in gubun:
                         if not 관심종목: continue
-                        if self.CancelBuyOrder(현재가, now(), vturn, vkey): continue
+                        if self.CancelBuyOrder(현재가, self.indext, vturn, vkey): continue
                         self.SetBuyCount2(vturn, vkey, 보유중, 매수가, 현재가, 고가, 저가, 등락율각도(30), 당일거래대금각도(30),
                                           전일비, 회전율, 전일동시간비, 매수분할횟수, 매도호가1, 매수호가1, 호가단위)
                         if not 보유중:
@@ -353,7 +356,7 @@ class BackEngineKiwoomTick2(BackEngineKiwoomTick):
 
                     if '매도' in gubun:
                         if self.CheckSonjeol(수익률, 수익금, vturn, vkey): continue
-                        if self.CancelSellOrder(현재가, 매수분할횟수, now(), vturn, vkey): continue
+                        if self.CancelSellOrder(현재가, 매수분할횟수, self.indext, vturn, vkey): continue
                         self.SetSellCount2(vturn, vkey, 보유수량, 현재가, 고가, 저가, 등락율각도(30), 당일거래대금각도(30),
                                            전일비, 회전율, 전일동시간비, 매도분할횟수, 매도호가1, 매수호가1, 호가단위)
                         if self.dict_set['주식매도분할횟수'] == 1:
@@ -363,6 +366,7 @@ class BackEngineKiwoomTick2(BackEngineKiwoomTick):
                                 exec(self.sellstg)
 
         elif self.opti_turn == 3:
+            self.cond_blocked = None
             for vturn in self.trade_info.keys():
                 for vkey in self.trade_info[vturn].keys():
                     index_ = vturn * 20 + vkey
@@ -372,12 +376,16 @@ class BackEngineKiwoomTick2(BackEngineKiwoomTick):
                             break
                     elif self.tick_count < self.avgtime:
                         break
+                    if self.prune_lanes and (vturn, vkey) in self.prune_lanes:
+                        continue
 
                     보유중, 매수가, 매도가, 주문수량, 보유수량, 최고수익률, 최저수익률, 매수틱번호, 매수시간, 추가매수시간, 매수호가, \
                         매도호가, 매수호가_, 매도호가_, 추가매수가, 매수호가단위, 매도호가단위, 매수정정횟수, 매도정정횟수, 매수분할횟수, \
                         매도분할횟수, 매수주문취소시간, 매도주문취소시간 = self.trade_info[vturn][vkey].values()
                     수익금, 수익률, 최고수익률, 최저수익률, 보유시간 = \
-                        self.GetSellInfo(vturn, vkey, 매수틱번호, 보유수량, 매수가, 현재가, 최고수익률, 최저수익률, 매수시간, now())
+                        self.GetSellInfo(vturn, vkey, 매수틱번호, 보유수량, 매수가, 현재가, 최고수익률, 최저수익률, 매수시간, self.indext)
+                    매수시간, 매수주문취소시간, 매도주문취소시간 = \
+                        GetSecondDatetime(매수시간), GetSecondDatetime(매수주문취소시간), GetSecondDatetime(매도주문취소시간)
 
                     gubun = self.CheckBuyOrSell(보유중, 현재가, 매수분할횟수, 매수호가, 매도호가, 관심종목, 관심종목N(1), vturn, vkey)
                     if gubun is None: continue
@@ -385,24 +393,30 @@ class BackEngineKiwoomTick2(BackEngineKiwoomTick):
                     매수, 매도 = True, False
                     if '매수' in gubun:
                         if not 관심종목: continue
-                        if self.CancelBuyOrder(현재가, now(), vturn, vkey): continue
+                        if self.CancelBuyOrder(현재가, self.indext, vturn, vkey): continue
                         self.SetBuyCount2(vturn, vkey, 보유중, 매수가, 현재가, 고가, 저가, 등락율각도(30), 당일거래대금각도(30),
                                           전일비, 회전율, 전일동시간비, 매수분할횟수, 매도호가1, 매수호가1, 호가단위)
                         if not 보유중:
                             if self.back_type != '조건최적화':
                                 exec(self.buystg)
-                            else:
+                            elif self.cond_matrix is None:
                                 exec(self.dict_buystg[index_])
+                            else:
+                                if self.cond_blocked is None: self.cond_blocked = GetCondBlocked(self.cond_matrix, globals(), locals())
+                                if not self.cond_blocked[index_]: self.Buy(vturn, vkey)
                         else:
                             if not self.CheckDividBuy(현재가, 추가매수가, 수익률, vturn, vkey) and self.dict_set['주식매도분할시그널']:
                                 if self.back_type != '조건최적화':
                                     exec(self.buystg)
-                                else:
+                                elif self.cond_matrix is None:
                                     exec(self.dict_buystg[index_])
+                                else:
+                                    if self.cond_blocked is None: self.cond_blocked = GetCondBlocked(self.cond_matrix, globals(), locals())
+                                    if not self.cond_blocked[index_]: self.Buy(vturn, vkey)
 
                     if '매도' in gubun:
                         if self.CheckSonjeol(수익률, 수익금, vturn, vkey): continue
-                        if self.CancelSellOrder(현재가, 매수분할횟수, now(), vturn, vkey): continue
+                        if self.CancelSellOrder(현재가, 매수분할횟수, self.indext, vturn, vkey): continue
                         self.SetSellCount2(vturn, vkey, 보유수량, 현재가, 고가, 저가, 등락율각도(30), 당일거래대금각도(30),
                                            전일비, 회전율, 전일동시간비, 매도분할횟수, 매도호가1, 매수호가1, 호가단위)
                         if self.dict_set['주식매도분할횟수'] == 1:
@@ -430,7 +444,9 @@ class BackEngineKiwoomTick2(BackEngineKiwoomTick):
                 매도호가, 매수호가_, 매도호가_, 추가매수가, 매수호가단위, 매도호가단위, 매수정정횟수, 매도정정횟수, 매수분할횟수, \
                 매도분할횟수, 매수주문취소시간, 매도주문취소시간 = self.trade_info[vturn][vkey].values()
             수익금, 수익률, 최고수익률, 최저수익률, 보유시간 = \
-                self.GetSellInfo(vturn, vkey, 매수틱번호, 보유수량, 매수가, 현재가, 최고수익률, 최저수익률, 매수시간, now())
+                self.GetSellInfo(vturn, vkey, 매수틱번호, 보유수량, 매수가, 현재가, 최고수익률, 최저수익률, 매수시간, self.indext)
+            매수시간, 매수주문취소시간, 매도주문취소시간 = \
+                GetSecondDatetime(매수시간), GetSecondDatetime(매수주문취소시간), GetSecondDatetime(매도주문취소시간)
 
             gubun = self.CheckBuyOrSell(보유중, 현재가, 매수분할횟수, 매수호가, 매도호가, 관심종목, 관심종목N(1), vturn, vkey)
             if gubun is None: return
@@ -438,7 +454,7 @@ class BackEngineKiwoomTick2(BackEngineKiwoomTick):
             매수, 매도 = True, False
             if '매수' in gubun:
                 if not 관심종목: return
-                if self.CancelBuyOrder(현재가, now(), vturn, vkey): return
+                if self.CancelBuyOrder(현재가, self.indext, vturn, vkey): return
                 self.SetBuyCount2(vturn, vkey, 보유중, 매수가, 현재가, 고가, 저가, 등락율각도(30), 당일거래대금각도(30),
                                   전일비, 회전율, 전일동시간비, 매수분할횟수, 매도호가1, 매수호가1, 호가단위)
                 if not 보유중:
@@ -449,7 +465,7 @@ class BackEngineKiwoomTick2(BackEngineKiwoomTick):
 
             if '매도' in gubun:
                 if self.CheckSonjeol(수익률, 수익금, vturn, vkey): return
-                if self.CancelSellOrder(현재가, 매수분할횟수, now(), vturn, vkey): return
+                if self.CancelSellOrder(현재가, 매수분할횟수, self.indext, vturn, vkey): return
                 self.SetSellCount2(vturn, vkey, 보유수량, 현재가, 고가, 저가, 등락율각도(30), 당일거래대금각도(30), 전일비,
                                    회전율, 전일동시간비, 매도분할횟수, 매도호가1, 매수호가1, 호가단위)
                 if self.dict_set['주식매도분할횟수'] == 1:
@@ -465,7 +481,7 @@ class BackEngineKiwoomTick2(BackEngineKiwoomTick):
             _, 수익금, 수익률 = GetKiwoomPgSgSp(보유수량 * 매수가, 보유수량 * 현재가)
             if 수익률 > 최고수익률:   self.trade_info[vturn][vkey]['최고수익률'] = 최고수익률 = 수익률
             elif 수익률 < 최저수익률: self.trade_info[vturn][vkey]['최저수익률'] = 최저수익률 = 수익률
-            보유시간 = (now_time - 매수시간).total_seconds() if len(str(self.index)) == 14 else int((now_time - 매수시간).total_seconds() / 60)
+            보유시간 = float(now_time - 매수시간) if self.time_unit == 1 else int((now_time - 매수시간) / 60)
         return 수익금, 수익률, 최고수익률, 최저수익률, 보유시간
 
     def CheckBuyOrSell(self, 보유중, 현재가, 매수분할횟수, 매수호가, 매도호가, 관심종목, 관심종목N1, vturn, vkey, 분봉저가=None, 분봉고가=None):
@@ -511,7 +527,7 @@ class BackEngineKiwoomTick2(BackEngineKiwoomTick):
     def CancelBuyOrder(self, 현재가, now_time, vturn, vkey):
         cancel = False
         거래횟수, 손절횟수, 직전거래시간, 손절매도시간 = self.day_info[vturn][vkey].values()
-        hms = int(str(self.index)[8:]) if len(str(self.index)) == 14 else int(str(self.index)[8:] + '00')
+        hms = self.index % 1000000 if self.time_unit == 1 else self.index % 10000 * 100
         if self.dict_set['주식매수금지거래횟수'] and self.dict_set['주식매수금지거래횟수값'] <= 거래횟수:
             cancel = True
         elif self.dict_set['주식매수금지손절횟수'] and self.dict_set['주식매수금지손절횟수값'] <= 손절횟수:
@@ -595,7 +611,7 @@ class BackEngineKiwoomTick2(BackEngineKiwoomTick):
             cancel = True
             return cancel
 
-        hms = int(str(self.index)[8:]) if len(str(self.index)) == 14 else int(str(self.index)[8:] + '00')
+        hms = self.index % 1000000 if self.time_unit == 1 else self.index % 10000 * 100
         if self.dict_set['주식매도금지시간'] and self.dict_set['주식매도금지시작시간'] < hms < self.dict_set['주식매도금지종료시간']:
             cancel = True
         elif self.dict_set['주식매도금지간격'] and now_time <= self.day_info[vturn][vkey]['직전거래시간']:
@@ -659,18 +675,10 @@ class BackEngineKiwoomTick2(BackEngineKiwoomTick):
         return False
 
     def Buy(self, vturn, vkey):
-        주문수량 = 미체결수량 = self.trade_info[vturn][vkey]['주문수량']
+        주문수량 = self.trade_info[vturn][vkey]['주문수량']
         if 주문수량 > 0:
             if self.dict_set['주식매수주문구분'] == '시장가':
-                매수금액 = 0
-                for 매도호가, 매도잔량 in self.bhogainfo:
-                    if 미체결수량 - 매도잔량 <= 0:
-                        매수금액 += 매도호가 * 미체결수량
-                        미체결수량 -= 매도잔량
-                        break
-                    else:
-                        매수금액 += 매도호가 * 매도잔량
-                        미체결수량 -= 매도잔량
+                매수금액, 미체결수량 = self.GetHogaFill(True, self.dict_set['주식매수시장가잔량범위'], 주문수량)
                 if 미체결수량 <= 0:
                     매수가 = self.trade_info[vturn][vkey]['매수가']
                     보유수량 = self.trade_info[vturn][vkey]['보유수량']
@@ -687,7 +695,7 @@ class BackEngineKiwoomTick2(BackEngineKiwoomTick):
                 self.trade_info[vturn][vkey]['매수호가단위'] = \
                     self.arry_data[self.indexn, 25] - self.arry_data[self.indexn, 26]
                 self.trade_info[vturn][vkey]['매수주문취소시간'] = \
-                    timedelta_sec(self.dict_set['주식매수취소시간초'], strp_time('%Y%m%d%H%M%S' if len(str(self.index)) == 14 else '%Y%m%d%H%M', str(self.index)))
+                    self.indext + self.dict_set['주식매수취소시간초']
 
     def CheckBuy(self, vturn, vkey, 현재가, 관심이탈, 분봉저가):
         """
@@ -699,7 +707,7 @@ class BackEngineKiwoomTick2(BackEngineKiwoomTick):
             매수호가단위, _, _, _, _, _, 매수주문취소시간, _ = self.trade_info[vturn][vkey].values()
         if self.dict_set['주식매수취소관심이탈'] and 관심이탈:
             self.trade_info[vturn][vkey]['매수호가'] = 0
-        elif self.dict_set['주식매수취소시간'] and strp_time('%Y%m%d%H%M%S' if len(str(self.index)) == 14 else '%Y%m%d%H%M', str(self.index)) > 매수주문취소시간:
+        elif self.dict_set['주식매수취소시간'] and self.indext > 매수주문취소시간:
             self.trade_info[vturn][vkey]['매수호가'] = 0
         elif self.trade_info[vturn][vkey]['매수정정횟수'] < self.dict_set['주식매수정정횟수'] and \
                 현재가 >= 매수호가 + 매수호가단위 * self.dict_set['주식매수정정호가차이']:
@@ -718,14 +726,13 @@ class BackEngineKiwoomTick2(BackEngineKiwoomTick):
             self.UpdateBuyInfo(vturn, vkey, True if 매수가 == 0 else False)
 
     def UpdateBuyInfo(self, vturn, vkey, firstbuy):
-        datetimefromindex = strp_time('%Y%m%d%H%M%S' if len(str(self.index)) == 14 else '%Y%m%d%H%M', str(self.index))
         self.trade_info[vturn][vkey]['보유중'] = 1
         self.trade_info[vturn][vkey]['매수호가'] = 0
         self.trade_info[vturn][vkey]['매수정정횟수'] = 0
-        self.day_info[vturn][vkey]['직전거래시간'] = timedelta_sec(self.dict_set['주식매수금지간격초'], datetimefromindex)
+        self.day_info[vturn][vkey]['직전거래시간'] = self.indext + self.dict_set['주식매수금지간격초']
         if firstbuy:
             self.trade_info[vturn][vkey]['매수틱번호'] = self.indexn
-            self.trade_info[vturn][vkey]['매수시간'] = datetimefromindex
+            self.trade_info[vturn][vkey]['매수시간'] = self.indext
             self.trade_info[vturn][vkey]['추가매수시간'] = []
             self.trade_info[vturn][vkey]['매수분할횟수'] = 0
         text = f"{self.index};{self.trade_info[vturn][vkey]['추가매수가']}"
@@ -734,16 +741,8 @@ class BackEngineKiwoomTick2(BackEngineKiwoomTick):
 
     def Sell(self, vturn, vkey, sell_cond):
         if self.dict_set['주식매도주문구분'] == '시장가':
-            매도금액 = 0
-            주문수량 = 미체결수량 = self.trade_info[vturn][vkey]['주문수량']
-            for 매수호가, 매수잔량 in self.shogainfo:
-                if 미체결수량 - 매수잔량 <= 0:
-                    매도금액 += 매수호가 * 미체결수량
-                    미체결수량 -= 매수잔량
-                    break
-                else:
-                    매도금액 += 매수호가 * 매수잔량
-                    미체결수량 -= 매수잔량
+            주문수량 = self.trade_info[vturn][vkey]['주문수량']
+            매도금액, 미체결수량 = self.GetHogaFill(False, self.dict_set['주식매도시장가잔량범위'], 주문수량)
             if 미체결수량 <= 0:
                 self.trade_info[vturn][vkey]['매도가'] = int(round(매도금액 / 주문수량))
                 self.sell_cond = sell_cond
@@ -754,7 +753,7 @@ class BackEngineKiwoomTick2(BackEngineKiwoomTick):
             self.trade_info[vturn][vkey]['매도호가단위'] = \
                 self.arry_data[self.indexn, 25] - self.arry_data[self.indexn, 26]
             self.trade_info[vturn][vkey]['매도주문취소시간'] = \
-                timedelta_sec(self.dict_set['주식매도취소시간초'], strp_time('%Y%m%d%H%M%S' if len(str(self.index)) == 14 else '%Y%m%d%H%M', str(self.index)))
+                self.indext + self.dict_set['주식매도취소시간초']
 
     def CheckSell(self, vturn, vkey, 현재가, 관심진입, 분봉고가):
         """
@@ -766,7 +765,7 @@ class BackEngineKiwoomTick2(BackEngineKiwoomTick):
             매도호가단위, _, 매도정정횟수, _, _, _, 매도주문취소시간 = self.trade_info[vturn][vkey].values()
         if self.dict_set['주식매도취소관심진입'] and 관심진입:
             self.trade_info[vturn][vkey]['매도호가'] = 0
-        elif self.dict_set['주식매도취소시간'] and strp_time('%Y%m%d%H%M%S' if len(str(self.index)) == 14 else '%Y%m%d%H%M', str(self.index)) > 매도주문취소시간:
+        elif self.dict_set['주식매도취소시간'] and self.indext > 매도주문취소시간:
             self.trade_info[vturn][vkey]['매도호가'] = 0
         elif 매도정정횟수 < self.dict_set['주식매도정정횟수'] and 현재가 <= 매도호가 - 매도호가단위 * self.dict_set['주식매도정정호가차이']:
             self.trade_info[vturn][vkey]['매도호가'] = 현재가 + 매도호가단위 * self.dict_set['주식매도정정호가']
@@ -777,6 +776,16 @@ class BackEngineKiwoomTick2(BackEngineKiwoomTick):
             self.trade_info[vturn][vkey]['매도가'] = 매도호가
             self.CalculationEyun(vturn, vkey)
 
+    def LastSell(self):
+        for vturn in self.trade_info.keys():
+            for vkey in self.trade_info[vturn].keys():
+                if self.trade_info[vturn][vkey]['보유중']:
+                    보유수량 = self.trade_info[vturn][vkey]['보유수량']
+                    self.trade_info[vturn][vkey]['매도가'] = self.GetLastSellPrice(보유수량)
+                    self.trade_info[vturn][vkey]['주문수량'] = 보유수량
+                    self.sell_cond = 0
+                    self.CalculationEyun(vturn, vkey)
+
     def CalculationEyun(self, vturn, vkey):
         """
         보유중, 매수가, 매도가, 주문수량, 보유수량, 최고수익률, 최저수익률, 매수틱번호, 매수시간, 추가매수시간, 매수호가, 매도호가, \
@@ -787,20 +796,21 @@ class BackEngineKiwoomTick2(BackEngineKiwoomTick):
         bt, st, bg = int(self.arry_data[bi, 0]), self.index, oc * bp
         pg, sg, pp = GetKiwoomPgSgSp(bg, oc * sp)
         sgtg = int(self.arry_data[self.indexn, 12])
-        if len(str(self.index)) == 14:
-            ht = int((strp_time('%Y%m%d%H%M%S', str(self.index)) - bdt).total_seconds())
-        else:
-            ht = int((strp_time('%Y%m%d%H%M', str(self.index)) - bdt).total_seconds() / 60)
-        sc = self.dict_sconds[self.sell_cond] if self.back_type != '조건최적화' else self.dict_sconds[vkey][self.sell_cond]
+        ht = int((self.indext - bdt) / self.time_unit)
+        sc = self.dict_sconds[self.sell_cond] if self.back_type != '조건최적화' else self.dict_sconds[vturn * 20 + vkey][self.sell_cond]
         abt, bcx = '^'.join(abt), bc - oc == 0
-        data = ('백테결과', self.name, sgtg, bt, st, ht, bp, sp, bg, pg, pp, sg, sc, abt, bcx, vturn, vkey)
-        self.bstq_list[vkey if self.opti_turn in (1, 3) else (self.sell_count % 5)].put(data)
+        if self.arry_result is not None:
+            self.PutResult(vturn, vkey, bt, st, ht, pp, sg, bcx, bg)
+        else:
+            data = ('백테결과', self.name, sgtg, bt, st, ht, bp, sp, bg, pg, pp, sg, sc, abt, bcx, vturn, vkey)
+            self.bstq_list[vkey if self.opti_turn in (1, 3) else (self.sell_count % 5)].put(data)
         self.sell_count += 1
+        self.CheckTradeLimit(vturn, vkey)
 
         if pp < 0:
             self.day_info[vturn][vkey]['손절횟수'] += 1
             self.day_info[vturn][vkey]['손절매도시간'] = \
-                timedelta_sec(self.dict_set['주식매수금지손절간격초'], strp_time('%Y%m%d%H%M%S' if len(str(self.index)) == 14 else '%Y%m%d%H%M', str(self.index)))
+                self.indext + self.dict_set['주식매수금지손절간격초']
         if bc - oc > 0:
             self.trade_info[vturn][vkey]['매도호가'] = 0
             self.trade_info[vturn][vkey]['보유수량'] -= self.trade_info[vturn][vkey]['주문수량']
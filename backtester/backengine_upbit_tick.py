@@ -1,13 +1,19 @@
 import gc
 import math
+import time
 import sqlite3
 import numpy as np
 import pandas as pd
 from traceback import print_exc
-from utility.setting import DB_COIN_BACK_TICK, BACK_TEMP, ui_num, DICT_SET, indicator, DB_COIN_BACK_MIN
+from utility.setting import DB_COIN_BACK_TICK, BACK_TEMP, BACK_STORE, ui_num, DICT_SET, indicator, DB_COIN_BACK_MIN
 # noinspection PyUnresolvedReferences
-from utility.static import strp_time, timedelta_sec, GetUpbitHogaunit, pickle_read, pickle_write, GetUpbitPgSgSp
-from backtester.back_static import GetBuyStg, GetSellStg, GetBuyConds, GetSellConds, GetBackloadCodeQuery, GetBackloadDayQuery, AddAvgData, GetTradeInfo
+from utility.static import strp_time, timedelta_sec, GetUpbitHogaunit, pickle_read, pickle_write, GetUpbitPgSgSp, GetOrderFill
+from backtester.back_static import GetBuyStg, GetSellStg, GetBuyConds, GetSellConds, GetBackloadCodeQuery, AddAvgData, GetAvgDataGroups, GetTradeInfoArray, GetBatchLanes, GetLaneGroups, IsSampleCode, GetIndexSecond, GetDayEndArray, GetIndexDatetime, \
+    GetCondMatrix, GetCondBlocked
+from backtester.back_tick_store import UpdateTickStore, LoadTickStore, CountTickStore, LoadAvgData
+from backtester.back_shared_memory import CreateSharedArray, AttachSharedArray, ReleaseSharedArray
+from backtester.back_kernel import GetBuyKernel, GetSellKernel, GetKernelGroups, GetLaneVars, GetLaneFlags, \
+    GetSignalArray, GetWindowArray, COIN_TICK_SPEC
 
 
 # noinspection PyUnusedLocal
@@ -42,6 +48,8 @@ class BackEngineUpbitTick:
         self.buystg       = None
         self.sellstg      = None
         self.indistg      = None
+        self.buy_kernel   = None
+        self.sell_kernel  = None
         self.arry_data    = None
         self.indicator    = indicator
 
@@ -50,8 +58,11 @@ class BackEngineUpbitTick:
         self.vars_list    = []
         self.vars_lists   = []
         self.dict_arry    = {}
-        self.bhogainfo    = {}
-        self.shogainfo    = {}
+        self.dict_shm     = {}
+        self.dict_send    = {}
+        self.dict_store   = {}
+        self.dict_attach  = {}
+        self.list_data    = []
         self.dict_buystg  = {}
         self.dict_sellstg = {}
         self.dict_sconds  = {}
@@ -69,12 +80,60 @@ class BackEngineUpbitTick:
         self.sell_count   = 0
 
         self.tick_calcul      = False
+        self.kernel_groups    = None
+        self.kernel_rows      = None
+        self.trade_keys       = None
+        self.trade_lanes      = []
+        self.arry_trade       = None
+        self.work_round       = 0
+        self.sample_rate      = 1
+        self.batch_lanes      = None
+        self.trade_limit      = None
+        self.cond_matrix      = None
+        self.cond_blocked     = None
+        self.arry_result      = None
+        self.result_count     = []
+        self.trade_count      = {}
+        self.prune_lanes      = set()
+        self.window_data      = None
+        self.dict_window      = {}
+        self.time_data        = None
+        self.arry_time        = None
+        self.arry_dayend      = None
+        self.time_unit        = 1
+        self.indext           = 0
         self.dict_condition   = {}
         self.dict_cond_indexn = {}
         self.SetDictCondition()
 
         self.MainLoop()
 
+    def SetVarsInfo(self, data):
+        """
+        최적화, 전진분석의 변수정보를 저장한다. opti_turn 3 은 optuna 배치 모드로 전달된 변수조합 목록이며 GA최적화와 같은 레인으로 연산한다.
+        """
+        self.opti_turn = data[2]
+        if self.opti_turn == 3:
+            self.vars_lists = data[1]
+            self.vars       = self.vars_lists[0]
+        else:
+            self.vars_list  = data[1]
+            self.vars       = [var[1] for var in self.vars_list]
+
+    def BackTestLaneGroups(self, lane_days):
+        """
+        전진분석 구간 병렬 연산에서 레인마다 학습기간이 다른 opti_turn 3 변수조합을 같은 기간의 레인끼리 묶어 기간별로 연이어 연산한다.
+        포지션은 일자 변경 시 모두 청산되므로 레인별 결과는 해당 기간만 따로 연산한 결과와 같다.
+        기간이 바뀔 때마다 라운드가 달라지므로 백테작업분배는 사용하지 않는다.
+        """
+        for self.startday, self.endday, self.batch_lanes in GetLaneGroups(lane_days):
+            self.InitTradeInfo()
+            self.SetKernelGroups()
+            self.BackTest()
+            if self.back_type is None:
+                break
+        self.batch_lanes = None
+
     def SetDictCondition(self):
         if self.dict_set['코인경과틱수설정'] != '':
             def compile_condition(x):
@@ -88,8 +147,14 @@ class BackEngineUpbitTick:
 
     def MainLoop(self):
         while True:
-            data = self.beq.get()
-            if '정보' in data[0]:
+            if self.back_type is None and self.dict_attach:
+                self.ReleaseAttach()
+            data = self.list_data.pop(0) if self.list_data else self.beq.get()
+            if data[0] == '표본정보':
+                self.sample_rate = data[1]
+            elif data[0] == '거래제한':
+                self.trade_limit = data[1]
+            elif '정보' in data[0]:
                 if self.back_type == '최적화':
                     if data[0] == '백테정보':
                         self.betting   = data[1]
@@ -100,14 +165,14 @@ class BackEngineUpbitTick:
                         self.endtime   = data[6]
                         self.buystg, self.indistg = GetBuyStg(data[7], self.gubun)
                         self.sellstg, self.dict_sconds = GetSellStg(data[8], self.gubun)
+                        self.SetKernel(data[7], data[8])
                         self.CheckAvglist(avg_list)
                         if self.buystg is None or self.sellstg is None: self.BackStop()
                     elif data[0] == '변수정보':
-                        self.vars_list = data[1]
-                        self.opti_turn = data[2]
-                        self.vars      = [var[1] for var in self.vars_list]
+                        self.SetVarsInfo(data)
                         self.InitDivid()
                         self.InitTradeInfo()
+                        self.SetKernelGroups()
                         self.BackTest()
                 elif self.back_type == '전진분석':
                     if data[0] == '백테정보':
@@ -117,18 +182,21 @@ class BackEngineUpbitTick:
                         self.endtime   = data[4]
                         self.buystg, self.indistg = GetBuyStg(data[5], self.gubun)
                         self.sellstg, self.dict_sconds = GetSellStg(data[6], self.gubun)
+                        self.SetKernel(data[5], data[6])
                         self.CheckAvglist(avg_list)
                         if self.buystg is None or self.sellstg is None: self.BackStop()
                     elif data[0] == '변수정보':
-                        self.vars_list  = data[1]
-                        self.opti_turn  = data[2]
-                        self.vars       = [var[1] for var in self.vars_list]
+                        self.SetVarsInfo(data)
                         self.startday   = data[3]
                         self.endday     = data[4]
                         if self.opti_turn == 1: self.tick_calcul = False
                         self.InitDivid()
-                        self.InitTradeInfo()
-                        self.BackTest()
+                        if len(data) > 5:
+                            self.BackTestLaneGroups(data[5])
+                        else:
+                            self.InitTradeInfo()
+                            self.SetKernelGroups()
+                            self.BackTest()
                 elif self.back_type == 'GA최적화':
                     if data[0] == '백테정보':
                         self.betting   = data[1]
@@ -139,12 +207,14 @@ class BackEngineUpbitTick:
                         self.endtime   = data[6]
                         self.buystg, self.indistg = GetBuyStg(data[7], self.gubun)
                         self.sellstg, self.dict_sconds = GetSellStg(data[8], self.gubun)
+                        self.SetKernel(data[7], data[8])
                         self.CheckAvglist(avg_list)
                         if self.buystg is None or self.sellstg is None: self.BackStop()
                     elif data[0] == '변수정보':
                         self.vars_lists = data[1]
                         self.InitDivid()
                         self.InitTradeInfo()
+                        self.SetKernelGroups()
                         self.BackTest()
                 elif self.back_type == '조건최적화':
                     if data[0] == '백테정보':
@@ -160,13 +230,14 @@ class BackEngineUpbitTick:
                         self.dict_sellstg = {}
                         self.dict_sconds  = {}
                         error = False
-                        for i in range(20):
+                        for i in range(len(data[1])):
                             buystg = GetBuyConds(data[1][i], self.gubun)
                             sellstg, dict_cond = GetSellConds(data[2][i], self.gubun)
                             self.dict_buystg[i]  = buystg
                             self.dict_sellstg[i] = sellstg
                             self.dict_sconds[i]  = dict_cond
                             if buystg is None or sellstg is None: error = True
+                        self.cond_matrix = GetCondMatrix(data[1], self.gubun) if self.dict_set['백테조건행렬'] else None
                         self.InitDivid()
                         self.InitTradeInfo()
                         if error:
@@ -183,6 +254,7 @@ class BackEngineUpbitTick:
                         self.endtime   = data[6]
                         self.buystg, self.indistg = GetBuyStg(data[7], self.gubun)
                         self.sellstg, self.dict_sconds = GetSellStg(data[8], self.gubun)
+                        self.SetKernel(data[7], data[8])
                         self.InitDivid()
                         self.InitTradeInfo()
                         if self.buystg is None or self.sellstg is None:
@@ -208,6 +280,8 @@ class BackEngineUpbitTick:
             elif data[0] == '백테유형':
                 self.back_type = data[1]
                 self.tick_calcul = False
+                self.kernel_groups = None
+                self.trade_limit = None
             elif data[0] == '설정변경':
                 self.dict_set = data[1]
             elif data[0] in ('데이터크기', '데이터로딩'):
@@ -216,63 +290,176 @@ class BackEngineUpbitTick:
                 self.SendData(data)
             elif data[0] == '데이터전송':
                 self.RecvdData(data)
+            elif data[0] == '공유메모리연결':
+                ReleaseSharedArray(self.dict_send.pop(data[1]), unlink=False)
+            elif data[0] == '엔진종료':
+                self.ReleaseSharedMemory()
+                break
 
     def SendData(self, data):
         _, cnt, procn = data
         for i, code in enumerate(self.code_list):
             if i >= cnt:
-                data = ('데이터전송', code, self.dict_arry[code])
+                if code in self.dict_shm:
+                    # 공유메모리는 이름, shape, dtype 만 전달하고, 수신 엔진이 연결했다고 알려올 때까지만 핸들을 유지한다.
+                    # 세그먼트의 소유권(해제 책임)은 수신 엔진으로 넘어간다.
+                    shm  = self.dict_shm.pop(code)
+                    data = ('데이터전송', code, (shm.name, self.dict_arry[code].shape, self.dict_arry[code].dtype.str), self.gubun)
+                    self.dict_send[shm.name] = shm
+                else:
+                    data = ('데이터전송', code, self.dict_arry[code])
                 self.beq_list[procn].put(data)
                 del self.dict_arry[code]
+                self.arry_data = None
                 print(f'백테엔진 데이터 재분배: 종목코드[{code}] 엔진번호[{self.gubun}->{procn}]')
         self.code_list = self.code_list[:cnt]
 
     def RecvdData(self, data):
-        _, code, arry = data
+        _, code, arry = data[:3]
+        shm = None
+        if type(arry) == tuple:
+            shm, arry = AttachSharedArray(arry)
+            self.beq_list[data[3]].put(('공유메모리연결', shm.name))
         if code in self.dict_arry.keys():
             arry = np.r_[self.dict_arry[code], arry]
-        self.dict_arry[code] = arry
+            self.DelDictArry(code)
+            if shm is not None:
+                ReleaseSharedArray(shm)
+            self.SetDictArry(code, arry)
+        else:
+            self.dict_arry[code] = arry
+            if shm is not None:
+                self.dict_shm[code] = shm
         if code not in self.code_list:
             self.code_list.append(code)
 
+    def SetDictArry(self, code, arry):
+        if self.dict_set['백테공유메모리']:
+            shm, arry, _ = CreateSharedArray(arry)
+            self.dict_shm[code] = shm
+        self.dict_arry[code] = arry
+
+    def DelDictArry(self, code):
+        self.arry_data = None
+        del self.dict_arry[code]
+        if code in self.dict_shm:
+            ReleaseSharedArray(self.dict_shm.pop(code))
+
+    def ReleaseAttach(self):
+        """
+        작업분배로 연결한 다른 엔진의 공유메모리를 닫는다. 세그먼트 해제는 소유 엔진이 한다.
+        """
+        self.arry_data   = None
+        self.window_data = None
+        self.dict_window = {}
+        for shm, _ in self.dict_attach.values():
+            ReleaseSharedArray(shm, unlink=False)
+        self.dict_attach = {}
+
+    def ReleaseSharedMemory(self):
+        """
+        엔진 종료 시 연결한 공유메모리를 닫고, 자신이 소유한 세그먼트와 전송 후 연결 대기 중인 핸들을 정리한다.
+        """
+        self.ReleaseAttach()
+        self.dict_arry = {}
+        for shm in self.dict_shm.values():
+            ReleaseSharedArray(shm)
+        for shm in self.dict_send.values():
+            ReleaseSharedArray(shm, unlink=False)
+        self.dict_shm  = {}
+        self.dict_send = {}
+
+    def SetKernel(self, buytxt, selltxt):
+        if self.dict_set['백테커널모드'] and self.dict_set['코인타임프레임'] and not self.dict_set['백테주문관리적용']:
+            self.buy_kernel  = GetBuyKernel(buytxt, self.gubun)
+            self.sell_kernel = GetSellKernel(selltxt, ('수익률', '최고수익률', '최저수익률', '보유시간', '매수틱번호'), self.gubun)
+        else:
+            self.buy_kernel  = None
+            self.sell_kernel = None
+
+    def GetSignal(self):
+        if self.opti_turn in (1, 3) or self.back_type not in ('백테스트', '최적화', '전진분석') or \
+                self.buy_kernel is None or self.dict_condition or len(self.arry_data) == 0:
+            return None
+        avgtime = self.avgtime if self.back_type == '백테스트' else self.vars[0]
+        return GetSignalArray(self.buy_kernel, COIN_TICK_SPEC, self.arry_data, self.avg_list, avgtime, self.vars, self.code, self.code)
+
+    def SetKernelGroups(self):
+        self.kernel_groups = None
+        if self.opti_turn in (1, 3) and self.back_type != '조건최적화' and \
+                (self.buy_kernel is not None or self.sell_kernel is not None):
+            self.kernel_groups = GetKernelGroups(self.opti_turn, self.vars_list, self.vars_lists, self.trade_info,
+                                                 self.buy_kernel, self.sell_kernel)
+        self.kernel_rows = None
+        if self.kernel_groups is not None:
+            self.kernel_rows = [np.array([self.trade_info[vturn][vkey] for vturn, vkey in zip(group[1], group[2])])
+                                for group in self.kernel_groups]
+
     def InitDivid(self):
         self.sell_count = 0
         if self.back_type in ('백테스트', '백파인더'):     self.opti_turn = 2
         elif self.back_type in ('GA최적화', '조건최적화'): self.opti_turn = 3
 
     def InitTradeInfo(self):
+        """
+        포지션 상태는 변수조합마다 self.arry_trade 의 한 행으로 보관하고 self.trade_info[vturn][vkey] 에는 행번호를 저장한다.
+        컬럼: 보유중, 매수가, 매도가, 주문수량, 보유수량, 최고수익률, 최저수익률, 매수틱번호, 매수시간
+        변수조합 구성이 이전과 같으면 딕셔너리를 다시 만들지 않고 배열만 0으로 채운다.
+        """
         self.dict_cond_indexn = {}
         self.tick_count = 0
-        v = GetTradeInfo(1)
         if self.opti_turn == 1:
-            self.trade_info = {t: {k: v for k in range(len(x[0]))} for t, x in enumerate(self.vars_list) if len(x[0]) > 1}
+            trade_keys = (1, tuple(len(x[0]) for x in self.vars_list))
+        elif self.opti_turn == 3:
+            trade_keys = (3, len(self.vars_lists) if self.back_type != '조건최적화' else len(self.dict_buystg))
+            if self.batch_lanes is not None: trade_keys += (str(self.batch_lanes),)
+        else:
+            trade_keys = (2,)
+        if trade_keys == self.trade_keys:
+            self.arry_trade.fill(0)
+            return
+
+        if self.opti_turn == 1:
+            self.trade_info = {t: {k: 0 for k in range(len(x[0]))} for t, x in enumerate(self.vars_list) if len(x[0]) > 1}
         elif self.opti_turn == 3:
-            self.trade_info = {t: {k: v for k in range(20)} for t in range(50 if self.back_type == 'GA최적화' else 1)}
+            lanes = self.batch_lanes if self.batch_lanes is not None else GetBatchLanes(trade_keys[1])
+            self.trade_info = {t: {k: 0 for k in keys} for t, keys in lanes.items()}
         else:
-            self.trade_info = {0: {0: v}}
+            self.trade_info = {0: {0: 0}}
+        self.trade_lanes = []
+        for vturn in self.trade_info.keys():
+            for vkey in self.trade_info[vturn].keys():
+                self.trade_info[vturn][vkey] = len(self.trade_lanes)
+                self.trade_lanes.append((vturn, vkey))
+        self.trade_keys = trade_keys
+        self.arry_trade = GetTradeInfoArray(len(self.trade_lanes))
 
     def DataLoad(self, data):
         bk = 0
         divid_mode = data[-1]
         is_tick = self.dict_set['코인타임프레임']
-        con = sqlite3.connect(DB_COIN_BACK_TICK if is_tick else DB_COIN_BACK_MIN)
+        db  = DB_COIN_BACK_TICK if is_tick else DB_COIN_BACK_MIN
+        con = sqlite3.connect(db)
 
         if divid_mode == '종목코드별 분류':
             gubun, startday, endday, starttime, endtime, code_list, avg_list, code_days, _, _, _ = data
             for code in code_list:
                 df_tick, len_df_tick = None, 0
                 try:
-                    df_tick = pd.read_sql(GetBackloadCodeQuery(code, code_days[code], starttime, endtime), con)
-                    len_df_tick = len(df_tick)
+                    if gubun == '데이터크기':
+                        len_df_tick = self.GetCodeLength(con, db, code, code_days[code], starttime, endtime)
+                    else:
+                        df_tick = self.ReadCodeData(con, db, code, code_days[code], starttime, endtime)
+                        len_df_tick = len(df_tick)
                 except:
                     pass
                 if gubun == '데이터크기':
                     self.bq.put((code, len_df_tick))
                 elif len_df_tick > 0:
-                    df_tick = AddAvgData(df_tick, 8, is_tick, avg_list)
+                    df_tick = self.GetAvgData(df_tick, db, code, is_tick, avg_list)
                     arry_tick = np.array(df_tick)
                     if self.dict_set['백테일괄로딩']:
-                        self.dict_arry[code] = arry_tick
+                        self.SetDictArry(code, arry_tick)
                     else:
                         pickle_write(f'{BACK_TEMP}/{self.gubun}_{code}_tick', arry_tick)
                     self.code_list.append(code)
@@ -284,8 +471,7 @@ class BackEngineUpbitTick:
                     len_df_tick = 0
                     for code in day_codes[day]:
                         try:
-                            df_tick = pd.read_sql(GetBackloadDayQuery(day, code, starttime, endtime), con)
-                            len_df_tick += len(df_tick)
+                            len_df_tick += self.GetCodeLength(con, db, code, [day], starttime, endtime)
                         except:
                             pass
                     self.bq.put((day, len_df_tick))
@@ -299,15 +485,15 @@ class BackEngineUpbitTick:
                     days = [day for day in day_list if day in code_days[code]]
                     df_tick, len_df_tick = None, 0
                     try:
-                        df_tick = pd.read_sql(GetBackloadCodeQuery(code, days, starttime, endtime), con)
+                        df_tick = self.ReadCodeData(con, db, code, days, starttime, endtime)
                         len_df_tick += len(df_tick)
                     except:
                         pass
                     if len_df_tick > 0:
-                        df_tick = AddAvgData(df_tick, 8, is_tick, avg_list)
+                        df_tick = self.GetAvgData(df_tick, db, code, is_tick, avg_list)
                         arry_tick = np.array(df_tick)
                         if self.dict_set['백테일괄로딩']:
-                            self.dict_arry[code] = arry_tick
+                            self.SetDictArry(code, arry_tick)
                         else:
                             pickle_write(f'{BACK_TEMP}/{self.gubun}_{code}_tick', arry_tick)
                         self.code_list.append(code)
@@ -318,34 +504,65 @@ class BackEngineUpbitTick:
                 for day in day_list:
                     len_df_tick = 0
                     try:
-                        df_tick = pd.read_sql(GetBackloadDayQuery(day, code, starttime, endtime), con)
-                        len_df_tick = len(df_tick)
+                        len_df_tick = self.GetCodeLength(con, db, code, [day], starttime, endtime)
                     except:
                         pass
                     self.bq.put((day, len_df_tick))
             elif gubun == '데이터로딩':
                 df_tick, len_df_tick = None, 0
                 try:
-                    df_tick = pd.read_sql(GetBackloadCodeQuery(code, day_list, starttime, endtime), con)
+                    df_tick = self.ReadCodeData(con, db, code, day_list, starttime, endtime)
                     len_df_tick = len(df_tick)
                 except:
                     pass
                 if len_df_tick > 0:
-                    df_tick = AddAvgData(df_tick, 8, is_tick, avg_list)
+                    df_tick = self.GetAvgData(df_tick, db, code, is_tick, avg_list)
                     arry_tick = np.array(df_tick)
                     if self.dict_set['백테일괄로딩']:
-                        self.dict_arry[code] = arry_tick
+                        self.SetDictArry(code, arry_tick)
                     else:
                         pickle_write(f'{BACK_TEMP}/{self.gubun}_{code}_tick', arry_tick)
                     self.code_list.append(code)
                     bk += 1
 
         con.close()
+        self.dict_store = {}
         if gubun == '데이터로딩':
             self.bq.put(bk)
             self.avg_list = avg_list
             self.startday_, self.endday_, self.starttime_, self.endtime_ = startday, endday, starttime, endtime
 
+    def GetCodeStore(self, con, db, code):
+        """
+        종목 저장소는 데이터 로딩 한번에 종목마다 한번만 확인하여 (배열, 정보)를 재사용하고, 로딩이 끝나면 해제한다.
+        """
+        if code not in self.dict_store.keys():
+            self.dict_store[code] = UpdateTickStore(con, BACK_STORE, db, code)
+        return self.dict_store[code]
+
+    def ReadCodeData(self, con, db, code, days, starttime, endtime):
+        if self.dict_set['백테컬럼저장소']:
+            arry, info = self.GetCodeStore(con, db, code)
+            if arry is not None:
+                arry, columns = LoadTickStore(arry, info, days, starttime, endtime)
+                return pd.DataFrame(arry, columns=columns, copy=False)
+        return pd.read_sql(GetBackloadCodeQuery(code, days, starttime, endtime), con)
+
+    def GetCodeLength(self, con, db, code, days, starttime, endtime):
+        if self.dict_set['백테컬럼저장소']:
+            arry, info = self.GetCodeStore(con, db, code)
+            if arry is not None:
+                return CountTickStore(arry, info, days, starttime, endtime)
+        return len(self.ReadCodeData(con, db, code, days, starttime, endtime))
+
+    def GetAvgData(self, df, db, code, is_tick, avg_list):
+        if self.dict_set['백테피처캐시']:
+            try:
+                return LoadAvgData(df, BACK_STORE, db, code, 8, GetAvgDataGroups(8, is_tick, avg_list))
+            except:
+                print_exc()
+        return AddAvgData(df, 8, is_tick, avg_list)
+
     def CheckAvglist(self, avg_list):
         not_in_list = [x for x in avg_list if x not in self.avg_list]
         if len(not_in_list) > 0 and self.gubun == 0:
@@ -358,23 +575,92 @@ class BackEngineUpbitTick:
         if self.gubun == 0:
             self.wq.put((ui_num['C백테스트'], '전략 코드 오류로 백테스트를 중지합니다.'))
 
-    def SetArrayTick(self, code, same_days, same_time):
-        if not self.dict_set['백테일괄로딩']:
-            self.dict_arry = {code: pickle_read(f'{BACK_TEMP}/{self.gubun}_{code}_tick')}
+    def SetArrayTick(self, code, same_days, same_time, arry=None):
+        if arry is None:
+            if not self.dict_set['백테일괄로딩']:
+                self.dict_arry = {code: pickle_read(f'{BACK_TEMP}/{self.gubun}_{code}_tick')}
+            arry = self.dict_arry[code]
 
         if same_days and same_time:
-            self.arry_data = self.dict_arry[code]
+            self.arry_data = arry
         elif same_time:
-            self.arry_data = self.dict_arry[code][(self.dict_arry[code][:, 0] >= self.startday * 1000000) &
-                                                  (self.dict_arry[code][:, 0] <= self.endday * 1000000 + 240000)]
+            self.arry_data = arry[(arry[:, 0] >= self.startday * 1000000) &
+                                  (arry[:, 0] <= self.endday * 1000000 + 240000)]
         elif same_days:
-            self.arry_data = self.dict_arry[code][(self.dict_arry[code][:, 0] % 1000000 >= self.starttime) &
-                                                  (self.dict_arry[code][:, 0] % 1000000 <= self.endtime)]
+            self.arry_data = arry[(arry[:, 0] % 1000000 >= self.starttime) &
+                                  (arry[:, 0] % 1000000 <= self.endtime)]
         else:
-            self.arry_data = self.dict_arry[code][(self.dict_arry[code][:, 0] >= self.startday * 1000000) &
-                                                  (self.dict_arry[code][:, 0] <= self.endday * 1000000 + 240000) &
-                                                  (self.dict_arry[code][:, 0] % 1000000 >= self.starttime) &
-                                                  (self.dict_arry[code][:, 0] % 1000000 <= self.endtime)]
+            self.arry_data = arry[(arry[:, 0] >= self.startday * 1000000) &
+                                  (arry[:, 0] <= self.endday * 1000000 + 240000) &
+                                  (arry[:, 0] % 1000000 >= self.starttime) &
+                                  (arry[:, 0] % 1000000 <= self.endtime)]
+
+    def GetWorkList(self):
+        """
+        백테작업분배 사용 시 엔진은 자신의 종목을 등록한 후, 라운드가 끝날 때까지 Total 에 작업을 하나씩 요청하여 연산한다.
+        다른 엔진의 종목은 공유메모리에 연결하여 사용하고, 직전 작업의 연산시간은 다음 요청과 함께 전달한다.
+        """
+        if not (self.opti_turn in (1, 3) and self.back_type in ('최적화', '전진분석') and self.dict_set['백테작업분배'] and
+                self.batch_lanes is None and
+                self.dict_set['백테일괄로딩'] and self.dict_set['백테공유메모리']):
+            for code in self.code_list:
+                yield code, None
+            return
+
+        self.work_round += 1
+        work_list = []
+        for code in self.code_list:
+            arry = self.dict_arry[code]
+            work_list.append((code, (self.dict_shm[code].name, arry.shape, arry.dtype.str), len(arry)))
+        self.tq.put(('작업목록', self.gubun, self.work_round, work_list))
+
+        key, cost = None, 0
+        while True:
+            self.tq.put(('작업요청', self.gubun, self.work_round, key, cost))
+            owner, code, info = self.GetWork()
+            if code is None:
+                break
+            if owner == self.gubun:
+                arry = None
+            else:
+                if info[0] not in self.dict_attach.keys():
+                    self.dict_attach[info[0]] = AttachSharedArray(info)
+                arry = self.dict_attach[info[0]][1]
+            start = time.perf_counter()
+            yield code, arry
+            key, cost = (owner, code), time.perf_counter() - start
+
+    def GetWork(self):
+        while True:
+            data = self.beq.get()
+            if data[0] == '작업할당':
+                return data[1:]
+            self.list_data.append(data)
+
+    def GetWindowValue(self, vindex, tick, gubun, sindex):
+        """
+        평균값틱수 목록에 없는 틱수의 구간 집계는 종목 데이터마다 컬럼 전체를 한번 계산해두고 조회한다.
+        """
+        if sindex < 0:
+            return getattr(self.arry_data[sindex:sindex + tick, vindex], gubun)()
+        if self.window_data is not self.arry_data:
+            self.window_data = self.arry_data
+            self.dict_window = {}
+        if (vindex, tick, gubun) not in self.dict_window.keys():
+            self.dict_window[(vindex, tick, gubun)] = GetWindowArray(self.arry_data[:, vindex], tick, gubun)
+        return self.dict_window[(vindex, tick, gubun)][sindex]
+
+    def SetTimeArray(self):
+        """
+        종목 데이터의 index 를 초 단위 정수 배열과 일자 마지막 행 여부 배열로 한번 변환해둔다.
+        보유시간, 일자 변경, 주문 취소시간 비교는 문자열, datetime 변환 없이 self.indext 정수로 처리한다.
+        """
+        if self.time_data is not self.arry_data:
+            self.time_data   = self.arry_data
+            self.arry_time   = GetIndexSecond(self.arry_data[:, 0])
+            self.arry_dayend = GetDayEndArray(self.arry_data[:, 0])
+            self.time_unit   = 1 if self.arry_data[0, 0] >= 10 ** 13 else 60
+        return self.arry_time, self.arry_dayend
 
     def BackTest(self):
         if self.profile:
@@ -393,25 +679,36 @@ class BackEngineUpbitTick:
             self.tq.put(('전체틱수', int(total_ticks / 100)))
             self.tick_calcul = True
 
+        self.trade_count = {}
+        self.prune_lanes = set()
+        self.InitResult()
         j = 0
         len_codes = len(self.code_list)
-        for k, code in enumerate(self.code_list):
+        for k, (code, arry) in enumerate(self.GetWorkList()):
+            if not IsSampleCode(code, self.sample_rate):
+                self.tq.put(('백테완료', self.gubun, k+1, len_codes))
+                continue
+
             self.code = self.name = code
-            self.SetArrayTick(code, same_days, same_time)
+            self.SetArrayTick(code, same_days, same_time, arry)
+            arry_signal = self.GetSignal()
             last = len(self.arry_data) - 1
             if last > 0:
+                arry_time, arry_dayend = self.SetTimeArray()
                 for i, index in enumerate(self.arry_data[:, 0]):
                     self.index  = int(index)
+                    self.indext = int(arry_time[i])
                     self.indexn = i
                     self.tick_count += 1
-                    next_day_change = i == last or str(index)[:8] != str(self.arry_data[i + 1, 0])[:8]
+                    next_day_change = arry_dayend[i]
                     if not next_day_change:
-                        try:
-                            self.Strategy()
-                        except:
-                            print_exc()
-                            self.BackStop()
-                            return
+                        if arry_signal is None or arry_signal[i] or self.arry_trade[0, 0]:
+                            try:
+                                self.Strategy()
+                            except:
+                                print_exc()
+                                self.BackStop()
+                                return
                     else:
                         self.LastSell()
                         self.InitTradeInfo()
@@ -419,13 +716,14 @@ class BackEngineUpbitTick:
                     j += 1
                     if self.opti_turn in (1, 3) and j % 100 == 0: self.tq.put('탐색완료')
 
+            self.FlushResult()
             self.tq.put(('백테완료', self.gubun, k+1, len_codes))
 
         if self.profile: self.pr.print_stats(sort='cumulative')
 
     def Strategy(self):
         def now_utc():
-            return strp_time('%Y%m%d%H%M%S', str(self.index))
+            return GetIndexDatetime(self.index)
 
         def Parameter_Previous(aindex, pre):
             if pre < 데이터길이:
@@ -550,8 +848,7 @@ class BackEngineUpbitTick:
             else:
                 if tick + pre <= 데이터길이:
                     sindex = (self.indexn + 1 - pre - tick) if pre != -1  else self.indexb + 1 - tick
-                    eindex = (self.indexn + 1 - pre) if pre != -1  else self.indexb + 1
-                    return round(self.arry_data[sindex:eindex, 1].mean(), 8)
+                    return round(self.GetWindowValue(1, tick, 'mean', sindex), 8)
                 return 0
 
         def GetArrayIndex(aindex):
@@ -563,15 +860,7 @@ class BackEngineUpbitTick:
             else:
                 if tick + pre <= 데이터길이:
                     sindex = (self.indexn + 1 - pre - tick) if pre != -1  else self.indexb + 1 - tick
-                    eindex = (self.indexn + 1 - pre) if pre != -1  else self.indexb + 1
-                    if gubun_ == 'max':
-                        return self.arry_data[sindex:eindex, vindex].max()
-                    elif gubun_ == 'min':
-                        return self.arry_data[sindex:eindex, vindex].min()
-                    elif gubun_ == 'sum':
-                        return self.arry_data[sindex:eindex, vindex].sum()
-                    else:
-                        return self.arry_data[sindex:eindex, vindex].mean()
+                    return self.GetWindowValue(vindex, tick, gubun_, sindex)
                 return 0
 
         def 최고현재가(tick, pre=0):
@@ -631,11 +920,7 @@ class BackEngineUpbitTick:
             매수총잔량, 매도호가5, 매도호가4, 매도호가3, 매도호가2, 매도호가1, 매수호가1, 매수호가2, 매수호가3, 매수호가4, 매수호가5, \
             매도잔량5, 매도잔량4, 매도잔량3, 매도잔량2, 매도잔량1, 매수잔량1, 매수잔량2, 매수잔량3, 매수잔량4, 매수잔량5, 매도수5호가잔량합, \
             관심종목 = self.arry_data[self.indexn, 1:36]
-        종목코드, 데이터길이, 시분초, 호가단위 = self.code, self.tick_count, int(str(self.index)[8:]), 매도호가2 - 매도호가1
-        bhogainfo = ((매도호가1, 매도잔량1), (매도호가2, 매도잔량2), (매도호가3, 매도잔량3), (매도호가4, 매도잔량4), (매도호가5, 매도잔량5))
-        shogainfo = ((매수호가1, 매수잔량1), (매수호가2, 매수잔량2), (매수호가3, 매수잔량3), (매수호가4, 매수잔량4), (매수호가5, 매수잔량5))
-        self.bhogainfo = bhogainfo[:self.dict_set['코인매수시장가잔량범위']]
-        self.shogainfo = shogainfo[:self.dict_set['코인매도시장가잔량범위']]
+        종목코드, 데이터길이, 시분초, 호가단위 = self.code, self.tick_count, self.index % 1000000, 매도호가2 - 매도호가1
 
         if self.dict_condition:
             if 종목코드 not in self.dict_cond_indexn.keys():
@@ -643,7 +928,10 @@ class BackEngineUpbitTick:
             for k, v in self.dict_condition.items():
                 exec(v)
 
-        if self.opti_turn == 1:
+        if self.opti_turn in (1, 3) and self.kernel_groups is not None:
+            self.StrategyKernel(locals())
+
+        elif self.opti_turn == 1:
             for vturn in self.trade_info.keys():
                 self.vars = [var[1] for var in self.vars_list]
                 if vturn != 0 and self.tick_count < self.vars[0]:
@@ -653,17 +941,20 @@ class BackEngineUpbitTick:
                     self.vars[vturn] = self.vars_list[vturn][0][vkey]
                     if self.tick_count < self.vars[0]:
                         continue
+                    if self.prune_lanes and (vturn, vkey) in self.prune_lanes:
+                        continue
 
                     매수, 매도 = True, False
-                    if not self.trade_info[vturn][vkey]['보유중']:
+                    if not self.arry_trade[self.trade_info[vturn][vkey], 0]:
                         if not 관심종목: continue
                         self.SetBuyCount(vturn, vkey, 현재가, 고가, 저가, 등락율각도(30), 당일거래대금각도(30))
                         exec(self.buystg)
                     else:
-                        수익률, 최고수익률, 최저수익률, 보유시간, 매수틱번호 = self.SetSellCount(vturn, vkey, 현재가, now_utc())
+                        수익률, 최고수익률, 최저수익률, 보유시간, 매수틱번호 = self.SetSellCount(vturn, vkey, 현재가, self.indext)
                         exec(self.sellstg)
 
         elif self.opti_turn == 3:
+            self.cond_blocked = None
             for vturn in self.trade_info.keys():
                 for vkey in self.trade_info[vturn].keys():
                     index_ = vturn * 20 + vkey
@@ -673,17 +964,22 @@ class BackEngineUpbitTick:
                             break
                     elif self.tick_count < self.avgtime:
                         break
+                    if self.prune_lanes and (vturn, vkey) in self.prune_lanes:
+                        continue
 
                     매수, 매도 = True, False
-                    if not self.trade_info[vturn][vkey]['보유중']:
+                    if not self.arry_trade[self.trade_info[vturn][vkey], 0]:
                         if not 관심종목: continue
                         self.SetBuyCount(vturn, vkey, 현재가, 고가, 저가, 등락율각도(30), 당일거래대금각도(30))
                         if self.back_type != '조건최적화':
                             exec(self.buystg)
-                        else:
+                        elif self.cond_matrix is None:
                             exec(self.dict_buystg[index_])
+                        else:
+                            if self.cond_blocked is None: self.cond_blocked = GetCondBlocked(self.cond_matrix, globals(), locals())
+                            if not self.cond_blocked[index_]: self.Buy(vturn, vkey)
                     else:
-                        수익률, 최고수익률, 최저수익률, 보유시간, 매수틱번호 = self.SetSellCount(vturn, vkey, 현재가, now_utc())
+                        수익률, 최고수익률, 최저수익률, 보유시간, 매수틱번호 = self.SetSellCount(vturn, vkey, 현재가, self.indext)
                         if self.back_type != '조건최적화':
                             exec(self.sellstg)
                         else:
@@ -699,14 +995,59 @@ class BackEngineUpbitTick:
                     return
 
             매수, 매도 = True, False
-            if not self.trade_info[vturn][vkey]['보유중']:
+            if not self.arry_trade[self.trade_info[vturn][vkey], 0]:
                 if not 관심종목: return
                 self.SetBuyCount(vturn, vkey, 현재가, 고가, 저가, 등락율각도(30), 당일거래대금각도(30))
                 exec(self.buystg)
             else:
-                수익률, 최고수익률, 최저수익률, 보유시간, 매수틱번호 = self.SetSellCount(vturn, vkey, 현재가, now_utc())
+                수익률, 최고수익률, 최저수익률, 보유시간, 매수틱번호 = self.SetSellCount(vturn, vkey, 현재가, self.indext)
                 exec(self.sellstg)
 
+    def StrategyKernel(self, env):
+        관심종목, 현재가, 고가, 저가 = env['관심종목'], env['현재가'], env['고가'], env['저가']
+        등락율각도, 당일거래대금각도, now_time = env['등락율각도'], env['당일거래대금각도'], self.indext
+
+        for (vars_, vturns, vkeys, min_ticks, vars_arry, vars_list), lane_rows in zip(self.kernel_groups, self.kernel_rows):
+            lanes = np.flatnonzero(min_ticks <= self.tick_count)
+            if self.prune_lanes:
+                lanes = np.array([i for i in lanes.tolist() if (vturns[i], vkeys[i]) not in self.prune_lanes], dtype=np.int64)
+            if len(lanes) == 0:
+                continue
+
+            self.vars  = vars_
+            보유중     = self.arry_trade[lane_rows[lanes], 0]
+            sell_lanes = lanes[보유중 > 0].tolist()
+            buy_lanes  = lanes[보유중 == 0].tolist() if 관심종목 else []
+
+            if buy_lanes:
+                if self.buy_kernel is not None:
+                    매수 = self.buy_kernel.Run(env, GetLaneVars(vars_arry, buy_lanes))[0]
+                    buy_lanes = [i for i, 신호 in zip(buy_lanes, GetLaneFlags(매수, len(buy_lanes))) if 신호]
+                for i in buy_lanes:
+                    vturn, vkey = vturns[i], vkeys[i]
+                    self.vars = vars_list[i]
+                    self.SetBuyCount(vturn, vkey, 현재가, 고가, 저가, 등락율각도(30), 당일거래대금각도(30))
+                    if self.buy_kernel is not None:
+                        self.Buy(vturn, vkey)
+                    else:
+                        exec(self.buystg, dict(env, vturn=vturn, vkey=vkey, 매수=True, 매도=False))
+
+            if sell_lanes:
+                sell_infos = [self.SetSellCount(vturns[i], vkeys[i], 현재가, now_time) for i in sell_lanes]
+                if self.sell_kernel is not None:
+                    수익률, 최고수익률, 최저수익률, 보유시간, 매수틱번호 = [np.array(x) for x in zip(*sell_infos)]
+                    lanes_env = {'수익률': 수익률, '최고수익률': 최고수익률, '최저수익률': 최저수익률, '보유시간': 보유시간, '매수틱번호': 매수틱번호}
+                    매도, sell_cond = self.sell_kernel.Run(env, GetLaneVars(vars_arry, sell_lanes), lanes_env)
+                    count = len(sell_lanes)
+                    for i, 신호, cond in zip(sell_lanes, GetLaneFlags(매도, count), GetLaneFlags(sell_cond, count)):
+                        if 신호:
+                            self.Sell(vturns[i], vkeys[i], int(cond))
+                else:
+                    for i, (수익률, 최고수익률, 최저수익률, 보유시간, 매수틱번호) in zip(sell_lanes, sell_infos):
+                        self.vars, self.indexb = vars_list[i], 매수틱번호
+                        exec(self.sellstg, dict(env, vturn=vturns[i], vkey=vkeys[i], 매수=True, 매도=False, 수익률=수익률,
+                                                최고수익률=최고수익률, 최저수익률=최저수익률, 보유시간=보유시간, 매수틱번호=매수틱번호))
+
     def SetBuyCount(self, vturn, vkey, 현재가, 고가, 저가, 등락율각도, 당일거래대금각도):
         if self.dict_set['코인비중조절'][0] == 0:
             betting = self.betting
@@ -729,110 +1070,122 @@ class BackEngineUpbitTick:
             else:
                 betting = self.betting * self.dict_set['코인비중조절'][9]
 
-        self.trade_info[vturn][vkey]['주문수량'] = round(betting / 현재가, 8)
+        self.arry_trade[self.trade_info[vturn][vkey], 3] = round(betting / 현재가, 8)
 
     def Buy(self, vturn, vkey):
-        매수금액 = 0
-        주문수량 = 미체결수량 = self.trade_info[vturn][vkey]['주문수량']
+        lane = self.trade_info[vturn][vkey]
+        주문수량 = float(self.arry_trade[lane, 3])
         if 주문수량 > 0:
-            for 매도호가, 매도잔량 in self.bhogainfo:
-                if 미체결수량 - 매도잔량 <= 0:
-                    매수금액 += 매도호가 * 미체결수량
-                    미체결수량 -= 매도잔량
-                    break
-                else:
-                    매수금액 += 매도호가 * 매도잔량
-                    미체결수량 -= 매도잔량
+            매수금액, 미체결수량 = self.GetHogaFill(True, self.dict_set['코인매수시장가잔량범위'], 주문수량)
             if 미체결수량 <= 0:
-                self.trade_info[vturn][vkey] = {
-                    '보유중': 1,
-                    '매수가': round(매수금액 / 주문수량, 4),
-                    '매도가': 0,
-                    '주문수량': 0,
-                    '보유수량': 주문수량,
-                    '최고수익률': 0.,
-                    '최저수익률': 0.,
-                    '매수틱번호': self.indexn,
-                    '매수시간': strp_time('%Y%m%d%H%M%S', str(self.index)) if len(str(self.index)) == 14 else strp_time('%Y%m%d%H%M', str(self.index))
-                }
+                self.arry_trade[lane] = (1, round(매수금액 / 주문수량, 4), 0, 0, 주문수량, 0., 0.,
+                                         self.indexn, self.indext)
 
     def SetSellCount(self, vturn, vkey, 현재가, now_time):
-        _, 매수가, _, _, 보유수량, 최고수익률, 최저수익률, 매수틱번호, 매수시간 = self.trade_info[vturn][vkey].values()
+        lane = self.trade_info[vturn][vkey]
+        _, 매수가, _, _, 보유수량, 최고수익률, 최저수익률, 매수틱번호, 매수시간 = self.arry_trade[lane].tolist()
+        매수틱번호 = int(매수틱번호)
         _, _, 수익률 = GetUpbitPgSgSp(보유수량 * 매수가, 보유수량 * 현재가)
-        if 수익률 > 최고수익률:   self.trade_info[vturn][vkey]['최고수익률'] = 최고수익률 = 수익률
-        elif 수익률 < 최저수익률: self.trade_info[vturn][vkey]['최저수익률'] = 최저수익률 = 수익률
-        보유시간 = (now_time - 매수시간).total_seconds() if len(str(self.index)) == 14 else int((now_time - 매수시간).total_seconds() / 60)
+        if 수익률 > 최고수익률:   self.arry_trade[lane, 5] = 최고수익률 = 수익률
+        elif 수익률 < 최저수익률: self.arry_trade[lane, 6] = 최저수익률 = 수익률
+        보유시간 = float(now_time - 매수시간) if self.time_unit == 1 else int((now_time - 매수시간) / 60)
         self.indexb = 매수틱번호
-        self.trade_info[vturn][vkey]['주문수량'] = 보유수량
+        self.arry_trade[lane, 3] = 보유수량
         return 수익률, 최고수익률, 최저수익률, 보유시간, 매수틱번호
 
     def Sell(self, vturn, vkey, sell_cond):
-        매도금액 = 0
-        주문수량 = 미체결수량 = self.trade_info[vturn][vkey]['주문수량']
-        for 매수호가, 매수잔량 in self.shogainfo:
-            if 미체결수량 - 매수잔량 <= 0:
-                매도금액 += 매수호가 * 미체결수량
-                미체결수량 -= 매수잔량
-                break
-            else:
-                매도금액 += 매수호가 * 매수잔량
-                미체결수량 -= 매수잔량
+        lane = self.trade_info[vturn][vkey]
+        주문수량 = float(self.arry_trade[lane, 3])
+        매도금액, 미체결수량 = self.GetHogaFill(False, self.dict_set['코인매도시장가잔량범위'], 주문수량)
         if 미체결수량 <= 0:
-            self.trade_info[vturn][vkey]['매도가'] = round(매도금액 / 주문수량, 4)
+            self.arry_trade[lane, 2] = round(매도금액 / 주문수량, 4)
             self.sell_cond = sell_cond
             self.CalculationEyun(vturn, vkey)
 
+    def GetHogaFill(self, 매도호가, 잔량범위, 주문수량):
+        """
+        현재 행의 호가와 잔량으로 시장가 주문을 잔량범위 단계까지 체결한다.
+        매도호가가 True 면 매도호가1부터 위로, False 면 매수호가1부터 아래로 체결하며 (체결금액, 미체결수량)을 반환한다.
+        """
+        hindex = 14 if self.dict_set['코인타임프레임'] else 17
+        if 매도호가:
+            return GetOrderFill(self.arry_data, self.indexn, hindex + 4, hindex + 14, -1, 잔량범위, 주문수량)
+        return GetOrderFill(self.arry_data, self.indexn, hindex + 5, hindex + 15, 1, 잔량범위, 주문수량)
+
+    def GetLastSellPrice(self, 보유수량):
+        매도금액, 미체결수량 = self.GetHogaFill(False, self.dict_set['코인매도시장가잔량범위'], 보유수량)
+        if 미체결수량 <= 0:
+            return round(매도금액 / 보유수량, 4)
+        elif 매도금액 == 0:
+            return self.arry_data[self.indexn, 1]
+        return round(매도금액 / (보유수량 - 미체결수량), 4)
+
     def LastSell(self):
-        if self.dict_set['코인타임프레임']:
-            매도호가5, 매도호가4, 매도호가3, 매도호가2, 매도호가1, 매수호가1, 매수호가2, 매수호가3, 매수호가4, 매수호가5, \
-                매도잔량5, 매도잔량4, 매도잔량3, 매도잔량2, 매도잔량1, 매수잔량1, 매수잔량2, 매수잔량3, 매수잔량4, 매수잔량5 = \
-                self.arry_data[self.indexn, 14:34]
+        for lane in np.flatnonzero(self.arry_trade[:, 0]).tolist():
+            보유수량 = float(self.arry_trade[lane, 4])
+            self.arry_trade[lane, 2] = self.GetLastSellPrice(보유수량)
+            self.arry_trade[lane, 3] = 보유수량
+            self.sell_cond = 0
+            self.CalculationEyun(*self.trade_lanes[lane])
+
+    def InitResult(self):
+        if self.opti_turn in (1, 3) and self.dict_set['백테결과묶음'] > 0:
+            self.arry_result = np.zeros((20, self.dict_set['백테결과묶음'], 9), dtype=np.float64)
         else:
-            매도호가5, 매도호가4, 매도호가3, 매도호가2, 매도호가1, 매수호가1, 매수호가2, 매수호가3, 매수호가4, 매수호가5, \
-                매도잔량5, 매도잔량4, 매도잔량3, 매도잔량2, 매도잔량1, 매수잔량1, 매수잔량2, 매수잔량3, 매수잔량4, 매수잔량5 = \
-                self.arry_data[self.indexn, 17:37]
-        shogainfo = ((매수호가1, 매수잔량1), (매수호가2, 매수잔량2), (매수호가3, 매수잔량3), (매수호가4, 매수잔량4), (매수호가5, 매수잔량5))
-        shogainfo = shogainfo[:self.dict_set['코인매도시장가잔량범위']]
+            self.arry_result = None
+        self.result_count = [0] * 20
 
-        for vturn in self.trade_info.keys():
-            for vkey in self.trade_info[vturn].keys():
-                if self.trade_info[vturn][vkey]['보유중']:
-                    매도금액 = 0
-                    보유수량 = 미체결수량 = self.trade_info[vturn][vkey]['보유수량']
-                    for 매수호가, 매수잔량 in shogainfo:
-                        if 미체결수량 - 매수잔량 <= 0:
-                            매도금액 += 매수호가 * 미체결수량
-                            미체결수량 -= 매수잔량
-                            break
-                        else:
-                            매도금액 += 매수호가 * 매수잔량
-                            미체결수량 -= 매수잔량
-                    if 미체결수량 <= 0:
-                        self.trade_info[vturn][vkey]['매도가'] = round(매도금액 / 보유수량, 4)
-                    elif 매도금액 == 0:
-                        self.trade_info[vturn][vkey]['매도가'] = self.arry_data[self.indexn, 1]
-                    else:
-                        self.trade_info[vturn][vkey]['매도가'] = round(매도금액 / (보유수량 - 미체결수량), 4)
-
-                    self.trade_info[vturn][vkey]['주문수량'] = 보유수량
-                    self.sell_cond = 0
-                    self.CalculationEyun(vturn, vkey)
+    def PutResult(self, vturn, vkey, bt, st, ht, pp, sg, bcx, bg):
+        """
+        최적화 모드에서는 집계에 필요한 거래 정보만 레인 큐별 배열에 모았다가 백테결과묶음 개수마다 한번에 전송한다.
+        매수시간, 매도시간, 보유시간, 수익률, 수익금, 잔량없음, 매수금액 = self.arry_result[vkey, n, 2:]
+        """
+        n = self.result_count[vkey]
+        self.arry_result[vkey, n] = vturn, vkey, bt, st, ht, pp, sg, bcx, bg
+        self.result_count[vkey] = n + 1
+        if n + 1 == self.arry_result.shape[1]:
+            self.FlushResult(vkey)
+
+    def FlushResult(self, vkey=None):
+        if self.arry_result is None:
+            return
+        for q in (range(len(self.result_count)) if vkey is None else (vkey,)):
+            n = self.result_count[q]
+            if n > 0:
+                self.bstq_list[q].put(('백테결과배열', self.arry_result[q, :n].copy()))
+                self.result_count[q] = 0
+
+    def CheckTradeLimit(self, vturn, vkey):
+        """
+        거래횟수는 종목을 연산할수록 줄어들지 않으므로 변수조합의 거래횟수가 self.trade_limit 를 넘으면
+        최적화기준값제한의 일평균거래횟수 상한을 만족할 수 없다. 해당 레인은 남은 틱의 전략 연산을 생략하고 집계에 가지치기를 알린다.
+        """
+        if self.trade_limit is None or self.opti_turn not in (1, 3):
+            return
+        count = self.trade_count.get((vturn, vkey), 0) + 1
+        self.trade_count[(vturn, vkey)] = count
+        if count > self.trade_limit and (vturn, vkey) not in self.prune_lanes:
+            self.prune_lanes.add((vturn, vkey))
+            self.bstq_list[vkey].put(('가지치기', vturn, vkey))
 
     def CalculationEyun(self, vturn, vkey):
         """
-        보유중, 매수가, 매도가, 주문수량, 보유수량, 최고수익률, 최저수익률, 매수틱번호, 매수시간 = self.trade_info[vturn][vkey].values()
+        보유중, 매수가, 매도가, 주문수량, 보유수량, 최고수익률, 최저수익률, 매수틱번호, 매수시간 = self.arry_trade[lane].tolist()
         """
-        _, bp, sp, oc, _, _, _, bi, bdt = self.trade_info[vturn][vkey].values()
+        lane = self.trade_info[vturn][vkey]
+        _, bp, sp, oc, _, _, _, bi, bdt = self.arry_trade[lane].tolist()
+        bi = int(bi)
         sgtg = 0
-        if len(str(self.index)) == 14:
-            ht = int((strp_time('%Y%m%d%H%M%S', str(self.index)) - bdt).total_seconds())
-        else:
-            ht = int((strp_time('%Y%m%d%H%M', str(self.index)) - bdt).total_seconds() / 60)
+        ht = int((self.indext - bdt) / self.time_unit)
         bt, st, bg = int(self.arry_data[bi, 0]), self.index, oc * bp
         pg, sg, pp = GetUpbitPgSgSp(bg, oc * sp)
-        sc = self.dict_sconds[self.sell_cond] if self.back_type != '조건최적화' else self.dict_sconds[vkey][self.sell_cond]
+        sc = self.dict_sconds[self.sell_cond] if self.back_type != '조건최적화' else self.dict_sconds[vturn * 20 + vkey][self.sell_cond]
         abt, bcx = '', True
-        data = ('백테결과', self.name, sgtg, bt, st, ht, bp, sp, bg, pg, pp, sg, sc, abt, bcx, vturn, vkey)
-        self.bstq_list[vkey if self.opti_turn in (1, 3) else (self.sell_count % 5)].put(data)
+        if self.arry_result is not None:
+            self.PutResult(vturn, vkey, bt, st, ht, pp, sg, bcx, bg)
+        else:
+            data = ('백테결과', self.name, sgtg, bt, st, ht, bp, sp, bg, pg, pp, sg, sc, abt, bcx, vturn, vkey)
+            self.bstq_list[vkey if self.opti_turn in (1, 3) else (self.sell_count % 5)].put(data)
         self.sell_count += 1
-        self.trade_info[vturn][vkey] = GetTradeInfo(1)
+        self.CheckTradeLimit(vturn, vkey)
+        self.arry_trade[lane] = 0
@@ -7,10 +7,14 @@ import operator
 import numpy as np
 import pandas as pd
 from multiprocessing import Process, Queue
-from backtester.back_static import SendTextAndStd, PltShow, GetMoneytopQuery, GetBackResult, GetResultDataframe, AddMdd
+from backtester.back_scheduler import BackScheduler
+from backtester.back_eval_cache import BackEvalCache, GetEvalContext, GetGridCache
+from backtester.back_checkpoint import BackCheckpoint
+from backtester.back_static import SendTextAndStd, PltShow, GetMoneytopQuery, GetBackResult, GetResultDataframe, AddMdd, \
+    GetBatchLanes, GetSampleRates, GetTradeLimit
 from utility.static import strf_time, strp_time, now, timedelta_day, threading_timer
 from utility.setting import DB_STOCK_BACK_TICK, DB_COIN_BACK_TICK, ui_num, DB_STRATEGY, DB_BACKTEST, columns_vc, \
-    DICT_SET, DB_SETTING, DB_OPTUNA, DB_STOCK_BACK_MIN, DB_COIN_BACK_MIN
+    DICT_SET, DB_SETTING, DB_OPTUNA, DB_STOCK_BACK_MIN, DB_COIN_BACK_MIN, DB_BACK_CACHE
 
 
 class Total:
@@ -65,12 +69,15 @@ class Total:
 
         self.vars         = None
         self.vars_list    = None
+        self.vars_lists   = None
+        self.cache        = None
         self.opti_turn    = None
         self.stdp         = -2_000_000_000
         self.sub_total    = 0
         self.total_count  = 0
         self.total_count2 = 0
 
+        self.scheduler    = BackScheduler(self.beq_list, self.multi)
         self.MainLoop()
 
     def MainLoop(self):
@@ -92,7 +99,7 @@ class Total:
                 bc  += 1
                 tbc += 1
                 if self.opti_turn == 1:
-                    if self.dict_set['백테일괄로딩'] and self.divid_mode != '한종목 로딩':
+                    if self.dict_set['백테일괄로딩'] and self.divid_mode != '한종목 로딩' and self.scheduler.round is None:
                         if first_time is None: first_time = now()
                         procn, cnt, total = data[1:]
                         if cnt == total:
@@ -108,8 +115,9 @@ class Total:
 
                 if bc == self.back_count:
                     bc = 0
-                    if self.opti_turn == 1:
-                        if self.dict_set['백테일괄로딩'] and self.divid_mode != '한종목 로딩':
+                    if self.opti_turn in (1, 3):
+                        if self.opti_turn == 1 and self.dict_set['백테일괄로딩'] and self.divid_mode != '한종목 로딩' and \
+                                self.scheduler.round is None:
                             time_90 = (divid_time - first_time).total_seconds()
                             time_10 = (now() - divid_time).total_seconds()
                             if time_90 * 5 / 90 < time_10:
@@ -126,6 +134,12 @@ class Total:
                         for q in self.bstq_list[:5]:
                             q.put(('백테완료', '분리집계'))
 
+            elif data[0] == '작업요청':
+                self.scheduler.Request(*data[1:])
+
+            elif data[0] == '작업목록':
+                self.scheduler.Regist(*data[1:])
+
             elif data == '집계완료':
                 sc += 1
                 if sc == 5:
@@ -140,7 +154,7 @@ class Total:
                     self.bstq_list[0].put('결과전송')
 
             elif data[0] == '결과없음':
-                self.stdp = SendTextAndStd(self.GetSendData(), None)
+                self.stdp = SendTextAndStd(self.GetSendData(), None, cache=self.cache)
 
             elif data[0] == '더미결과':
                 sc += 1
@@ -152,12 +166,15 @@ class Total:
                 if sc == 20:
                     sc = 0
                     for vturn in list(dict_dummy.keys()):
-                        curr_vars_count = len(self.vars_list[vturn][0])
+                        if self.opti_turn == 3:
+                            curr_vars_count = len(GetBatchLanes(len(self.vars_lists))[vturn])
+                        else:
+                            curr_vars_count = len(self.vars_list[vturn][0])
                         key_list = list(dict_dummy[vturn].keys())
                         zero_key_list = [x for x in range(curr_vars_count) if x not in key_list]
                         if zero_key_list:
                             for vkey in zero_key_list:
-                                self.stdp = SendTextAndStd(self.GetSendData(vturn, vkey), None)
+                                self.stdp = SendTextAndStd(self.GetSendData(vturn, vkey), None, cache=self.cache)
                     dict_dummy = {}
 
             elif data[0] == '백테결과':
@@ -190,24 +207,33 @@ class Total:
                         self.GetSendData(vturn, vkey),
                         self.dict_t[vturn][vkey],
                         self.dict_v[vturn][vkey],
-                        self.dict_set['교차검증가중치']
+                        self.dict_set['교차검증가중치'],
+                        cache=self.cache
                     )
                     st[vturn][vkey] = 0
 
             elif data[0] == 'ALL':
                 _, _, data, vturn, vkey = data
-                self.stdp = SendTextAndStd(self.GetSendData(vturn, vkey), data)
+                self.stdp = SendTextAndStd(self.GetSendData(vturn, vkey), data, cache=self.cache)
 
             elif data[0] == '백테정보':
                 self.BackInfo(data)
             elif data[0] == '변수정보':
-                self.vars_list = data[1]
                 self.opti_turn = data[2]
-                self.vars      = [var[1] for var in self.vars_list]
-                dict_dummy     = {i: {} for i, x in enumerate(self.vars_list) if len(x[0]) > 1}
+                if self.opti_turn == 3:
+                    self.vars_lists = data[1]
+                    self.vars       = self.vars_lists[0]
+                    dict_dummy      = {i: {} for i in GetBatchLanes(len(self.vars_lists)).keys()}
+                else:
+                    self.vars_list  = data[1]
+                    self.vars       = [var[1] for var in self.vars_list]
+                    dict_dummy      = {i: {} for i, x in enumerate(self.vars_list) if len(x[0]) > 1}
                 if self.opti_turn != 4:
                     tt = 0
                     start = now()
+            elif data[0] == '표본정보':
+                if self.cache is not None:
+                    self.cache.SetSample(data[1])
             elif data[0] == '경우의수':
                 self.total_count = data[1]
                 self.back_count  = data[2]
@@ -246,6 +272,8 @@ class Total:
         self.weeks_train  = data[18]
         self.weeks_valid  = data[19]
         self.weeks_test   = data[20]
+        if self.dict_set['백테평가캐시']:
+            self.cache    = BackEvalCache(DB_BACK_CACHE, data[21], self.dict_set['백테평가캐시'])
         if self.list_days[1] is not None:
             self.sub_total = len(self.list_days[1]) * 2
         else:
@@ -253,7 +281,10 @@ class Total:
 
     def GetSendData(self, vturn=0, vkey=0):
         if self.opti_turn == 1:
+            self.vars = [var[1] for var in self.vars_list]
             self.vars[vturn] = self.vars_list[vturn][0][vkey]
+        elif self.opti_turn == 3:
+            self.vars = self.vars_lists[vturn * 20 + vkey]
         return ['최적화', self.ui_gubun, self.wq, self.mq, self.stdp, self.optistandard, self.opti_turn, vturn, vkey, self.vars, self.startday, self.endday, self.std_list, self.betting]
 
     def Report(self, list_tsg, arry_bct):
@@ -357,16 +388,21 @@ class StopWhenNotUpdateBestCallBack:
         self.len_vars     = len_vars
 
     def __call__(self, study: optuna.study.Study, trial: optuna.trial.FrozenTrial) -> None:
-        best_opt    = study.best_value
-        best_num    = study.best_trial.number
-        curr_num    = trial.number
+        if self.Check(study, trial.number):
+            study.stop()
+
+    def Check(self, study: optuna.study.Study, curr_num: int) -> bool:
+        try:
+            best_opt = study.best_value
+            best_num = study.best_trial.number
+        except:
+            return False
         last_num    = (best_num + self.len_vars) if self.optuna_count == 0 else (best_num + self.optuna_count)
         rema_num    = last_num - curr_num
         total_count = self.back_count * (last_num + 1)
         self.tq.put(('횟수변경', total_count))
         self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], f'<font color=#45cdf7>OPTUNA INFO 최고기준값[{best_opt:,}] 기준값갱신[{best_num}] 현재횟수[{curr_num}] 남은횟수[{rema_num}]</font>'))
-        if curr_num == last_num:
-            study.stop()
+        return curr_num >= last_num
 
 
 class Optimize:
@@ -387,6 +423,10 @@ class Optimize:
         self.gubun      = 'stock' if self.ui_gubun == 'S' else 'coin'
         self.vars       = {}
         self.study      = None
+        self.cache      = None
+        self.checkpoint = None
+        self.startday   = None
+        self.endday     = None
         self.dict_simple_vars = {}
         self.Start()
 
@@ -528,6 +568,15 @@ class Optimize:
         text = f'{self.backname} 매도수전략 및 변수 설정 완료' if not random_optivars else f'{self.backname} 매도수전략 및 변수 최적값 랜덤 설정 완료'
         self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], text))
 
+        context = GetEvalContext(self.dict_set, self.ui_gubun, db, betting, starttime, endtime, buystg, sellstg, std_text,
+                                 optistandard, list_days)
+        if self.dict_set['백테평가캐시']:
+            self.cache = BackEvalCache(DB_BACK_CACHE, context, self.dict_set['백테평가캐시'])
+        self.checkpoint = BackCheckpoint(self.dict_set['백테체크포인트'], self.backname, context, optivars, ccount,
+                                         random_optivars, optuna_sampler, optuna_fixvars, optuna_count, optuna_autostep,
+                                         only_buy, only_sell)
+        self.startday, self.endday = startday, endday
+
         mq = Queue()
         Process(
             target=Total,
@@ -537,12 +586,14 @@ class Optimize:
         self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], f'{self.backname} 집계용 프로세스 생성 완료'))
         self.tq.put(('백테정보', betting, startday, endday, starttime, endtime, buystg_name, buystg, sellstg, optivars,
                      dict_cn, std_text, optistandard, schedul, df_kp, df_kq, list_days, len(day_list), weeks_train,
-                     weeks_valid, weeks_test))
+                     weeks_valid, weeks_test, context))
 
         time.sleep(1)
         data = ('백테정보', betting, avg_list, startday, endday, starttime, endtime, buystg, sellstg)
+        trade_limit = GetTradeLimit(std_text, list_days[0][2]) if list_days[1] is None else None
         for q in self.beq_list:
             q.put(data)
+            q.put(('거래제한', trade_limit))
         if 'B' in self.backname:
             self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], f'<font color=#45cdf7>OPTUNA Sampler : {optuna_sampler}</font>'))
         if only_buy:
@@ -572,6 +623,7 @@ class Optimize:
         self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], f'{self.backname} 백테스트 소요시간 {now() - start_time}'))
         _ = mq.get()
         mq.close()
+        self.checkpoint.Delete()
         self.SysExit(False)
 
     def GetListDays(self, startday, endday, dt_endday, day_list, weeks_train, weeks_valid, weeks_test):
@@ -668,23 +720,31 @@ class Optimize:
     def OptimizeGrid(self, mq, back_count, len_vars, vars_, only_buy, only_sell, buy_first, buy_num, sell_num,
                      vars_type, ccount, random_optivars, optivars, optivars_, optivars_name):
         self.tq.put(('경우의수', back_count, back_count))
-        self.PutData(('변수정보', vars_, 0))
+        state = self.checkpoint.Load()
+        if state is None:
+            self.PutData(('변수정보', vars_, 0))
 
-        hstd = 0
-        data = mq.get()
-        if type(data) == str:
-            self.SysExit(True)
+            hstd = 0
+            data = mq.get()
+            if type(data) == str:
+                self.SysExit(True)
+            else:
+                hstd = data[-1]
+
+            k_start = 0
+            total_change = None
+            total_del_list = [[] for _ in range(len_vars)]
         else:
-            hstd = data[-1]
+            k_start, vars_, hstd, total_change, total_del_list = state
+            self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], f'{self.backname} 체크포인트에서 [{k_start+1}]단계부터 이어서 최적화합니다.'))
 
-        total_change = None
-        total_del_list = [[] for _ in range(len_vars)]
-        for k in range(ccount if ccount != 0 else 100):
+        for k in range(k_start, ccount if ccount != 0 else 100):
             if ccount == 0 and total_change == 0: break
             data = (ui_num[f'{self.ui_gubun}백테스트'], f'{self.backname} [{k+1}]단계 그리드 최적화 시작, 최고 기준값[{hstd:,.2f}], 최적값 변경 개수 [{total_change}]')
             threading_timer(6, self.wq.put, data)
 
-            receiv_count   = sum([len(x[0]) for x in vars_ if len(x[0]) > 1])
+            vars_send, cache_list = GetGridCache(self.cache, vars_, self.startday, self.endday)
+            receiv_count   = sum([len(x[0]) for x in vars_send if len(x[0]) > 1])
             dict_turn_hvar = {i: var[1] for i, var in enumerate(vars_)}
             dict_turn_hstd = {i: hstd for i, x in enumerate(vars_) if len(x[0]) > 1}
             turn_var_std   = {i: {} for i, x in enumerate(vars_) if len(x[0]) > 1}
@@ -692,31 +752,38 @@ class Optimize:
             fix_vars_list  = []
             total_change   = 0
 
-            self.PutData(('변수정보', vars_, 1))
+            if cache_list:
+                data = (ui_num[f'{self.ui_gubun}백테스트'], f'{self.backname} [{k+1}]단계 평가캐시 사용 [{len(cache_list)}]개')
+                threading_timer(6, self.wq.put, data)
+            if receiv_count > 0:
+                self.PutData(('변수정보', vars_send, 1))
 
-            for _ in range(receiv_count):
-                data = mq.get()
-                if type(data) == str:
-                    if not random_optivars:
-                        self.SaveOptiVars(optivars, optivars_, vars_, optivars_name, only_buy, only_sell, buy_first,
-                                          buy_num, sell_num)
-                    self.SysExit(True)
+            for j in range(len(cache_list) + receiv_count):
+                if j < len(cache_list):
+                    vturn, curr_var, std = cache_list[j]
                 else:
+                    data = mq.get()
+                    if type(data) == str:
+                        if not random_optivars:
+                            self.SaveOptiVars(optivars, optivars_, vars_, optivars_name, only_buy, only_sell, buy_first,
+                                              buy_num, sell_num)
+                        self.SysExit(True)
                     vturn, vkey, std = data
-                    curr_typ = vars_type[vturn]
-                    curr_var = vars_[vturn][0][vkey]
-                    preh_var = dict_turn_hvar[vturn]
-                    if std > dict_turn_hstd[vturn] or \
-                            (std == dict_turn_hstd[vturn] and
-                             ((curr_typ and curr_var > preh_var) or (not curr_typ and curr_var < preh_var))):
-                        dict_turn_hstd[vturn] = std
-                        dict_turn_hvar[vturn] = curr_var
-                        if std > hstd: hstd = std
-
-                    if self.dict_set['범위자동관리']:
-                        turn_var_std[vturn][curr_var] = std
-                    elif std == -2_000_000_000:
-                        del_vars_list[vturn].append(curr_var)
+                    curr_var = vars_send[vturn][0][vkey]
+
+                curr_typ = vars_type[vturn]
+                preh_var = dict_turn_hvar[vturn]
+                if std > dict_turn_hstd[vturn] or \
+                        (std == dict_turn_hstd[vturn] and
+                         ((curr_typ and curr_var > preh_var) or (not curr_typ and curr_var < preh_var))):
+                    dict_turn_hstd[vturn] = std
+                    dict_turn_hvar[vturn] = curr_var
+                    if std > hstd: hstd = std
+
+                if self.dict_set['범위자동관리']:
+                    turn_var_std[vturn][curr_var] = std
+                elif std == -2_000_000_000:
+                    del_vars_list[vturn].append(curr_var)
 
             list_turn_hvar = sorted(dict_turn_hvar.items(), key=operator.itemgetter(0))
             for vturn, high_var in list_turn_hvar:
@@ -784,6 +851,8 @@ class Optimize:
                         vars_[i] = [[high_var], high_var]
                         data = (ui_num[f'{self.ui_gubun}백테스트'], f'self.vars[{i}]의 범위 고정 [{high_var}]')
                         threading_timer(5, self.wq.put, data)
+
+            self.checkpoint.Save((k + 1, vars_, hstd, total_change, total_del_list), True)
         return vars_
 
     def OptimizeOptuna(self, mq, back_count, len_vars, vars_, only_buy, only_sell, buy_first, buy_num, sell_num,
@@ -796,9 +865,11 @@ class Optimize:
         self.tq.put(('경우의수', total_count, back_count))
         self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], f'{self.backname} OPTUNA 최적화 시작'))
 
-        def objective(trial):
+        eta   = self.dict_set['백테다단계평가']
+        rates = GetSampleRates(eta)
+
+        def suggest(trial):
             simple_vars = []
-            optuna_vars = []
             for j, var_ in enumerate(list(self.vars.values())):
                 if j < 10:
                     trial_name = f'00{j}'
@@ -840,27 +911,46 @@ class Optimize:
                         trial_ = trial.suggest_float(trial_name, var_[1], var_[1])
 
                 simple_vars.append(trial_)
-                optuna_vars.append(['', trial_])
+            return simple_vars
 
+        def objective(trial):
+            simple_vars = suggest(trial)
+            optuna_vars = [['', x] for x in simple_vars]
             str_simple_vars = str(simple_vars)
+            self.LoadCacheStd(simple_vars)
             if str_simple_vars not in self.dict_simple_vars.keys():
-                self.PutData(('변수정보', optuna_vars, 4))
-                data_ = mq.get()
-                if type(data_) == str:
-                    ostd = 0
-                    self.SysExit(True)
-                else:
-                    ostd = data_[2]
-                    self.dict_simple_vars[str_simple_vars] = ostd
+                for rate in rates:
+                    if len(rates) > 1:
+                        self.PutSample(rate)
+                    self.PutData(('변수정보', optuna_vars, 4))
+                    data_ = mq.get()
+                    if type(data_) == str:
+                        ostd = 0
+                        self.SysExit(True)
+                    else:
+                        ostd = data_[2]
+                        if rate < 1:
+                            trial.report(ostd, round(rate / rates[0]))
+                            if trial.should_prune():
+                                raise optuna.TrialPruned()
+                        else:
+                            self.dict_simple_vars[str_simple_vars] = ostd
             else:
                 ostd = self.dict_simple_vars[str_simple_vars]
             return ostd
 
-        study_name = f'{self.backname}_{buystg_name}_{strf_time("%Y%m%d%H%M%S")}'
+        state = self.checkpoint.Load()
+        if state is None:
+            study_name = f'{self.backname}_{buystg_name}_{strf_time("%Y%m%d%H%M%S")}'
+            self.checkpoint.Save(study_name, True)
+        else:
+            study_name = state
+            self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], f'{self.backname} 체크포인트에서 [{study_name}] 최적화를 이어서 진행합니다.'))
         optuna.logging.disable_default_handler()
 
+        batch = self.dict_set['백테옵튜나배치'] if optuna_sampler != 'BruteForceSampler' else 0
         if optuna_sampler == 'TPESampler':
-            sampler = optuna.samplers.TPESampler()
+            sampler = optuna.samplers.TPESampler(constant_liar=batch > 1)
         elif optuna_sampler == 'BruteForceSampler':
             sampler = optuna.samplers.BruteForceSampler()
         elif optuna_sampler == 'CmaEsSampler':
@@ -870,8 +960,16 @@ class Optimize:
         else:
             sampler = optuna.samplers.RandomSampler()
 
-        self.study = optuna.create_study(storage=DB_OPTUNA, study_name=study_name, direction='maximize', sampler=sampler)
-        self.study.optimize(objective, n_trials=10000, callbacks=[StopWhenNotUpdateBestCallBack(self.wq, self.tq, back_count, optuna_count, self.ui_gubun, len(self.vars))])
+        pruner = optuna.pruners.SuccessiveHalvingPruner(min_resource=1, reduction_factor=eta) if len(rates) > 1 else None
+        self.study = optuna.create_study(storage=DB_OPTUNA, study_name=study_name, direction='maximize', sampler=sampler,
+                                         pruner=pruner, load_if_exists=True)
+        callback = StopWhenNotUpdateBestCallBack(self.wq, self.tq, back_count, optuna_count, self.ui_gubun, len(self.vars))
+        if batch > 1:
+            self.OptimizeOptunaBatch(mq, suggest, callback, batch, rates, ('변수정보', None, 3))
+        else:
+            self.study.optimize(objective, n_trials=10000, callbacks=[callback])
+        if len(rates) > 1:
+            self.PutSample(1)
         for k, var in enumerate(list(self.study.best_params.values())):
             if var != vars_[k][1]:
                 vars_[k][1] = var
@@ -879,6 +977,72 @@ class Optimize:
 
         return vars_
 
+    def OptimizeOptunaBatch(self, mq, suggest, callback, batch, rates, data):
+        """
+        샘플러에 batch 개의 trial 을 한번에 요청(ask)하고 중복을 제외한 변수조합을 opti_turn 3 으로 전송하여
+        GA최적화와 같은 vturn * 20 + vkey 레인에서 한번의 엔진 연산으로 백테스트한다.
+        기준값은 도착하는 순서대로 study 에 전달(tell)하며, 이미 연산한 변수조합은 저장된 기준값을 바로 전달한다.
+        """
+        stop  = False
+        count = 0
+        while not stop and count < 10000:
+            vars_lists = []
+            dict_trial = {}
+            for _ in range(batch):
+                trial = self.study.ask()
+                simple_vars = suggest(trial)
+                str_simple_vars = str(simple_vars)
+                self.LoadCacheStd(simple_vars)
+                if str_simple_vars in self.dict_simple_vars.keys():
+                    self.study.tell(trial, self.dict_simple_vars[str_simple_vars])
+                    stop = callback.Check(self.study, trial.number) or stop
+                else:
+                    if str_simple_vars not in dict_trial.keys():
+                        dict_trial[str_simple_vars] = []
+                        vars_lists.append(simple_vars)
+                    dict_trial[str_simple_vars].append(trial)
+                count += 1
+
+            # 레인 순서대로 self.vars[0] 이 커지도록 정렬한다. 기준값은 레인의 변수조합으로 trial 에 전달되므로 순서와 무관하다.
+            # opti_turn 3 은 vturn 내에서 앞 레인의 평균값틱수를 채우지 못하면 뒤 레인을 건너뛰므로 정렬해야 레인별로 연산한 결과와 같다.
+            vars_lists.sort(key=lambda x: x[0])
+            for rate in rates if vars_lists else []:
+                if len(rates) > 1:
+                    self.PutSample(rate)
+                self.PutData(data[:1] + (vars_lists,) + data[2:])
+                std_list = [0] * len(vars_lists)
+                for _ in range(len(vars_lists)):
+                    data_ = mq.get()
+                    if type(data_) == str:
+                        self.SysExit(True)
+                    else:
+                        vturn, vkey, ostd = data_
+                        std_list[vturn * 20 + vkey] = ostd
+
+                if rate < 1:
+                    for simple_vars, ostd in zip(vars_lists, std_list):
+                        for trial in dict_trial[str(simple_vars)]:
+                            trial.report(ostd, round(rate / rates[0]))
+                    next_lists = []
+                    for simple_vars in vars_lists:
+                        trial_list = dict_trial[str(simple_vars)]
+                        if trial_list[0].should_prune():
+                            for trial in trial_list:
+                                self.study.tell(trial, state=optuna.trial.TrialState.PRUNED)
+                                stop = callback.Check(self.study, trial.number) or stop
+                        else:
+                            next_lists.append(simple_vars)
+                    vars_lists = next_lists
+                    if not vars_lists:
+                        break
+                else:
+                    for simple_vars, ostd in zip(vars_lists, std_list):
+                        str_simple_vars = str(simple_vars)
+                        self.dict_simple_vars[str_simple_vars] = ostd
+                        for trial in dict_trial[str_simple_vars]:
+                            self.study.tell(trial, ostd)
+                            stop = callback.Check(self.study, trial.number) or stop
+
     def SaveOptiVars(self, optivars, optivars_, vars_, optivars_name, only_buy, only_sell, buy_first, buy_num, sell_num):
         if 'T' not in self.backname:
             change = 0
@@ -910,6 +1074,24 @@ class Optimize:
                 con.close()
                 self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], f'{self.backname} {optivars_name}의 최적값 갱신 완료'))
 
+    def PutSample(self, rate):
+        """
+        다단계 평가의 종목 표본비율을 엔진과 집계 프로세스에 전달한다.
+        """
+        self.tq.put(('표본정보', rate))
+        for q in self.beq_list:
+            q.put(('표본정보', rate))
+
+    def LoadCacheStd(self, simple_vars):
+        """
+        optuna 변수조합의 기준값이 평가캐시에 저장되어 있으면 dict_simple_vars 에 추가하여 엔진으로 전송하지 않도록 한다.
+        """
+        str_simple_vars = str(simple_vars)
+        if self.cache is not None and str_simple_vars not in self.dict_simple_vars.keys():
+            ostd = self.cache.Get(self.startday, self.endday, simple_vars)
+            if ostd is not None:
+                self.dict_simple_vars[str_simple_vars] = ostd
+
     def PutData(self, data):
         self.tq.put(data)
         for q in self.bstq_list:
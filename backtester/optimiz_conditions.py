@@ -6,7 +6,9 @@ import operator
 import numpy as np
 import pandas as pd
 from multiprocessing import Process, Queue
-from backtester.back_static import SendTextAndStd, GetMoneytopQuery
+from backtester.back_static import SendTextAndStd, GetMoneytopQuery, GetTradeLimit, GetBatchLanes
+from backtester.back_checkpoint import BackCheckpoint
+from backtester.back_eval_cache import GetEvalContext
 from utility.static import factorial, strf_time, now, timedelta_day, strp_time, timedelta_sec
 from utility.setting import ui_num, DB_STRATEGY, DICT_SET, DB_BACKTEST, DB_STOCK_BACK_TICK, DB_COIN_BACK_TICK, \
     DB_STOCK_BACK_MIN, DB_COIN_BACK_MIN
@@ -25,6 +27,7 @@ class Total:
         self.std_list     = None
         self.optistandard = None
         self.day_count    = None
+        self.cond_count   = 20
 
         self.betting      = None
         self.startday     = None
@@ -72,9 +75,14 @@ class Total:
 
                 if sc == 20:
                     sc = 0
-                    for vkey in range(20):
-                        if vkey not in dict_dummy[0].keys():
-                            self.stdp = SendTextAndStd(self.GetSendData(), None)
+                    for vturn, vkey_list in GetBatchLanes(self.cond_count).items():
+                        if vturn not in dict_dummy.keys():
+                            for vkey in vkey_list:
+                                self.stdp = SendTextAndStd(self.GetSendData(vturn, vkey), None)
+                        else:
+                            for vkey in vkey_list:
+                                if vkey not in dict_dummy[vturn].keys():
+                                    self.stdp = SendTextAndStd(self.GetSendData(vturn, vkey), None)
                     dict_dummy = {}
 
             elif data[0] in ('TRAIN', 'VALID'):
@@ -108,6 +116,8 @@ class Total:
 
             elif data[0] == '백테정보':
                 self.BackInfo(data)
+            elif data[0] == '조건정보':
+                self.cond_count = data[1]
             elif data[0] == '경우의수':
                 self.total_count = data[1]
                 self.back_count  = data[2]
@@ -156,13 +166,14 @@ class OptimizeConditions:
         self.backname     = backname
         self.ui_gubun     = ui_gubun
         self.result       = {}
-        self.opti_list    = []
+        self.opti_list    = set()
         self.bst_procs    = []
         self.bcount       = None
         self.scount       = None
         self.buyconds     = None
         self.sellconds    = None
         self.optistandard = None
+        self.checkpoint   = None
         self.dict_set     = DICT_SET
         self.gubun        = 'stock' if self.ui_gubun == 'S' else 'coin'
         self.savename     = f'{self.gubun}_{self.backname.replace("최적화", "").lower()}'
@@ -298,9 +309,15 @@ class OptimizeConditions:
         total_count = int(bc * sc)
         if total_count < rcount:
             rcount = total_count
-        rcount = int(rcount / 20)
+        count  = min(1000 if self.dict_set['백테조건행렬'] else 20, rcount)
+        rcount = int(rcount / count)
         self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], f'{self.backname} 전체 경우의 수 계산 완료 [{total_count:,.0f}]'))
 
+        context = GetEvalContext(self.dict_set, self.ui_gubun, db, betting, avgtime, starttime, endtime, self.buyconds,
+                                 self.sellconds, is_long, std_text, self.optistandard, self.bcount, self.scount, valid_days,
+                                 day_list)
+        self.checkpoint = BackCheckpoint(self.dict_set['백테체크포인트'], self.backname, context, rcount)
+
         mq = Queue()
         Process(target=Total, args=(self.wq, self.tq, mq, self.bstq_list, self.ui_gubun)).start()
         self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], f'{self.backname} 집계용 프로세스 생성 완료'))
@@ -308,18 +325,27 @@ class OptimizeConditions:
 
         time.sleep(1)
         data = ('백테정보', betting, avgtime, startday, endday, starttime, endtime)
+        trade_limit = GetTradeLimit(std_text, len(day_list)) if valid_days is None else None
         for q in self.beq_list:
             q.put(data)
+            q.put(('거래제한', trade_limit))
         self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], f'{self.backname} 백테스트 시작'))
 
         self.tq.put(('경우의수', rcount * back_count, back_count))
-        hstd = -2_000_000_000
-        for i in range(rcount):
-            buy_conds, sell_conds = self.GetCondlist()
-            if len(buy_conds) == 20:
+        i_start = 0
+        hstd    = -2_000_000_000
+        state   = self.checkpoint.Load()
+        if state is not None:
+            i_start, hstd, self.result, self.opti_list = state
+            self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], f'{self.backname} 체크포인트에서 [{i_start+1}/{rcount}]단계부터 이어서 최적화합니다.'))
+
+        for i in range(i_start, rcount):
+            buy_conds, sell_conds = self.GetCondlist(count)
+            if buy_conds:
                 self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], f'{self.backname} 백테스트 [{i+1}/{rcount}]단계 시작, 최고 기준값[{hstd:,.2f}]'))
                 for q in self.bstq_list:
                     q.put(('백테시작', 3))
+                self.tq.put(('조건정보', len(buy_conds)))
                 if is_long is None:
                     data = ('조건정보', buy_conds, sell_conds)
                 else:
@@ -327,7 +353,7 @@ class OptimizeConditions:
                 for q in self.beq_list:
                     q.put(data)
 
-                for _ in range(20):
+                for _ in range(len(buy_conds)):
                     data = mq.get()
                     if type(data) == str:
                         if len(self.result) > 0:
@@ -335,9 +361,11 @@ class OptimizeConditions:
                             self.ShowTopConds()
                         self.SysExit(True)
                     else:
-                        _, vkey, std = data
+                        vturn, vkey, std = data
                         if std > hstd: hstd = std
-                        if std > 0: self.result[std] = [buy_conds[vkey], sell_conds[vkey]]
+                        if std > 0: self.result[std] = [buy_conds[vturn * 20 + vkey], sell_conds[vturn * 20 + vkey]]
+                self.checkpoint.Save((i + 1, hstd, self.result, self.opti_list))
+                if len(buy_conds) < count: break
             else:
                 break
 
@@ -355,13 +383,14 @@ class OptimizeConditions:
         if self.dict_set['스톰라이브']: self.lq.put(self.backname)
         self.sq.put('조건 최적화가 완료되었습니다.')
         self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], f'{self.backname} 백테스트 소요시간 {now() - start_time}'))
+        self.checkpoint.Delete()
         self.SysExit(False)
 
-    def GetCondlist(self):
+    def GetCondlist(self, count):
         buyconds  = []
         sellconds = []
         limit_time = timedelta_sec(30)
-        for _ in range(20):
+        for _ in range(count):
             while now() < limit_time:
                 random.shuffle(self.buyconds)
                 random.shuffle(self.sellconds)
@@ -369,11 +398,11 @@ class OptimizeConditions:
                 sellcond = self.sellconds[:self.scount]
                 buycond.sort()
                 sellcond.sort()
-                opti_list = buycond + sellcond
+                opti_list = tuple(buycond + sellcond)
                 if opti_list not in self.opti_list:
                     buyconds.append(buycond)
                     sellconds.append(sellcond)
-                    self.opti_list.append(opti_list)
+                    self.opti_list.add(opti_list)
                     break
         return buyconds, sellconds
 
@@ -2,14 +2,17 @@ import sys
 import time
 import random
 import sqlite3
+import itertools
 import operator
 import numpy as np
 import pandas as pd
 from multiprocessing import Process, Queue
-from backtester.back_static import SendTextAndStd, GetMoneytopQuery
-from utility.static import strf_time, now, timedelta_day, timedelta_sec, strp_time, threading_timer
+from backtester.back_static import SendTextAndStd, GetMoneytopQuery, GetBatchLanes, GetSampleRates, GetTradeLimit
+from backtester.back_eval_cache import BackEvalCache, GetEvalContext
+from backtester.back_checkpoint import BackCheckpoint
+from utility.static import strf_time, now, timedelta_day, strp_time, threading_timer
 from utility.setting import DB_STOCK_BACK_TICK, ui_num, DB_STRATEGY, DB_BACKTEST, DICT_SET, DB_COIN_BACK_TICK, \
-    DB_STOCK_BACK_MIN, DB_COIN_BACK_MIN
+    DB_STOCK_BACK_MIN, DB_COIN_BACK_MIN, DB_BACK_CACHE
 
 
 class Total:
@@ -40,6 +43,7 @@ class Total:
         self.dict_v       = {}
 
         self.vars_lists   = None
+        self.cache        = None
         self.stdp         = -2_000_000_000
         self.sub_total    = 0
         self.total_count  = 0
@@ -74,14 +78,14 @@ class Total:
 
                 if sc == 20:
                     sc = 0
-                    for vturn in range(50):
+                    for vturn, vkey_list in GetBatchLanes(len(self.vars_lists)).items():
                         if vturn not in dict_dummy.keys():
-                            for vkey in range(20):
-                                self.stdp = SendTextAndStd(self.GetSendData(vturn, vkey), None)
+                            for vkey in vkey_list:
+                                self.stdp = SendTextAndStd(self.GetSendData(vturn, vkey), None, cache=self.cache)
                         else:
-                            for vkey in range(20):
+                            for vkey in vkey_list:
                                 if vkey not in dict_dummy[vturn].keys():
-                                    self.stdp = SendTextAndStd(self.GetSendData(vturn, vkey), None)
+                                    self.stdp = SendTextAndStd(self.GetSendData(vturn, vkey), None, cache=self.cache)
                     dict_dummy = {}
 
             elif data[0] in ('TRAIN', 'VALID'):
@@ -106,12 +110,12 @@ class Total:
 
                 st[vturn][vkey] += 1
                 if st[vturn][vkey] == self.sub_total:
-                    self.stdp = SendTextAndStd(self.GetSendData(vturn, vkey), self.dict_t[vturn][vkey], self.dict_v[vturn][vkey], self.dict_set['교차검증가중치'])
+                    self.stdp = SendTextAndStd(self.GetSendData(vturn, vkey), self.dict_t[vturn][vkey], self.dict_v[vturn][vkey], self.dict_set['교차검증가중치'], cache=self.cache)
                     st[vturn][vkey] = 0
 
             elif data[0] == 'ALL':
                 _, _, data, vturn, vkey = data
-                self.stdp = SendTextAndStd(self.GetSendData(vturn, vkey), data)
+                self.stdp = SendTextAndStd(self.GetSendData(vturn, vkey), data, cache=self.cache)
 
             elif data[0] == '백테정보':
                 self.BackInfo(data)
@@ -119,6 +123,9 @@ class Total:
                 self.vars_lists = data[1]
                 start = now()
                 tt = 0
+            elif data[0] == '표본정보':
+                if self.cache is not None:
+                    self.cache.SetSample(data[1])
             elif data[0] == '경우의수':
                 self.total_count = data[1]
                 self.back_count  = data[2]
@@ -147,6 +154,8 @@ class Total:
         self.optistandard = data[10]
         self.valid_days   = data[11]
         self.day_count    = data[12]
+        if self.dict_set['백테평가캐시']:
+            self.cache    = BackEvalCache(DB_BACK_CACHE, data[13], self.dict_set['백테평가캐시'])
         if self.valid_days is not None:
             self.sub_total = len(self.valid_days) * 2
         else:
@@ -170,9 +179,11 @@ class OptimizeGeneticAlgorithm:
         self.ui_gubun    = ui_gubun
         self.high_list   = []
         self.vars_list   = []
-        self.opti_lists  = []
+        self.visited     = set()
         self.high_vars   = []
         self.result      = {}
+        self.cache       = None
+        self.checkpoint  = None
         self.vars        = {}
         self.total_count = 0
         self.dict_set    = DICT_SET
@@ -304,62 +315,30 @@ class OptimizeGeneticAlgorithm:
             self.high_list.append(value[1])
         self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], f'{self.backname} 매도수전략 설정 완료'))
 
+        context = GetEvalContext(self.dict_set, self.ui_gubun, db, betting, starttime, endtime, buystg, sellstg, std_text,
+                                 optistandard, valid_days)
+        if self.dict_set['백테평가캐시']:
+            self.cache = BackEvalCache(DB_BACK_CACHE, context, self.dict_set['백테평가캐시'])
+        self.checkpoint = BackCheckpoint(self.dict_set['백테체크포인트'], self.backname, context, optivars)
+
         mq = Queue()
         Process(target=Total, args=(self.wq, self.tq, mq, self.bstq_list, self.ui_gubun)).start()
         self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], f'{self.backname} 집계용 프로세스 생성 완료'))
         self.tq.put(('백테정보', betting, startday, endday, starttime, endtime, buystg, sellstg, dict_cn, std_text,
-                     optistandard, valid_days, len(day_list)))
+                     optistandard, valid_days, len(day_list), context))
 
         time.sleep(1)
         data = ('백테정보', betting, self.vars[0][0], startday, endday, starttime, endtime, buystg, sellstg)
+        trade_limit = GetTradeLimit(std_text, len(day_list)) if valid_days is None else None
         for q in self.beq_list:
             q.put(data)
+            q.put(('거래제한', trade_limit))
         self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], f'{self.backname} 백테스트 시작'))
 
-        k    = 1
-        vc   = len(self.vars_list)
-        hstd = -2_000_000_000
-        goal = 2 ** int(round(vc / 2))
-        self.opti_lists = []
-        while self.total_count > goal:
-            if k > 1: self.SaveVarslist(100, optistandard, buystg, sellstg)
-            self.tq.put(('경우의수', vc * back_count, back_count))
-
-            for i in range(vc):
-                vars_lists = self.GetVarslist()
-                if len(vars_lists) == 1000:
-                    data = (ui_num[f'{self.ui_gubun}백테스트'], f'{self.backname} 백테스트 [{k}][{i+1}/{vc}]단계 시작, 최고 기준값[{hstd:,.2f}]')
-                    threading_timer(6, self.wq.put, data)
-
-                    data = ('변수정보', vars_lists)
-                    self.tq.put(data)
-                    for q in self.bstq_list:
-                        q.put(('백테시작', 3))
-                    for q in self.beq_list:
-                        q.put(data)
-
-                    for _ in range(1000):
-                        data = mq.get()
-                        if type(data) == str:
-                            if len(self.result) > 0:
-                                self.SaveVarslist(100, optistandard, buystg, sellstg)
-                            self.SysExit(True)
-                        else:
-                            vturn, vkey, std = data
-                            index = vturn * 20 + vkey
-                            self.result[std] = vars_lists[index]
-                            if std > hstd: hstd = std
-                else:
-                    self.total_count = 0
-                    break
-
-            if self.total_count == 0:
-                self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], f'{self.backname} 모든 경우의 수 탐색 완료'))
-                break
+        self.Evolve(mq, back_count, startday, endday, optistandard, buystg, sellstg)
 
-            if len(self.result) > 0: self.SetOptilist(k, int(vc / 4) if vc / 4 > 5 else 5, goal)
-            self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], f'{self.backname} 결과 현재 경우의수[{self.total_count:,.0f}] 목표 경우의수[{goal:,.0f}]'))
-            k += 1
+        if len(self.visited) >= self.total_count:
+            self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], f'{self.backname} 모든 경우의 수 탐색 완료'))
 
         time.sleep(6)
         self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], f'{self.backname} 최적화 완료'))
@@ -385,46 +364,171 @@ class OptimizeGeneticAlgorithm:
         if self.dict_set['스톰라이브']: self.lq.put(f'{self.backname}')
         self.sq.put('지에이 최적화가 완료되었습니다.')
         self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], f'{self.backname} 백테스트 소요시간 {now() - start_time}'))
+        self.checkpoint.Delete()
         self.SysExit(False)
 
-    def GetVarslist(self):
-        vars_lists = []
-        limit_time = timedelta_sec(30)
-        for _ in range(1000):
-            while now() < limit_time:
-                vars_list = []
-                for vars_ in self.vars_list:
-                    vars_list.append(random.choice(vars_))
-                if vars_list not in self.opti_lists:
-                    vars_lists.append(vars_list)
-                    self.opti_lists.append(vars_list)
-                    break
-        return vars_lists
-
-    def SetOptilist(self, count, rank, goal):
-        self.vars_list = [[] for _ in self.vars_list]
-        rs_list = sorted(self.result.items(), key=operator.itemgetter(0), reverse=True)
-
-        text = f'{self.backname} 결과\n'
-        for std, vars_list in rs_list[:rank]:
-            text += f' 기준값 [{std:.2f}] 변수 {vars_list}\n'
-            for i, vars_ in enumerate(vars_list):
-                if vars_ not in self.vars_list[i]:
-                    self.vars_list[i].append(vars_)
-        self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], text[:-1]))
-
-        self.total_count = 1
-        for i, vars_ in enumerate(self.vars_list):
-            if count < 4 and self.high_list[i] not in vars_:
-                self.vars_list[i].append(self.high_list[i])
-            self.vars_list[i].sort()
-            self.total_count *= len(vars_)
-
-        if self.total_count <= goal:
-            text = ''
-            for std, vars_list in rs_list[rank:100 - rank]:
-                text += f' 기준값 [{std:.2f}] 변수 {vars_list}\n'
+    def Evolve(self, mq, back_count, startday, endday, optistandard, buystg, sellstg):
+        """
+        세대마다 개체를 평가하여 상위 개체수만 다음 세대의 부모로 남기며, 5세대 연속 최고 기준값이 갱신되지 않거나
+        모든 경우의 수를 탐색하면 종료한다.
+        """
+        g     = 0
+        stall = 0
+        hstd  = -2_000_000_000
+        size  = min(max(self.dict_set['백테GA개체수'] // 20 * 20, 20), 1000)
+        population = []
+        state = self.checkpoint.Load()
+        if state is not None:
+            g, stall, hstd, population, self.result, self.visited = state
+            self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], f'{self.backname} 체크포인트에서 [{g+1}]세대부터 이어서 최적화합니다.'))
+
+        self.tq.put(('경우의수', back_count, back_count))
+        while stall < 5 and len(self.visited) < self.total_count:
+            g += 1
+            genes_list = self.GetOffspring(population, size) if population else self.GetFirstPopulation(size)
+            if not genes_list: break
+            data = (ui_num[f'{self.ui_gubun}백테스트'], f'{self.backname} 백테스트 [{g}]세대 시작, 개체수[{len(genes_list)}], 최고 기준값[{hstd:,.2f}]')
+            threading_timer(6, self.wq.put, data)
+
+            stall += 1
+            for std, genes in self.GetStdGenes(mq, genes_list, startday, endday, optistandard, buystg, sellstg):
+                self.result[std] = self.GetVars(genes)
+                population.append((std, genes))
+                if std > hstd:
+                    hstd  = std
+                    stall = 0
+            population = sorted(population, reverse=True)[:size]
+
+            text = f'{self.backname} [{g}]세대 결과, 탐색 경우의수[{len(self.visited):,.0f}/{self.total_count:,.0f}]\n'
+            for std, genes in population[:5]:
+                text += f' 기준값 [{std:.2f}] 변수 {self.GetVars(genes)}\n'
             self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], text[:-1]))
+            self.checkpoint.Save((g, stall, hstd, population, self.result, self.visited), True)
+
+    def GetStdGenes(self, mq, genes_list, startday, endday, optistandard, buystg, sellstg):
+        """
+        개체 목록의 기준값을 평가캐시에서 찾고 나머지는 엔진으로 연산하여 [(기준값, 개체)]로 반환한다.
+        다단계 평가를 사용하면 표본비율마다 상위 1/eta 개체만 다음 단계로 넘기며, 전체 종목으로 평가한 개체만 반환한다.
+        opti_turn 3 은 vturn 내에서 앞 레인의 평균값틱수를 채우지 못하면 뒤 레인을 건너뛰므로 self.vars[0] 순서로 정렬하여 전송한다.
+        """
+        std_genes  = []
+        send_genes = []
+        for genes in genes_list:
+            std = self.cache.Get(startday, endday, self.GetVars(genes)) if self.cache is not None else None
+            if std is not None:
+                std_genes.append((std, genes))
+            else:
+                send_genes.append(genes)
+        if std_genes:
+            data = (ui_num[f'{self.ui_gubun}백테스트'], f'{self.backname} 평가캐시 사용 [{len(std_genes)}]개')
+            threading_timer(6, self.wq.put, data)
+        if not send_genes:
+            return std_genes
+
+        send_genes.sort(key=lambda x: self.vars_list[0][x[0]])
+        eta   = self.dict_set['백테다단계평가']
+        rates = GetSampleRates(eta)
+        for rate in rates:
+            if len(rates) > 1:
+                self.PutSample(rate)
+            std_list = self.GetStdList(mq, [self.GetVars(x) for x in send_genes], optistandard, buystg, sellstg)
+            if rate < 1:
+                count = max(1, int(len(send_genes) / eta))
+                index_list = sorted(range(len(send_genes)), key=lambda x: std_list[x], reverse=True)[:count]
+                send_genes = [send_genes[x] for x in sorted(index_list)]
+            else:
+                std_genes += list(zip(std_list, send_genes))
+        return std_genes
+
+    def GetStdList(self, mq, vars_lists, optistandard, buystg, sellstg):
+        """
+        변수조합 목록을 엔진에 전송하고 변수조합 순서대로 기준값 목록을 반환한다.
+        """
+        data = ('변수정보', vars_lists)
+        self.tq.put(data)
+        for q in self.bstq_list:
+            q.put(('백테시작', 3))
+        for q in self.beq_list:
+            q.put(data)
+
+        std_list = [0] * len(vars_lists)
+        for _ in range(len(vars_lists)):
+            data = mq.get()
+            if type(data) == str:
+                if len(self.result) > 0:
+                    self.SaveVarslist(100, optistandard, buystg, sellstg)
+                self.SysExit(True)
+            else:
+                vturn, vkey, std = data
+                std_list[vturn * 20 + vkey] = std
+        return std_list
+
+    def PutSample(self, rate):
+        """
+        다단계 평가의 종목 표본비율을 엔진과 집계 프로세스에 전달한다.
+        """
+        self.tq.put(('표본정보', rate))
+        for q in self.beq_list:
+            q.put(('표본정보', rate))
+
+    def GetVars(self, genes):
+        return [self.vars_list[i][x] for i, x in enumerate(genes)]
+
+    def GetFirstPopulation(self, size):
+        """
+        첫 세대는 변수설정의 최적값 조합과 무작위 조합으로 채운다.
+        개체는 self.vars_list 의 변수별 범위 인덱스 튜플이며, 탐색한 개체는 self.visited 에 추가하여 다시 연산하지 않는다.
+        """
+        genes_list = []
+        genes = tuple(v.index(h) if h in v else random.randrange(len(v)) for v, h in zip(self.vars_list, self.high_list))
+        self.visited.add(genes)
+        genes_list.append(genes)
+        return genes_list + self.GetRandomGenes(size - 1)
+
+    def GetRandomGenes(self, count):
+        lens = [len(x) for x in self.vars_list]
+        if self.total_count - len(self.visited) <= count:
+            genes_list = [x for x in itertools.product(*[range(n) for n in lens]) if x not in self.visited]
+            self.visited.update(genes_list)
+            return genes_list
+
+        genes_list = []
+        for _ in range(count * 50):
+            if len(genes_list) == count: break
+            genes = tuple(random.randrange(n) for n in lens)
+            if genes not in self.visited:
+                self.visited.add(genes)
+                genes_list.append(genes)
+        return genes_list
+
+    def GetOffspring(self, population, size):
+        """
+        상위 size 개 개체(엘리트)에서 토너먼트 선택한 두 부모를 균등 교차하고, 변수마다 1/변수개수 확률로
+        인접 인덱스 또는 무작위 인덱스로 변이한 자식 중 탐색하지 않은 개체를 size 개까지 만든다.
+        자식이 부족하면 무작위 개체로 채우고, 남은 경우의 수가 size 이하이면 모두 반환한다.
+        """
+        lens = [len(x) for x in self.vars_list]
+        if self.total_count - len(self.visited) <= size:
+            return self.GetRandomGenes(size)
+
+        rate = 1 / len(lens)
+        genes_list = []
+        for _ in range(size * 20):
+            if len(genes_list) == size: break
+            parent1 = max(random.sample(population, min(3, len(population))))[1]
+            parent2 = max(random.sample(population, min(3, len(population))))[1]
+            child = [x if random.random() < 0.5 else y for x, y in zip(parent1, parent2)]
+            for i, n in enumerate(lens):
+                if n > 1 and random.random() < rate:
+                    if random.random() < 0.5:
+                        child[i] = min(max(child[i] + random.choice((-1, 1)), 0), n - 1)
+                    else:
+                        child[i] = random.randrange(n)
+            child = tuple(child)
+            if child not in self.visited:
+                self.visited.add(child)
+                genes_list.append(child)
+        return genes_list + self.GetRandomGenes(size - len(genes_list))
 
     def SaveVarslist(self, rank, optistandard, buystg, sellstg):
         rs_list = sorted(self.result.items(), key=operator.itemgetter(0), reverse=True)
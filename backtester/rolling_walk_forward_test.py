@@ -7,10 +7,14 @@ import operator
 import numpy as np
 import pandas as pd
 from multiprocessing import Process, Queue
-from backtester.back_static import SendTextAndStd, GetMoneytopQuery, PltShow, GetResultDataframe, GetBackResult, AddMdd
+from backtester.back_scheduler import BackScheduler
+from backtester.back_eval_cache import BackEvalCache, GetEvalContext, GetGridCache
+from backtester.back_checkpoint import BackCheckpoint
+from backtester.back_static import SendTextAndStd, GetMoneytopQuery, PltShow, GetResultDataframe, GetBackResult, AddMdd, \
+    GetBatchLanes, GetSampleRates
 from utility.static import strf_time, now, timedelta_day, strp_time, threading_timer
 from utility.setting import ui_num, DB_STRATEGY, DB_BACKTEST, DICT_SET, DB_STOCK_BACK_TICK, DB_COIN_BACK_TICK, \
-    DB_OPTUNA, DB_STOCK_BACK_MIN, DB_COIN_BACK_MIN
+    DB_OPTUNA, DB_STOCK_BACK_MIN, DB_COIN_BACK_MIN, DB_BACK_CACHE
 
 
 class Total:
@@ -69,6 +73,10 @@ class Total:
 
         self.vars         = None
         self.vars_list    = None
+        self.vars_lists   = None
+        self.cache        = None
+        self.lane_days    = None
+        self.back_turn    = 1
         self.opti_turn    = None
         self.hstd_list    = None
         self.stdp         = -2_000_000_000
@@ -76,6 +84,7 @@ class Total:
         self.total_count  = 0
         self.total_count2 = 0
 
+        self.scheduler    = BackScheduler(self.beq_list, self.multi)
         self.MainLoop()
 
     def MainLoop(self):
@@ -98,7 +107,7 @@ class Total:
                 bc  += 1
                 tbc += 1
                 if self.opti_turn == 1:
-                    if self.dict_set['백테일괄로딩'] and self.divid_mode != '한종목 로딩':
+                    if self.dict_set['백테일괄로딩'] and self.divid_mode != '한종목 로딩' and self.scheduler.round is None:
                         if first_time is None: first_time = now()
                         procn, cnt, total = data[1:]
                         if cnt == total:
@@ -112,10 +121,11 @@ class Total:
                 elif self.opti_turn == 4:
                     self.wq.put((ui_num[f'{self.ui_gubun}백테바'], tbc, self.total_count, start))
 
-                if bc == self.back_count:
+                if bc == self.back_count * self.back_turn:
                     bc = 0
-                    if self.opti_turn == 1:
-                        if self.dict_set['백테일괄로딩'] and self.divid_mode != '한종목 로딩':
+                    if self.opti_turn in (1, 3):
+                        if self.opti_turn == 1 and self.dict_set['백테일괄로딩'] and self.divid_mode != '한종목 로딩' and \
+                                self.scheduler.round is None:
                             time_90 = (divid_time - first_time).total_seconds()
                             time_10 = (now() - divid_time).total_seconds()
                             if time_90 * 5 / 90 < time_10:
@@ -132,6 +142,12 @@ class Total:
                         for q in self.bstq_list[:5]:
                             q.put(('백테완료', '분리집계'))
 
+            elif data[0] == '작업요청':
+                self.scheduler.Request(*data[1:])
+
+            elif data[0] == '작업목록':
+                self.scheduler.Regist(*data[1:])
+
             elif data == '집계완료':
                 sc += 1
                 if sc == 5:
@@ -146,7 +162,7 @@ class Total:
                     self.bstq_list[0].put('결과전송')
 
             elif data[0] == '결과없음':
-                self.stdp = SendTextAndStd(self.GetSendData(), None)
+                self.stdp = SendTextAndStd(self.GetSendData(), None, cache=self.cache)
 
             elif data[0] == '더미결과':
                 sc += 1
@@ -158,12 +174,15 @@ class Total:
                 if sc == 20:
                     sc = 0
                     for vturn in list(dict_dummy.keys()):
-                        curr_vars_count = len(self.vars_list[vturn][0])
+                        if self.opti_turn == 3:
+                            curr_vars_count = len(GetBatchLanes(len(self.vars_lists))[vturn])
+                        else:
+                            curr_vars_count = len(self.vars_list[vturn][0])
                         key_list = list(dict_dummy[vturn].keys())
                         zero_key_list = [x for x in range(curr_vars_count) if x not in key_list]
                         if zero_key_list:
                             for vkey in zero_key_list:
-                                self.stdp = SendTextAndStd(self.GetSendData(vturn, vkey), None)
+                                self.stdp = SendTextAndStd(self.GetSendData(vturn, vkey), None, cache=self.cache)
                     dict_dummy = {}
 
             elif data[0] == '백테결과':
@@ -197,24 +216,35 @@ class Total:
                         self.GetSendData(vturn, vkey),
                         self.dict_t[vturn][vkey],
                         self.dict_v[vturn][vkey],
-                        self.dict_set['교차검증가중치']
+                        self.dict_set['교차검증가중치'],
+                        cache=self.cache
                     )
                     st[vturn][vkey] = 0
 
             elif data[0] == 'ALL':
                 _, _, data, vturn, vkey = data
-                self.stdp = SendTextAndStd(self.GetSendData(vturn, vkey), data)
+                self.stdp = SendTextAndStd(self.GetSendData(vturn, vkey), data, cache=self.cache)
 
             elif data[0] == '백테정보':
                 self.BackInfo(data)
             elif data[0] == '변수정보':
-                self.vars_list = data[1]
                 self.opti_turn = data[2]
-                self.vars      = [var[1] for var in self.vars_list]
-                dict_dummy     = {i: {} for i, x in enumerate(self.vars_list) if len(x[0]) > 1}
+                self.lane_days = data[3] if len(data) > 3 else None
+                self.back_turn = len(set(self.lane_days)) if self.lane_days is not None else 1
+                if self.opti_turn == 3:
+                    self.vars_lists = data[1]
+                    self.vars       = self.vars_lists[0]
+                    dict_dummy      = {i: {} for i in GetBatchLanes(len(self.vars_lists)).keys()}
+                else:
+                    self.vars_list  = data[1]
+                    self.vars       = [var[1] for var in self.vars_list]
+                    dict_dummy      = {i: {} for i, x in enumerate(self.vars_list) if len(x[0]) > 1}
                 if self.opti_turn != 4:
                     tt = 0
                     start = now()
+            elif data[0] == '표본정보':
+                if self.cache is not None:
+                    self.cache.SetSample(data[1])
             elif data[0] == '경우의수':
                 self.total_count  = data[1]
                 self.back_count   = data[2]
@@ -259,6 +289,8 @@ class Total:
         self.weeks_train  = data[17]
         self.weeks_valid  = data[18]
         self.weeks_test   = data[19]
+        if self.dict_set['백테평가캐시']:
+            self.cache    = BackEvalCache(DB_BACK_CACHE, data[20], self.dict_set['백테평가캐시'])
         if self.list_days[0][1] is not None:
             self.sub_total = len(self.list_days[0][1]) * 2
         else:
@@ -266,7 +298,12 @@ class Total:
 
     def GetSendData(self, vturn=0, vkey=0):
         if self.opti_turn == 1:
+            self.vars = [var[1] for var in self.vars_list]
             self.vars[vturn] = self.vars_list[vturn][0][vkey]
+        elif self.opti_turn == 3:
+            self.vars = self.vars_lists[vturn * 20 + vkey]
+            if self.lane_days is not None:
+                self.startday, self.endday = self.lane_days[vturn * 20 + vkey]
         return ['최적화', self.ui_gubun, self.wq, self.mq, self.stdp, self.optistandard, self.opti_turn, vturn, vkey, self.vars, self.startday, self.endday, self.std_list, self.betting]
 
     def Report(self, list_tsg, arry_bct, oc):
@@ -360,16 +397,21 @@ class StopWhenNotUpdateBestCallBack:
         self.len_vars     = len_vars
 
     def __call__(self, study: optuna.study.Study, trial: optuna.trial.FrozenTrial) -> None:
-        best_opt    = study.best_value
-        best_num    = study.best_trial.number
-        curr_num    = trial.number
+        if self.Check(study, trial.number):
+            study.stop()
+
+    def Check(self, study: optuna.study.Study, curr_num: int) -> bool:
+        try:
+            best_opt = study.best_value
+            best_num = study.best_trial.number
+        except:
+            return False
         last_num    = (best_num + self.len_vars) if self.optuna_count == 0 else (best_num + self.optuna_count)
         rema_num    = last_num - curr_num
         total_count = self.back_count * (last_num + 1)
         self.tq.put(('횟수변경', total_count))
         self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], f'<font color=#45cdf7>OPTUNA INFO 최고기준값[{best_opt:,}] 기준값갱신[{best_num}] 현재횟수[{curr_num}] 남은횟수[{rema_num}]</font>'))
-        if curr_num == last_num:
-            study.stop()
+        return curr_num >= last_num
 
 
 class RollingWalkForwardTest:
@@ -389,7 +431,10 @@ class RollingWalkForwardTest:
         self.dict_set   = DICT_SET
         self.gubun      = 'stock' if self.ui_gubun == 'S' else 'coin'
         self.vars       = {}
-        self.study      = None
+        self.cache      = None
+        self.checkpoint = None
+        self.dict_fold  = {}
+        self.sample_rate = 1
         self.dict_simple_vars = {}
         self.Start()
 
@@ -423,18 +468,6 @@ class RollingWalkForwardTest:
         backengin_sday  = data[19]
         backengin_eday  = data[20]
         optuna_sampler  = data[21]
-        if optuna_sampler == 'BruteForceSampler':
-            sampler = optuna.samplers.BruteForceSampler()
-        elif optuna_sampler == 'CmaEsSampler':
-            sampler = optuna.samplers.CmaEsSampler()
-        elif optuna_sampler == 'QMCSampler':
-            sampler = optuna.samplers.QMCSampler()
-        elif optuna_sampler == 'RandomSampler':
-            sampler = optuna.samplers.RandomSampler()
-        elif optuna_sampler == 'TPESampler':
-            sampler = optuna.samplers.TPESampler()
-        else:
-            sampler = None
         optuna_fixvars = []
         if data[22] != '':
             try:
@@ -523,6 +556,16 @@ class RollingWalkForwardTest:
         text = f'{self.backname} 매도수전략 및 변수 설정 완료' if not random_optivars else f'{self.backname} 매도수전략 및 변수 최적값 랜덤 설정 완료'
         self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], text))
 
+        context = GetEvalContext(self.dict_set, self.ui_gubun, db, betting, starttime, endtime, buystg, sellstg, std_text,
+                                 optistandard, list_days)
+        if self.dict_set['백테평가캐시']:
+            self.cache = BackEvalCache(DB_BACK_CACHE, context, self.dict_set['백테평가캐시'])
+        self.checkpoint = BackCheckpoint(self.dict_set['백테체크포인트'], self.backname, context, optivars, ccount,
+                                         random_optivars, optuna_sampler, optuna_fixvars, optuna_count, optuna_autostep)
+        self.dict_fold  = self.checkpoint.Load() or {}
+        if self.dict_fold:
+            self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], f'{self.backname} 체크포인트에서 완료된 구간 {[i + 1 for i in sorted(self.dict_fold.keys())]}을 불러왔습니다.'))
+
         mq = Queue()
         Process(
             target=Total,
@@ -531,7 +574,8 @@ class RollingWalkForwardTest:
         ).start()
         self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], f'{self.backname} 집계용 프로세스 생성 완료'))
         self.tq.put(('백테정보', betting, startday, endday, starttime, endtime, buystg_name, buystg, sellstg, optivars,
-                     dict_cn, list_days, std_text, optistandard, schedul, df_kp, df_kd, weeks_train, weeks_valid, weeks_test))
+                     dict_cn, list_days, std_text, optistandard, schedul, df_kp, df_kd, weeks_train, weeks_valid, weeks_test,
+                     context))
 
         time.sleep(1)
         data = ('백테정보', betting, avg_list, starttime, endtime, buystg, sellstg)
@@ -543,17 +587,44 @@ class RollingWalkForwardTest:
 
         hstd_list = []
         hvar_list = []
-        for i, days in enumerate(list_days):
-            train_days, _, _ = days
-            startday, endday = train_days[0], train_days[1]
-
-            if 'B' not in self.backname:
-                vars_, hstd = self.OptimizeGrid(mq, total_count, back_count, ccount, vars_type, vars_, startday, endday, i)
-            else:
-                vars_, hstd = self.OptimizeOptuna(mq, optuna_count, back_count, len_vars, optuna_fixvars, optuna_autostep, buystg_name, sampler, vars_, startday, endday, i)
+        # 구간 병렬은 각 구간이 직전 구간의 최적값과 샘플러 기록을 이어받지 않고 같은 초기값에서 시작하므로
+        # 순차 실행과 결과가 다를 수 있어 백테구간병렬을 2 이상으로 설정했을 때만 사용한다.
+        parallel  = self.dict_set['백테구간병렬']
+        if 'B' in self.backname and (self.dict_set['백테옵튜나배치'] < 2 or optuna_sampler == 'BruteForceSampler'):
+            parallel = 0
+        if parallel > 1 and len(list_days) > 1:
+            self.tq.put(('경우의수', total_count, back_count, list_days[0][0][0], list_days[-1][0][1], 0))
+            searches = []
+            for i, days in enumerate(list_days):
+                startday, endday = days[0][0], days[0][1]
+                vars_i = [[var[0], var[1]] for var in vars_]
+                if i in self.dict_fold.keys():
+                    searches.append(None)
+                elif 'B' not in self.backname:
+                    searches.append(self.GridSearch(ccount, vars_type, vars_i, startday, endday, i))
+                else:
+                    searches.append(self.OptunaFoldSearch(mq, optuna_count, back_count, optuna_fixvars, optuna_autostep, buystg_name,
+                                                          self.GetSampler(optuna_sampler), vars_i, startday, endday, i))
+            for days, (vars_i, hstd) in zip(list_days, self.OptimizeFolds(mq, list_days, searches, parallel)):
+                hvar_list.append(vars_i)
+                hstd_list.append([days[0][0], days[0][1], hstd])
+        else:
+            sampler = self.GetSampler(optuna_sampler)
+            for i, days in enumerate(list_days):
+                train_days, _, _ = days
+                startday, endday = train_days[0], train_days[1]
+
+                if i in self.dict_fold.keys():
+                    vars_, hstd = self.dict_fold[i]
+                    vars_ = [[var[0], var[1]] for var in vars_]
+                elif 'B' not in self.backname:
+                    vars_, hstd = self.OptimizeGrid(mq, total_count, back_count, ccount, vars_type, vars_, startday, endday, i)
+                else:
+                    vars_, hstd = self.OptimizeOptuna(mq, optuna_count, back_count, len_vars, optuna_fixvars, optuna_autostep, buystg_name, sampler, vars_, startday, endday, i)
 
-            hvar_list.append(vars_)
-            hstd_list.append([startday, endday, hstd])
+                hvar_list.append([[var[0], var[1]] for var in vars_])
+                hstd_list.append([startday, endday, hstd])
+                self.SaveFold(i, hvar_list[-1], hstd)
 
         time.sleep(6)
         self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], f'{self.backname} 인샘플 최적화 완료'))
@@ -573,8 +644,24 @@ class RollingWalkForwardTest:
         self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], f'{self.backname} 백테스트 소요시간 {now() - start_time}'))
         _ = mq.get()
         mq.close()
+        self.checkpoint.Delete()
         self.SysExit(False)
 
+    def GetSampler(self, optuna_sampler):
+        if optuna_sampler == 'BruteForceSampler':
+            sampler = optuna.samplers.BruteForceSampler()
+        elif optuna_sampler == 'CmaEsSampler':
+            sampler = optuna.samplers.CmaEsSampler()
+        elif optuna_sampler == 'QMCSampler':
+            sampler = optuna.samplers.QMCSampler()
+        elif optuna_sampler == 'RandomSampler':
+            sampler = optuna.samplers.RandomSampler()
+        elif optuna_sampler == 'TPESampler':
+            sampler = optuna.samplers.TPESampler(constant_liar=self.dict_set['백테옵튜나배치'] > 1)
+        else:
+            sampler = None
+        return sampler
+
     def GetListDays(self, startday, endday, weeks_train, weeks_valid, weeks_test, day_list):
         k = 0
         list_days_ = []
@@ -685,28 +772,36 @@ class RollingWalkForwardTest:
             data = (ui_num[f'{self.ui_gubun}백테스트'], f'{self.backname} 인샘플 [{i+1}]구간 [{k+1}]단계 그리드 최적화 시작, 최고 기준값[{hstd:,.2f}], 최적값 변경 개수 [{total_change}]')
             threading_timer(6, self.wq.put, data)
 
-            receiv_count   = sum([len(x[0]) for x in vars_ if len(x[0]) > 1])
+            vars_send, cache_list = GetGridCache(self.cache, vars_, startday, endday)
+            receiv_count   = sum([len(x[0]) for x in vars_send if len(x[0]) > 1])
             dict_turn_hvar = {i: var[1] for i, var in enumerate(vars_)}
             dict_turn_hstd = {i: hstd for i, x in enumerate(vars_) if len(x[0]) > 1}
             total_change   = 0
 
-            self.PutData(('변수정보', vars_, 1, startday, endday, i))
+            if cache_list:
+                data = (ui_num[f'{self.ui_gubun}백테스트'], f'{self.backname} 인샘플 [{i+1}]구간 [{k+1}]단계 평가캐시 사용 [{len(cache_list)}]개')
+                threading_timer(6, self.wq.put, data)
+            if receiv_count > 0:
+                self.PutData(('변수정보', vars_send, 1, startday, endday, i))
 
-            for _ in range(receiv_count):
-                data = mq.get()
-                if type(data) == str:
-                    self.SysExit(True)
+            for j in range(len(cache_list) + receiv_count):
+                if j < len(cache_list):
+                    vturn, curr_var, std = cache_list[j]
                 else:
+                    data = mq.get()
+                    if type(data) == str:
+                        self.SysExit(True)
                     vturn, vkey, std = data
-                    curr_typ = vars_type[vturn]
-                    curr_var = vars_[vturn][0][vkey]
-                    preh_var = vars_[vturn][1]
-                    if std > dict_turn_hstd[vturn] or \
-                            (std == dict_turn_hstd[vturn] and
-                             ((curr_typ and curr_var > preh_var) or (not curr_typ and curr_var < preh_var))):
-                        dict_turn_hstd[vturn] = std
-                        dict_turn_hvar[vturn] = curr_var
-                        if std > hstd: hstd = std
+                    curr_var = vars_send[vturn][0][vkey]
+
+                curr_typ = vars_type[vturn]
+                preh_var = vars_[vturn][1]
+                if std > dict_turn_hstd[vturn] or \
+                        (std == dict_turn_hstd[vturn] and
+                         ((curr_typ and curr_var > preh_var) or (not curr_typ and curr_var < preh_var))):
+                    dict_turn_hstd[vturn] = std
+                    dict_turn_hvar[vturn] = curr_var
+                    if std > hstd: hstd = std
 
             list_turn_hvar = sorted(dict_turn_hvar.items(), key=operator.itemgetter(0))
             for vturn, high_var in list_turn_hvar:
@@ -720,17 +815,33 @@ class RollingWalkForwardTest:
 
     def OptimizeOptuna(self, mq, optuna_count, back_count, len_vars, optuna_fixvars, optuna_autostep, buystg_name,
                        sampler, vars_, startday, endday, i):
-        self.dict_simple_vars = {}
         if optuna_count == 0:
             total_count = back_count * (len_vars + 1)
         else:
             total_count = back_count * optuna_count
         self.tq.put(('경우의수', total_count, back_count, startday, endday, i))
+        search = self.OptunaFoldSearch(mq, optuna_count, back_count, optuna_fixvars, optuna_autostep, buystg_name, sampler,
+                                       vars_, startday, endday, i)
+        vars_, hstd = self.RunSearch(mq, search, ('변수정보', None, 3, startday, endday, i))
+        if self.sample_rate != 1:
+            self.PutSample(1)
+        return vars_, hstd
+
+    def OptunaFoldSearch(self, mq, optuna_count, back_count, optuna_fixvars, optuna_autostep, buystg_name, sampler,
+                         vars_, startday, endday, i):
+        """
+        한 구간의 optuna 최적화 제너레이터. 배치 모드에서는 OptunaSearch 의 (표본비율, 변수조합 목록)을 그대로 yield 하고,
+        배치를 사용하지 않으면 opti_turn 4 로 한 trial 씩 연산하므로 yield 하지 않는다.
+        반환값: (최적값이 반영된 vars_, 최고 기준값)
+        """
+        self.dict_simple_vars = {}
         self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], f'{self.backname} 인샘플 [{i+1}]구간 OPTUNA 최적화 시작'))
 
-        def objective(trial):
+        eta   = self.dict_set['백테다단계평가']
+        rates = GetSampleRates(eta)
+
+        def suggest(trial):
             simple_vars = []
-            optuna_vars = []
             for j, var_ in enumerate(list(self.vars.values())):
                 if j < 10:
                     trial_name = f'00{j}'
@@ -770,42 +881,297 @@ class RollingWalkForwardTest:
                         trial_ = trial.suggest_float(trial_name, var_[1], var_[1])
 
                 simple_vars.append(trial_)
-                optuna_vars.append(['', trial_])
+            return simple_vars
 
+        def objective(trial):
+            simple_vars = suggest(trial)
+            optuna_vars = [['', x] for x in simple_vars]
             str_simple_vars = str(simple_vars)
             if str_simple_vars not in self.dict_simple_vars.keys():
-                self.PutData(('변수정보', optuna_vars, 4, startday, endday, i))
-                data_ = mq.get()
-                if type(data_) == str:
-                    ostd = 0
-                    self.SysExit(True)
-                else:
-                    ostd = data_[2]
+                ostd = self.LoadCacheStd(simple_vars, startday, endday)
+                if ostd is not None:
                     self.dict_simple_vars[str_simple_vars] = ostd
+            if str_simple_vars not in self.dict_simple_vars.keys():
+                for rate in rates:
+                    if rate != self.sample_rate:
+                        self.PutSample(rate)
+                    self.PutData(('변수정보', optuna_vars, 4, startday, endday, i))
+                    data_ = mq.get()
+                    if type(data_) == str:
+                        ostd = 0
+                        self.SysExit(True)
+                    else:
+                        ostd = data_[2]
+                        if rate < 1:
+                            trial.report(ostd, round(rate / rates[0]))
+                            if trial.should_prune():
+                                raise optuna.TrialPruned()
+                        else:
+                            self.dict_simple_vars[str_simple_vars] = ostd
             else:
                 ostd = self.dict_simple_vars[str_simple_vars]
             return ostd
 
-        study_name = f'{self.backname}_{buystg_name}_{strf_time("%Y%m%d%H%M%S")}'
+        study_name = f'{self.backname}_{buystg_name}_{strf_time("%Y%m%d%H%M%S")}_{i+1}'
         optuna.logging.disable_default_handler()
+        batch = self.dict_set['백테옵튜나배치'] if not isinstance(sampler, optuna.samplers.BruteForceSampler) else 0
         if sampler is None:
-            self.study = optuna.create_study(storage=DB_OPTUNA, study_name=study_name, direction='maximize')
+            sampler = optuna.samplers.TPESampler(constant_liar=batch > 1) if batch > 1 else None
+        pruner = optuna.pruners.SuccessiveHalvingPruner(min_resource=1, reduction_factor=eta) if len(rates) > 1 else None
+        if sampler is None:
+            study = optuna.create_study(storage=DB_OPTUNA, study_name=study_name, direction='maximize', pruner=pruner)
+        else:
+            study = optuna.create_study(storage=DB_OPTUNA, study_name=study_name, direction='maximize', sampler=sampler,
+                                        pruner=pruner)
+        callback = StopWhenNotUpdateBestCallBack(self.wq, self.tq, back_count, optuna_count, self.ui_gubun, len(self.vars))
+        if batch > 1:
+            yield from self.OptunaSearch(study, suggest, callback, batch, rates, startday, endday)
         else:
-            self.study = optuna.create_study(storage=DB_OPTUNA, study_name=study_name, direction='maximize', sampler=sampler)
-        self.study.optimize(objective, n_trials=10000, callbacks=[StopWhenNotUpdateBestCallBack(self.wq, self.tq, back_count, optuna_count, self.ui_gubun, len(self.vars))])
-        for k, var in enumerate(list(self.study.best_params.values())):
+            study.optimize(objective, n_trials=10000, callbacks=[callback])
+        for k, var in enumerate(list(study.best_params.values())):
             if var != vars_[k][1]:
                 vars_[k][1] = var
-                self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], f'self.vars[{k}]의 최적값 변경 [{var}]'))
+                self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], f'[{i+1}]구간 self.vars[{k}]의 최적값 변경 [{var}]'))
+
+        return vars_, study.best_value
+
+    def OptunaSearch(self, study, suggest, callback, batch, rates, startday, endday):
+        """
+        샘플러에 batch 개의 trial 을 한번에 요청(ask)하고 중복을 제외한 변수조합을 (표본비율, 변수조합 목록)으로 yield 한다.
+        호출한 쪽은 GA최적화와 같은 vturn * 20 + vkey 레인으로 연산한 후 같은 순서의 기준값 목록을 send 하며,
+        이미 연산한 변수조합과 평가캐시에 저장된 변수조합은 저장된 기준값을 바로 전달(tell)한다.
+        """
+        stop  = False
+        count = 0
+        dict_simple_vars = {}
+        while not stop and count < 10000:
+            vars_lists = []
+            dict_trial = {}
+            for _ in range(batch):
+                trial = study.ask()
+                simple_vars = suggest(trial)
+                str_simple_vars = str(simple_vars)
+                if str_simple_vars not in dict_simple_vars.keys():
+                    ostd = self.LoadCacheStd(simple_vars, startday, endday)
+                    if ostd is not None:
+                        dict_simple_vars[str_simple_vars] = ostd
+                if str_simple_vars in dict_simple_vars.keys():
+                    study.tell(trial, dict_simple_vars[str_simple_vars])
+                    stop = callback.Check(study, trial.number) or stop
+                else:
+                    if str_simple_vars not in dict_trial.keys():
+                        dict_trial[str_simple_vars] = []
+                        vars_lists.append(simple_vars)
+                    dict_trial[str_simple_vars].append(trial)
+                count += 1
+
+            for rate in rates if vars_lists else []:
+                std_list = yield rate, vars_lists
+                if rate < 1:
+                    for simple_vars, ostd in zip(vars_lists, std_list):
+                        for trial in dict_trial[str(simple_vars)]:
+                            trial.report(ostd, round(rate / rates[0]))
+                    next_lists = []
+                    for simple_vars in vars_lists:
+                        trial_list = dict_trial[str(simple_vars)]
+                        if trial_list[0].should_prune():
+                            for trial in trial_list:
+                                study.tell(trial, state=optuna.trial.TrialState.PRUNED)
+                                stop = callback.Check(study, trial.number) or stop
+                        else:
+                            next_lists.append(simple_vars)
+                    vars_lists = next_lists
+                    if not vars_lists:
+                        break
+                else:
+                    for simple_vars, ostd in zip(vars_lists, std_list):
+                        str_simple_vars = str(simple_vars)
+                        dict_simple_vars[str_simple_vars] = ostd
+                        for trial in dict_trial[str_simple_vars]:
+                            study.tell(trial, ostd)
+                            stop = callback.Check(study, trial.number) or stop
+
+    def RunSearch(self, mq, search, data):
+        """
+        탐색 제너레이터가 yield 한 변수조합을 opti_turn 3 레인으로 연산하고 기준값 목록을 전달한다.
+        레인은 self.vars[0] 이 커지는 순서로 정렬하여 전송하고(OptimizeFolds 와 같은 이유), 기준값은 yield 한 순서로 되돌려 전달한다.
+        반환값: 제너레이터의 반환값
+        """
+        try:
+            rate, vars_lists = next(search)
+            while True:
+                if rate != self.sample_rate:
+                    self.PutSample(rate)
+                order = sorted(range(len(vars_lists)), key=lambda x: vars_lists[x][0])
+                self.PutData(data[:1] + ([vars_lists[x] for x in order],) + data[2:])
+                std_list = [0] * len(vars_lists)
+                for x, std in zip(order, self.GetStdList(mq, len(vars_lists))):
+                    std_list[x] = std
+                rate, vars_lists = search.send(std_list)
+        except StopIteration as e:
+            return e.value
+
+    def GridSearch(self, ccount, vars_type, vars_, startday, endday, i):
+        """
+        구간 병렬 모드에서 사용하는 한 구간의 그리드 최적화 제너레이터.
+        OptimizeGrid 와 같은 규칙으로 단계마다 변수별 최적값을 갱신하되, 변수값을 하나씩 바꾼 변수조합 전체를 yield 한다.
+        반환값: (최적값이 반영된 vars_, 최고 기준값)
+        """
+        std_list = yield from self.GetFoldStd([[var[1] for var in vars_]], startday, endday)
+        hstd = std_list[0]
+
+        total_change = None
+        for k in range(ccount if ccount != 0 else 100):
+            if ccount == 0 and total_change == 0: break
+            self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], f'{self.backname} 인샘플 [{i+1}]구간 [{k+1}]단계 그리드 최적화 시작, 최고 기준값[{hstd:,.2f}], 최적값 변경 개수 [{total_change}]'))
+
+            base_vars  = [var[1] for var in vars_]
+            turn_vars  = []
+            vars_lists = []
+            for vturn, var in enumerate(vars_):
+                if len(var[0]) > 1:
+                    for curr_var in var[0]:
+                        turn_vars.append((vturn, curr_var))
+                        vars_lists.append(base_vars[:vturn] + [curr_var] + base_vars[vturn + 1:])
+            std_list = yield from self.GetFoldStd(vars_lists, startday, endday)
+
+            dict_turn_hvar = {j: var[1] for j, var in enumerate(vars_)}
+            dict_turn_hstd = {j: hstd for j, x in enumerate(vars_) if len(x[0]) > 1}
+            total_change   = 0
+            for (vturn, curr_var), std in zip(turn_vars, std_list):
+                curr_typ = vars_type[vturn]
+                preh_var = vars_[vturn][1]
+                if std > dict_turn_hstd[vturn] or \
+                        (std == dict_turn_hstd[vturn] and
+                         ((curr_typ and curr_var > preh_var) or (not curr_typ and curr_var < preh_var))):
+                    dict_turn_hstd[vturn] = std
+                    dict_turn_hvar[vturn] = curr_var
+                    if std > hstd: hstd = std
+
+            list_turn_hvar = sorted(dict_turn_hvar.items(), key=operator.itemgetter(0))
+            for vturn, high_var in list_turn_hvar:
+                if high_var != vars_[vturn][1]:
+                    total_change += 1
+                    vars_[vturn][1] = high_var
+                    self.wq.put((ui_num[f'{self.ui_gubun}백테스트'], f'[{i+1}]구간 self.vars[{vturn}]의 최적값 변경 [{high_var}]'))
 
-        return vars_, self.study.best_value
+        return vars_, hstd
 
-    def PutData(self, data):
-        self.tq.put(data[:3])
+    def GetFoldStd(self, vars_lists, startday, endday, rate=1):
+        """
+        변수조합 목록 중 평가캐시에 없는 조합만 중복없이 yield 하고, 전달받은 기준값과 캐시값을 합쳐 변수조합 순서로 반환한다.
+        """
+        dict_std   = {}
+        send_lists = []
+        for simple_vars in vars_lists:
+            str_simple_vars = str(simple_vars)
+            if str_simple_vars not in dict_std.keys():
+                dict_std[str_simple_vars] = self.LoadCacheStd(simple_vars, startday, endday) if rate == 1 else None
+                if dict_std[str_simple_vars] is None:
+                    send_lists.append(simple_vars)
+        if send_lists:
+            std_list = yield rate, send_lists
+            for simple_vars, std in zip(send_lists, std_list):
+                dict_std[str(simple_vars)] = std
+        return [dict_std[str(x)] for x in vars_lists]
+
+    def OptimizeFolds(self, mq, list_days, searches, parallel):
+        """
+        구간 병렬 최적화. 구간별 탐색 제너레이터를 최대 parallel 개까지 동시에 진행하며, 같은 표본비율을 요청한 구간들의 변수조합을
+        레인마다 학습기간을 지정한 opti_turn 3 한번으로 연산한다. 엔진은 같은 기간의 레인끼리 묶어 연이어 연산하므로
+        구간마다 모든 엔진의 연산이 끝나기를 기다리지 않는다. 집계는 하나의 Total 이 레인별 구간으로 처리한다.
+        반환값: 구간 순서의 (vars_, 최고 기준값) 리스트
+        """
+        results  = [self.dict_fold.get(i) for i in range(len(searches))]
+        waiting  = [i for i in range(len(searches)) if i not in self.dict_fold.keys()]
+        dict_req = {}
+        while waiting or dict_req:
+            while waiting and len(dict_req) < parallel:
+                self.SendSearch(searches, waiting.pop(0), None, dict_req, results)
+            if not dict_req:
+                continue
+
+            rate  = dict_req[min(dict_req.keys())][0]
+            folds = [i for i in sorted(dict_req.keys()) if dict_req[i][0] == rate]
+            # 레인 순서대로 self.vars[0] 이 커지도록 정렬한다.
+            # opti_turn 3 은 vturn 내에서 앞 레인의 평균값틱수를 채우지 못하면 뒤 레인을 건너뛰므로 정렬해야 레인별로 연산한 결과와 같다.
+            lanes = [(i, j) for i in folds for j in range(len(dict_req[i][1]))]
+            lanes.sort(key=lambda x: dict_req[x[0]][1][x[1]][0])
+            vars_lists = [dict_req[i][1][j] for i, j in lanes]
+            lane_days  = [(list_days[i][0][0], list_days[i][0][1]) for i, _ in lanes]
+            lane_folds = [i for i, _ in lanes]
+
+            if rate != self.sample_rate:
+                self.PutSample(rate)
+            self.PutData(('변수정보', vars_lists, 3, min(x[0] for x in lane_days), max(x[1] for x in lane_days), lane_folds), lane_days)
+            std_list = self.GetStdList(mq, len(vars_lists))
+
+            dict_std = {i: [0] * len(dict_req[i][1]) for i in folds}
+            for (i, j), std in zip(lanes, std_list):
+                dict_std[i][j] = std
+            for i in folds:
+                self.SendSearch(searches, i, dict_std[i], dict_req, results)
+
+        if self.sample_rate != 1:
+            self.PutSample(1)
+        return results
+
+    def SendSearch(self, searches, i, std_list, dict_req, results):
+        try:
+            dict_req[i] = searches[i].send(std_list)
+        except StopIteration as e:
+            if i in dict_req.keys():
+                del dict_req[i]
+            results[i] = e.value
+            self.SaveFold(i, *e.value)
+
+    def SaveFold(self, i, vars_, hstd):
+        """
+        최적화가 끝난 구간의 변수와 최고 기준값을 체크포인트에 저장한다. 같은 작업을 다시 시작하면 저장된 구간은 연산하지 않는다.
+        """
+        self.dict_fold[i] = ([[var[0], var[1]] for var in vars_], hstd)
+        self.checkpoint.Save(self.dict_fold, True)
+
+    def PutSample(self, rate):
+        """
+        다단계 평가의 종목 표본비율을 엔진과 집계 프로세스에 전달한다.
+        """
+        self.sample_rate = rate
+        self.tq.put(('표본정보', rate))
+        for q in self.beq_list:
+            q.put(('표본정보', rate))
+
+    def LoadCacheStd(self, simple_vars, startday, endday):
+        """
+        변수조합의 기준값이 평가캐시에 저장되어 있으면 반환한다. 저장되어 있지 않으면 None 을 반환한다.
+        """
+        if self.cache is None:
+            return None
+        return self.cache.Get(startday, endday, simple_vars)
+
+    def GetStdList(self, mq, count):
+        """
+        opti_turn 3 으로 전송한 count 개 변수조합의 기준값을 레인 순서의 리스트로 받는다.
+        """
+        std_list = [0] * count
+        for _ in range(count):
+            data = mq.get()
+            if type(data) == str:
+                self.SysExit(True)
+            else:
+                vturn, vkey, std = data
+                std_list[vturn * 20 + vkey] = std
+        return std_list
+
+    def PutData(self, data, lane_days=None):
+        """
+        lane_days 는 구간 병렬 연산의 레인별 (시작일자, 종료일자) 목록이며, 이때 data 의 마지막 값은 레인별 구간번호 목록이다.
+        """
+        self.tq.put(data[:3] if lane_days is None else data[:3] + (lane_days,))
         for q in self.bstq_list:
             q.put(('백테시작', data[2], data[-1]))
         for q in self.beq_list:
-            q.put(data[:5])
+            q.put(data[:5] if lane_days is None else data[:5] + (lane_days,))
 
     def SysExit(self, cancel):
         if cancel:
@@ -9,6 +9,9 @@ from utility.setting import DB_STRATEGY, DICT_SET, ui_num, columns_jgf, columns_
 # noinspection PyUnresolvedReferences
 from utility.static import now, now_utc, strp_time, int_hms_utc, timedelta_sec, GetBinanceShortPgSgSp, \
     GetBinanceLongPgSgSp, get_buy_indi_stg
+from utility.sliding_window import SlidingWindows
+from utility.tick_buffer import TickBuffers
+from utility.watch_table import WatchTable
 
 
 # noinspection PyUnusedLocal
@@ -26,9 +29,14 @@ class BinanceStrategyTick:
         self.buystrategy      = None
         self.sellstrategy     = None
         self.chart_code       = None
+        self.chart_total      = None
+        self.chart_time       = now()
+        self.chart_pending    = None
 
         self.vars             = {}
         self.dict_arry        = {}
+        self.windows          = SlidingWindows()
+        self.buffers          = TickBuffers()
         self.dict_signal_num  = {}
         self.dict_buy_num     = {}
         self.dict_condition   = {}
@@ -37,17 +45,24 @@ class BinanceStrategyTick:
         self.shogainfo        = {}
         self.dict_hilo        = {}
         self.indicator        = indicator
+        self.indi_window      = None
         self.dict_info        = {}
         self.dict_signal      = {'BUY_LONG': [], 'SELL_SHORT': [], 'SELL_LONG': [], 'BUY_SHORT': []}
 
+        self.code             = None
+        self.datalen          = 0
+        self.dict_func        = {}
+        self.stg_globals      = {}
         self.indexn           = 0
         self.indexb           = 0
         self.jgrv_count       = 0
         self.int_tujagm       = 0
-        self.df_gj            = pd.DataFrame(columns=columns_gj)
+        self.gj_table         = WatchTable(columns_gj)
+        self.dict_jg          = {}
         self.df_jg            = pd.DataFrame(columns=columns_jgf)
 
         self.UpdateStringategy()
+        self.SetStrategyFunc()
         self.MainLoop()
 
     def UpdateStringategy(self):
@@ -119,8 +134,7 @@ class BinanceStrategyTick:
     def UpdateTuple(self, data):
         gubun, data = data
         if gubun == '관심목록':
-            drop_index_list = list(set(list(self.df_gj.index)) - set(data))
-            if drop_index_list: self.df_gj.drop(index=drop_index_list, inplace=True)
+            self.gj_table.Keep(data)
         elif '_COMPLETE' in gubun:
             gubun = gubun.replace('_COMPLETE', '')
             if data in self.dict_signal[gubun]:
@@ -139,11 +153,16 @@ class BinanceStrategyTick:
             if data not in self.dict_signal[gubun]:
                 self.dict_signal[gubun].append(data)
         elif gubun == '잔고목록':
-            self.df_jg = data
+            self.df_jg   = data
+            self.dict_jg = data.to_dict('index')
+            for jg in self.dict_jg.values():
+                jg['매수시간'] = strp_time('%Y%m%d%H%M%S', jg['매수시간'])
             self.jgrv_count += 1
             if self.jgrv_count == 2:
                 self.jgrv_count = 0
                 self.PutGsjmAndDeleteHilo()
+            if self.chart_pending is not None:
+                self.PutChartPending()
         elif gubun == '매수전략':
             self.SetBuyStg(data)
         elif gubun == '매도전략':
@@ -151,7 +170,9 @@ class BinanceStrategyTick:
         elif gubun == '종목당투자금':
             self.int_tujagm = data
         elif gubun == '차트종목코드':
-            self.chart_code = data
+            self.chart_code    = data
+            self.chart_total   = None
+            self.chart_pending = None
         elif gubun == '설정변경':
             self.dict_set = data
             self.UpdateStringategy()
@@ -166,16 +187,14 @@ class BinanceStrategyTick:
         elif data == '매도전략중지':
             self.sellstrategy = None
 
-    def Strategy(self, data):
-        체결시간, 현재가, 시가, 고가, 저가, 등락율, 당일거래대금, 체결강도, 초당매수수량, 초당매도수량, 초당거래대금, 고저평균대비등락율, 매도총잔량, 매수총잔량, \
-            매도호가5, 매도호가4, 매도호가3, 매도호가2, 매도호가1, 매수호가1, 매수호가2, 매수호가3, 매수호가4, 매수호가5, \
-            매도잔량5, 매도잔량4, 매도잔량3, 매도잔량2, 매도잔량1, 매수잔량1, 매수잔량2, 매수잔량3, 매수잔량4, 매수잔량5, \
-            매도수5호가잔량합, 관심종목, 종목코드, 틱수신시간 = data
-
+    def SetStrategyFunc(self):
+        """
+        전략에서 사용하는 함수를 프로세스마다 한번만 만든다. 틱마다 바뀌는 종목코드와 데이터길이는 self.code, self.datalen 에서 읽는다.
+        """
         def Parameter_Previous(aindex, pre):
-            if pre < 데이터길이:
+            if pre < self.datalen:
                 pindex = (self.indexn - pre) if pre != -1 else self.indexb
-                return self.dict_arry[종목코드][pindex, aindex]
+                return self.dict_arry[self.code][pindex, aindex]
             return 0
 
         def 현재가N(pre):
@@ -293,27 +312,31 @@ class BinanceStrategyTick:
             elif tick == 1200:
                 return Parameter_Previous(39, pre)
             else:
-                if tick + pre <= 데이터길이:
+                if tick + pre <= self.datalen:
+                    if pre == 0:
+                        return round(self.windows.Get(self.code, self.dict_arry[self.code], 1, tick, 'mean'), 8)
                     sindex = (self.indexn + 1 - pre - tick) if pre != -1  else self.indexb + 1 - tick
                     eindex = (self.indexn + 1 - pre) if pre != -1  else self.indexb + 1
-                    return round(self.dict_arry[종목코드][sindex:eindex, 1].mean(), 8)
+                    return round(self.dict_arry[self.code][sindex:eindex, 1].mean(), 8)
                 return 0
 
         def Parameter_Area(aindex, vindex, tick, pre, gubun_):
-            if tick == 평균값계산틱수:
+            if tick == self.dict_set['코인평균값계산틱수']:
                 return Parameter_Previous(aindex, pre)
             else:
-                if tick + pre <= 데이터길이:
+                if tick + pre <= self.datalen:
+                    if pre == 0:
+                        return self.windows.Get(self.code, self.dict_arry[self.code], vindex, tick, gubun_)
                     sindex = (self.indexn + 1 - pre - tick) if pre != -1  else self.indexb + 1 - tick
                     eindex = (self.indexn + 1 - pre) if pre != -1  else self.indexb + 1
                     if gubun_ == 'max':
-                        return self.dict_arry[종목코드][sindex:eindex, vindex].max()
+                        return self.dict_arry[self.code][sindex:eindex, vindex].max()
                     elif gubun_ == 'min':
-                        return self.dict_arry[종목코드][sindex:eindex, vindex].min()
+                        return self.dict_arry[self.code][sindex:eindex, vindex].min()
                     elif gubun_ == 'sum':
-                        return self.dict_arry[종목코드][sindex:eindex, vindex].sum()
+                        return self.dict_arry[self.code][sindex:eindex, vindex].sum()
                     else:
-                        return self.dict_arry[종목코드][sindex:eindex, vindex].mean()
+                        return self.dict_arry[self.code][sindex:eindex, vindex].mean()
                 return 0
 
         def 최고현재가(tick, pre=0):
@@ -347,13 +370,13 @@ class BinanceStrategyTick:
             return int(Parameter_Area(49, 10, tick, pre, 'mean'))
 
         def Parameter_Dgree(aindex, vindex, tick, pre, cf):
-            if tick == 평균값계산틱수:
+            if tick == self.dict_set['코인평균값계산틱수']:
                 return Parameter_Previous(aindex, pre)
             else:
-                if tick + pre <= 데이터길이:
+                if tick + pre <= self.datalen:
                     sindex = (self.indexn - pre - tick + 1) if pre != -1  else self.indexb - tick + 1
                     eindex = (self.indexn - pre) if pre != -1  else self.indexb
-                    dmp_gap = self.dict_arry[종목코드][eindex, vindex] - self.dict_arry[종목코드][sindex, vindex]
+                    dmp_gap = self.dict_arry[self.code][eindex, vindex] - self.dict_arry[self.code][sindex, vindex]
                     return round(math.atan2(dmp_gap * cf, tick) / (2 * math.pi) * 360, 2)
                 return 0
 
@@ -364,13 +387,24 @@ class BinanceStrategyTick:
             return Parameter_Dgree(51, 6, tick, pre, 0.00000001)
 
         def 경과틱수(조건명):
-            if 종목코드 in self.dict_cond_indexn.keys() and \
-                    조건명 in self.dict_cond_indexn[종목코드].keys() and self.dict_cond_indexn[종목코드][조건명] != 0:
-                return self.indexn - self.dict_cond_indexn[종목코드][조건명]
+            if self.code in self.dict_cond_indexn.keys() and \
+                    조건명 in self.dict_cond_indexn[self.code].keys() and self.dict_cond_indexn[self.code][조건명] != 0:
+                return self.indexn - self.dict_cond_indexn[self.code][조건명]
             return 0
 
+        self.dict_func   = {k: v for k, v in locals().items() if k != 'self'}
+        self.stg_globals = dict(globals(), **self.dict_func)
+
+    def Strategy(self, data):
+        체결시간, 현재가, 시가, 고가, 저가, 등락율, 당일거래대금, 체결강도, 초당매수수량, 초당매도수량, 초당거래대금, 고저평균대비등락율, 매도총잔량, 매수총잔량, \
+            매도호가5, 매도호가4, 매도호가3, 매도호가2, 매도호가1, 매수호가1, 매수호가2, 매수호가3, 매수호가4, 매수호가5, \
+            매도잔량5, 매도잔량4, 매도잔량3, 매도잔량2, 매도잔량1, 매수잔량1, 매수잔량2, 매수잔량3, 매수잔량4, 매수잔량5, \
+            매도수5호가잔량합, 관심종목, 종목코드, 틱수신시간 = data
+        self.code = 종목코드
+
         시분초, 호가단위 = int(str(체결시간)[8:]), self.dict_info[종목코드]['호가단위']
         데이터길이 = len(self.dict_arry[종목코드]) + 1 if 종목코드 in self.dict_arry.keys() else 1
+        self.datalen = 데이터길이
         평균값계산틱수 = self.dict_set['코인평균값계산틱수']
         이동평균0060, 이동평균0300, 이동평균0600, 이동평균1200, 최고현재가_, 최저현재가_ = 0., 0., 0., 0., 0, 0
         체결강도평균_, 최고체결강도_, 최저체결강도_, 최고초당매수수량_, 최고초당매도수량_ = 0., 0., 0., 0, 0
@@ -382,21 +416,21 @@ class BinanceStrategyTick:
         self.shogainfo = shogainfo[:self.dict_set['코인매도시장가잔량범위']]
 
         if 종목코드 in self.dict_arry.keys():
-            if len(self.dict_arry[종목코드]) >=   59: 이동평균0060 = round((self.dict_arry[종목코드][  -59:, 1].sum() + 현재가) /   60, 8)
-            if len(self.dict_arry[종목코드]) >=  299: 이동평균0300 = round((self.dict_arry[종목코드][ -299:, 1].sum() + 현재가) /  300, 8)
-            if len(self.dict_arry[종목코드]) >=  599: 이동평균0600 = round((self.dict_arry[종목코드][ -599:, 1].sum() + 현재가) /  600, 8)
-            if len(self.dict_arry[종목코드]) >= 1199: 이동평균1200 = round((self.dict_arry[종목코드][-1199:, 1].sum() + 현재가) / 1200, 8)
+            if len(self.dict_arry[종목코드]) >=   59: 이동평균0060 = round((self.windows.Get(종목코드, self.dict_arry[종목코드], 1, 59, 'sum') + 현재가) /   60, 8)
+            if len(self.dict_arry[종목코드]) >=  299: 이동평균0300 = round((self.windows.Get(종목코드, self.dict_arry[종목코드], 1, 299, 'sum') + 현재가) /  300, 8)
+            if len(self.dict_arry[종목코드]) >=  599: 이동평균0600 = round((self.windows.Get(종목코드, self.dict_arry[종목코드], 1, 599, 'sum') + 현재가) /  600, 8)
+            if len(self.dict_arry[종목코드]) >= 1199: 이동평균1200 = round((self.windows.Get(종목코드, self.dict_arry[종목코드], 1, 1199, 'sum') + 현재가) / 1200, 8)
             if len(self.dict_arry[종목코드]) >= 평균값계산틱수 - 1:
-                최고현재가_      = max(self.dict_arry[종목코드][-(평균값계산틱수 - 1):, 1].max(), 현재가)
-                최저현재가_      = min(self.dict_arry[종목코드][-(평균값계산틱수 - 1):, 1].min(), 현재가)
-                체결강도평균_    = round((self.dict_arry[종목코드][-(평균값계산틱수 - 1):, 7].sum() + 체결강도) / 평균값계산틱수, 3)
-                최고체결강도_    = max(self.dict_arry[종목코드][-(평균값계산틱수 - 1):, 7].max(), 체결강도)
-                최저체결강도_    = min(self.dict_arry[종목코드][-(평균값계산틱수 - 1):, 7].min(), 체결강도)
-                최고초당매수수량_ = max(self.dict_arry[종목코드][-(평균값계산틱수 - 1):, 8].max(), 초당매수수량)
-                최고초당매도수량_ = max(self.dict_arry[종목코드][-(평균값계산틱수 - 1):, 9].max(), 초당매도수량)
-                누적초당매수수량_ =     self.dict_arry[종목코드][-(평균값계산틱수 - 1):, 8].sum() + 초당매수수량
-                누적초당매도수량_ =     self.dict_arry[종목코드][-(평균값계산틱수 - 1):, 9].sum() + 초당매도수량
-                초당거래대금평균_ = int((self.dict_arry[종목코드][-(평균값계산틱수 - 1):, 10].sum() + 초당거래대금) / 평균값계산틱수)
+                최고현재가_      = max(self.windows.Get(종목코드, self.dict_arry[종목코드], 1, 평균값계산틱수 - 1, 'max'), 현재가)
+                최저현재가_      = min(self.windows.Get(종목코드, self.dict_arry[종목코드], 1, 평균값계산틱수 - 1, 'min'), 현재가)
+                체결강도평균_    = round((self.windows.Get(종목코드, self.dict_arry[종목코드], 7, 평균값계산틱수 - 1, 'sum') + 체결강도) / 평균값계산틱수, 3)
+                최고체결강도_    = max(self.windows.Get(종목코드, self.dict_arry[종목코드], 7, 평균값계산틱수 - 1, 'max'), 체결강도)
+                최저체결강도_    = min(self.windows.Get(종목코드, self.dict_arry[종목코드], 7, 평균값계산틱수 - 1, 'min'), 체결강도)
+                최고초당매수수량_ = max(self.windows.Get(종목코드, self.dict_arry[종목코드], 8, 평균값계산틱수 - 1, 'max'), 초당매수수량)
+                최고초당매도수량_ = max(self.windows.Get(종목코드, self.dict_arry[종목코드], 9, 평균값계산틱수 - 1, 'max'), 초당매도수량)
+                누적초당매수수량_ =     self.windows.Get(종목코드, self.dict_arry[종목코드], 8, 평균값계산틱수 - 1, 'sum') + 초당매수수량
+                누적초당매도수량_ =     self.windows.Get(종목코드, self.dict_arry[종목코드], 9, 평균값계산틱수 - 1, 'sum') + 초당매도수량
+                초당거래대금평균_ = int((self.windows.Get(종목코드, self.dict_arry[종목코드], 10, 평균값계산틱수 - 1, 'sum') + 초당거래대금) / 평균값계산틱수)
                 등락율각도_      = round(math.atan2((등락율 - self.dict_arry[종목코드][-(평균값계산틱수 - 1), 5]) * 10, 평균값계산틱수) / (2 * math.pi) * 360, 2)
                 당일거래대금각도_ = round(math.atan2((당일거래대금 - self.dict_arry[종목코드][-(평균값계산틱수 - 1), 6]) / 100_000_000, 평균값계산틱수) / (2 * math.pi) * 360, 2)
 
@@ -422,12 +456,11 @@ class BinanceStrategyTick:
             누적초당매도수량_, 초당거래대금평균_, 등락율각도_, 당일거래대금각도_
         ]
 
-        if 종목코드 not in self.dict_arry.keys():
-            self.dict_arry[종목코드] = np.array([new_data_tick])
-        else:
-            self.dict_arry[종목코드] = np.r_[self.dict_arry[종목코드], np.array([new_data_tick])]
+        self.dict_arry[종목코드] = self.buffers.Append(종목코드, new_data_tick)
+        self.windows.Update(종목코드, new_data_tick)
 
         데이터길이 = len(self.dict_arry[종목코드])
+        self.datalen = 데이터길이
         self.indexn = 데이터길이 - 1
 
         if self.dict_condition:
@@ -435,28 +468,28 @@ class BinanceStrategyTick:
                 self.dict_cond_indexn[종목코드] = {}
             for k, v in self.dict_condition.items():
                 try:
-                    exec(v)
+                    exec(v, self.stg_globals, locals())
                 except:
                     print_exc()
                     self.windowQ.put((ui_num['C단순텍스트'], '시스템 명령 오류 알림 - 경과틱수 연산오류'))
 
         if 체결강도평균_ != 0 and 체결시간 < self.dict_set['코인전략종료시간']:
-            if 종목코드 in self.df_jg.index:
+            if 종목코드 in self.dict_jg.keys():
                 if 종목코드 not in self.dict_buy_num.keys():
                     self.dict_buy_num[종목코드] = len(self.dict_arry[종목코드]) - 1
                 매수틱번호 = self.dict_buy_num[종목코드]
-                포지션 = self.df_jg['포지션'][종목코드]
-                매입가 = self.df_jg['매입가'][종목코드]
-                보유수량 = self.df_jg['보유수량'][종목코드]
-                매입금액 = self.df_jg['매입금액'][종목코드]
-                레버리지 = self.df_jg['레버리지'][종목코드]
-                분할매수횟수 = int(self.df_jg['분할매수횟수'][종목코드])
-                분할매도횟수 = int(self.df_jg['분할매도횟수'][종목코드])
+                포지션 = self.dict_jg[종목코드]['포지션']
+                매입가 = self.dict_jg[종목코드]['매입가']
+                보유수량 = self.dict_jg[종목코드]['보유수량']
+                매입금액 = self.dict_jg[종목코드]['매입금액']
+                레버리지 = self.dict_jg[종목코드]['레버리지']
+                분할매수횟수 = int(self.dict_jg[종목코드]['분할매수횟수'])
+                분할매도횟수 = int(self.dict_jg[종목코드]['분할매도횟수'])
                 if 포지션 == 'LONG':
                     _, 수익금, 수익률 = GetBinanceLongPgSgSp(매입금액, 보유수량 * 현재가, '시장가' in self.dict_set['코인매수주문구분'], '시장가' in self.dict_set['코인매도주문구분'])
                 else:
                     _, 수익금, 수익률 = GetBinanceShortPgSgSp(매입금액, 보유수량 * 현재가, '시장가' in self.dict_set['코인매수주문구분'], '시장가' in self.dict_set['코인매도주문구분'])
-                매수시간 = strp_time('%Y%m%d%H%M%S', self.df_jg['매수시간'][종목코드])
+                매수시간 = self.dict_jg[종목코드]['매수시간']
                 보유시간 = (now_utc() - 매수시간).total_seconds()
                 if 종목코드 not in self.dict_hilo.keys():
                     self.dict_hilo[종목코드] = [수익률, 수익률]
@@ -488,19 +521,19 @@ class BinanceStrategyTick:
             if BBT and BLK and C20 and (A or B or (C and D) or (C and E) or D or E or F or G):
                 매수수량 = 0
                 if not (F or G):
-                    매수수량 = self.SetBuyCount(분할매수횟수, 매입가, 현재가, 고가, 저가, 등락율각도(30), 당일거래대금각도(30), self.dict_info[종목코드]['소숫점자리수'])
+                    매수수량 = self.SetBuyCount(분할매수횟수, 매입가, 현재가, 고가, 저가, self.dict_func['등락율각도'](30), self.dict_func['당일거래대금각도'](30), self.dict_info[종목코드]['소숫점자리수'])
 
                 if A or B or (C and (D or E)) or F or G:
                     BUY_LONG, SELL_SHORT = True, True
                     if self.buystrategy is not None:
                         try:
-                            exec(self.buystrategy)
+                            exec(self.buystrategy, self.stg_globals, locals())
                         except:
                             print_exc()
                             self.windowQ.put((ui_num['C단순텍스트'], '시스템 명령 오류 알림 - BuyStrategy'))
                 elif D or E:
                     BUY_LONG, SELL_SHORT = False, False
-                    분할매수기준수익률 = round((현재가 / 현재가N(-1) - 1) * 100, 2) if self.dict_set['코인매수분할고정수익률'] else 수익률
+                    분할매수기준수익률 = round((현재가 / self.dict_func['현재가N'](-1) - 1) * 100, 2) if self.dict_set['코인매수분할고정수익률'] else 수익률
                     if D:
                         if self.dict_set['코인매수분할하방'] and 분할매수기준수익률 < -self.dict_set['코인매수분할하방수익률']:
                             BUY_LONG   = True
@@ -542,12 +575,12 @@ class BinanceStrategyTick:
                 if A or B or H or J or K or L or M or N:
                     매도수량 = 보유수량
                 elif not (F or G):
-                    매도수량 = self.SetSellCount(분할매도횟수, 보유수량, 매입가, 현재가, 고가, 저가, 등락율각도(30), 당일거래대금각도(30), self.dict_info[종목코드]['소숫점자리수'])
+                    매도수량 = self.SetSellCount(분할매도횟수, 보유수량, 매입가, 현재가, 고가, 저가, self.dict_func['등락율각도'](30), self.dict_func['당일거래대금각도'](30), self.dict_info[종목코드]['소숫점자리수'])
 
                 if A or B or (C and (D or E)) or F or G:
                     if self.sellstrategy is not None:
                         try:
-                            exec(self.sellstrategy)
+                            exec(self.sellstrategy, self.stg_globals, locals())
                         except:
                             print_exc()
                             self.windowQ.put((ui_num['C단순텍스트'], '시스템 명령 오류 알림 - SellStrategy'))
@@ -571,10 +604,10 @@ class BinanceStrategyTick:
                         self.Sell(종목코드, SELL_LONG, 현재가, 매도호가1, 매수호가1, 매도수량, 강제청산)
 
         if 관심종목:
-            self.df_gj.loc[종목코드] = 종목코드, 등락율, 고저평균대비등락율, 초당거래대금, 초당거래대금평균_, 당일거래대금, 체결강도, 체결강도평균_, 최고체결강도_
+            self.gj_table.Update(종목코드, (종목코드, 등락율, 고저평균대비등락율, 초당거래대금, 초당거래대금평균_, 당일거래대금, 체결강도, 체결강도평균_, 최고체결강도_))
 
         if len(self.dict_arry[종목코드]) >= 평균값계산틱수 and self.chart_code == 종목코드:
-            self.windowQ.put((ui_num['실시간차트'], 종목코드, self.dict_arry[종목코드]))
+            self.PutRealChart(종목코드)
 
         if 틱수신시간 != 0:
             gap = (now() - 틱수신시간).total_seconds()
@@ -690,9 +723,41 @@ class BinanceStrategyTick:
                 self.dict_signal[구분].append(종목코드)
                 self.ctraderQ.put((구분, 종목코드, 예상체결가, 매도수량, now(), True if 강제청산 else False))
 
+    def PutRealChart(self, 종목코드):
+        """
+        실시간차트는 차트종목이 바뀌면 전체 배열을 한번 보내고, 이후에는 차트갱신간격마다 그동안 추가된 행만 모아서 보낸다.
+        추가된 행 앞에 직전에 보낸 마지막 행을 붙여서 보내므로, 분봉처럼 마지막 행을 갱신하는 경우도 반영된다.
+        갱신간격 안에 추가된 행은 chart_pending 에 표시해두고 PutChartPending 에서 보낸다.
+        """
+        if self.chart_total is not None and now() < self.chart_time:
+            self.chart_pending = (종목코드,)
+            return
+        arry  = self.dict_arry[종목코드]
+        total = self.buffers.Total(종목코드)
+        new   = total - self.chart_total if self.chart_total is not None else -1
+        if new < 0 or new + 1 >= len(arry):
+            self.windowQ.put((ui_num['실시간차트'], 종목코드, arry))
+        else:
+            self.windowQ.put((ui_num['실시간차트'], 종목코드, arry[-(new + 1):].copy(), len(arry)))
+        self.chart_total   = total
+        self.chart_time    = timedelta_sec(self.dict_set['차트갱신간격'])
+        self.chart_pending = None
+
+    def PutChartPending(self):
+        """
+        갱신간격 안에 추가되어 보내지 못한 실시간차트 행을 간격이 지나면 보낸다. 잔고목록은 0.5초마다 수신되므로 틱이 뜸한 종목도 늦게 반영되지 않는다.
+        """
+        if now() < self.chart_time:
+            return
+        if self.chart_pending[0] in self.dict_arry.keys():
+            self.PutRealChart(*self.chart_pending)
+        else:
+            self.chart_pending = None
+
     def PutGsjmAndDeleteHilo(self):
-        self.df_gj.sort_values(by=['d_money'], ascending=False, inplace=True)
-        self.windowQ.put((ui_num['C관심종목'], self.df_gj))
+        delta = self.gj_table.GetDelta()
+        if delta is not None:
+            self.windowQ.put((ui_num['C관심종목'],) + delta)
         for code in list(self.dict_hilo.keys()):
             if code not in self.df_jg.index:
                 del self.dict_hilo[code]
@@ -701,6 +766,8 @@ class BinanceStrategyTick:
         for code in list(self.dict_arry.keys()):
             if code not in codes:
                 del self.dict_arry[code]
+                self.windows.Delete(code)
+                self.buffers.Delete(code)
 
         if self.dict_set['코인타임프레임']:
             columns_ts = [
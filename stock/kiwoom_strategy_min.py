@@ -7,22 +7,19 @@ from traceback import print_exc
 from kiwoom_strategy_tick import KiwoomStrategyTick
 sys.path.append(os.path.dirname(os.path.abspath(os.path.dirname(__file__))))
 from utility.setting import ui_num
-from utility.static import now, strf_time, strp_time, GetUvilower5, GetKiwoomPgSgSp, GetHogaunit
+from utility.static import now, strf_time, strp_time, GetUvilower5, GetKiwoomPgSgSp, GetHogaunit, GetIndicatorWindow
 
 
 # noinspection PyUnusedLocal
 class KiwoomStrategyMin(KiwoomStrategyTick):
-    def Strategy(self, data):
-        체결시간, 현재가, 시가, 고가, 저가, 등락율, 당일거래대금, 체결강도, 거래대금증감, 전일비, 회전율, 전일동시간비, 시가총액, \
-            라운드피겨위5호가이내, 분당매수수량, 분당매도수량, VI해제시간, VI가격, VI호가단위, 분봉시가, 분봉고가, 분봉저가, 분당거래대금, \
-            고저평균대비등락율, 매도총잔량, 매수총잔량, 매도호가5, 매도호가4, 매도호가3, 매도호가2, 매도호가1, 매수호가1, 매수호가2, \
-            매수호가3, 매수호가4, 매수호가5, 매도잔량5, 매도잔량4, 매도잔량3, 매도잔량2, 매도잔량1, 매수잔량1, 매수잔량2, 매수잔량3, \
-            매수잔량4, 매수잔량5, 매도수5호가잔량합, 관심종목, 종목코드, 종목명, 틱수신시간, 전략연산 = data
-
+    def SetStrategyFunc(self):
+        """
+        전략에서 사용하는 함수를 프로세스마다 한번만 만든다. 틱마다 바뀌는 종목코드와 데이터길이는 self.code, self.datalen 에서 읽는다.
+        """
         def Parameter_Previous(aindex, pre):
-            if pre < 데이터길이:
+            if pre < self.datalen:
                 pindex = (self.indexn - pre) if pre != -1 else self.indexb
-                return self.dict_arry[종목코드][pindex, aindex]
+                return self.dict_arry[self.code][pindex, aindex]
             return 0
 
         def 현재가N(pre):
@@ -169,27 +166,27 @@ class KiwoomStrategyMin(KiwoomStrategyTick):
             elif tick == 120:
                 return Parameter_Previous(52, pre)
             else:
-                if tick + pre <= 데이터길이:
+                if tick + pre <= self.datalen:
                     sindex = (self.indexn + 1 - pre - tick) if pre != -1  else self.indexb + 1 - tick
                     eindex = (self.indexn + 1 - pre) if pre != -1  else self.indexb + 1
-                    return round(self.dict_arry[종목코드][sindex:eindex, 1].mean(), 3)
+                    return round(self.dict_arry[self.code][sindex:eindex, 1].mean(), 3)
                 return 0
 
         def Parameter_Area(aindex, vindex, tick, pre, gubun_):
-            if tick == 평균값계산틱수:
+            if tick == self.dict_set['주식평균값계산틱수']:
                 return Parameter_Previous(aindex, pre)
             else:
-                if tick + pre <= 데이터길이:
+                if tick + pre <= self.datalen:
                     sindex = (self.indexn + 1 - pre - tick) if pre != -1  else self.indexb + 1 - tick
                     eindex = (self.indexn + 1 - pre) if pre != -1  else self.indexb + 1
                     if gubun_ == 'max':
-                        return self.dict_arry[종목코드][sindex:eindex, vindex].max()
+                        return self.dict_arry[self.code][sindex:eindex, vindex].max()
                     elif gubun_ == 'min':
-                        return self.dict_arry[종목코드][sindex:eindex, vindex].min()
+                        return self.dict_arry[self.code][sindex:eindex, vindex].min()
                     elif gubun_ == 'sum':
-                        return self.dict_arry[종목코드][sindex:eindex, vindex].sum()
+                        return self.dict_arry[self.code][sindex:eindex, vindex].sum()
                     else:
-                        return self.dict_arry[종목코드][sindex:eindex, vindex].mean()
+                        return self.dict_arry[self.code][sindex:eindex, vindex].mean()
                 return 0
 
         def 최고현재가(tick, pre=0):
@@ -229,13 +226,13 @@ class KiwoomStrategyMin(KiwoomStrategyTick):
             return int(Parameter_Area(64, 22, tick, pre, 'mean'))
 
         def Parameter_Dgree(aindex, vindex, tick, pre, cf):
-            if tick == 평균값계산틱수:
+            if tick == self.dict_set['주식평균값계산틱수']:
                 return Parameter_Previous(aindex, pre)
             else:
-                if tick + pre <= 데이터길이:
+                if tick + pre <= self.datalen:
                     sindex = (self.indexn - pre - tick + 1) if pre != -1  else self.indexb - tick + 1
                     eindex = (self.indexn - pre) if pre != -1  else self.indexb
-                    dmp_gap = self.dict_arry[종목코드][eindex, vindex] - self.dict_arry[종목코드][sindex, vindex]
+                    dmp_gap = self.dict_arry[self.code][eindex, vindex] - self.dict_arry[self.code][sindex, vindex]
                     return round(math.atan2(dmp_gap * cf, tick) / (2 * math.pi) * 360, 2)
                 return 0
 
@@ -249,9 +246,9 @@ class KiwoomStrategyMin(KiwoomStrategyTick):
             return Parameter_Dgree(67, 9, tick, pre, 1)
 
         def 경과틱수(조건명):
-            if 종목코드 in self.dict_cond_indexn.keys() and \
-                    조건명 in self.dict_cond_indexn[종목코드].keys() and self.dict_cond_indexn[종목코드][조건명] != 0:
-                return self.indexn - self.dict_cond_indexn[종목코드][조건명]
+            if self.code in self.dict_cond_indexn.keys() and \
+                    조건명 in self.dict_cond_indexn[self.code].keys() and self.dict_cond_indexn[self.code][조건명] != 0:
+                return self.indexn - self.dict_cond_indexn[self.code][조건명]
             return 0
 
         def AD_N(pre):
@@ -338,6 +335,17 @@ class KiwoomStrategyMin(KiwoomStrategyTick):
         def WILLR_N(pre):
             return Parameter_Previous(95, pre)
 
+        self.dict_func   = {k: v for k, v in locals().items() if k != 'self'}
+        self.stg_globals = dict(globals(), **self.dict_func)
+
+    def Strategy(self, data):
+        체결시간, 현재가, 시가, 고가, 저가, 등락율, 당일거래대금, 체결강도, 거래대금증감, 전일비, 회전율, 전일동시간비, 시가총액, \
+            라운드피겨위5호가이내, 분당매수수량, 분당매도수량, VI해제시간, VI가격, VI호가단위, 분봉시가, 분봉고가, 분봉저가, 분당거래대금, \
+            고저평균대비등락율, 매도총잔량, 매수총잔량, 매도호가5, 매도호가4, 매도호가3, 매도호가2, 매도호가1, 매수호가1, 매수호가2, \
+            매수호가3, 매수호가4, 매수호가5, 매도잔량5, 매도잔량4, 매도잔량3, 매도잔량2, 매도잔량1, 매수잔량1, 매수잔량2, 매수잔량3, \
+            매수잔량4, 매수잔량5, 매도수5호가잔량합, 관심종목, 종목코드, 종목명, 틱수신시간, 전략연산 = data
+        self.code = 종목코드
+
         시분초 = int(str(체결시간)[8:] + '00')
         호가단위 = GetHogaunit(종목코드 in self.tuple_kosd, 현재가, 체결시간)
         VI아래5호가 = GetUvilower5(VI가격, VI호가단위, 체결시간)
@@ -401,10 +409,15 @@ class KiwoomStrategyMin(KiwoomStrategyTick):
             """
 
             k  = list(self.indicator.values())
-            mc = np.r_[self.dict_arry[종목코드][:,  1], np.array([현재가])]
-            mh = np.r_[self.dict_arry[종목코드][:, 20], np.array([분봉고가])]
-            ml = np.r_[self.dict_arry[종목코드][:, 21], np.array([분봉저가])]
-            mv = np.r_[self.dict_arry[종목코드][:, 22], np.array([분당거래대금])]
+            if self.indi_window is None or self.indi_window[0] != k:
+                self.indi_window = (k, GetIndicatorWindow(k))
+            arry = self.dict_arry[종목코드]
+            if self.indi_window[1] is not None:
+                arry = arry[max(len(arry) + 1 - self.indi_window[1], 0):]
+            mc = np.r_[arry[:,  1], np.array([현재가])]
+            mh = np.r_[arry[:, 20], np.array([분봉고가])]
+            ml = np.r_[arry[:, 21], np.array([분봉저가])]
+            mv = np.r_[arry[:, 22], np.array([분당거래대금])]
             try:    AD                     = stream.AD(      mh, ml, mc, mv)
             except: AD                     = 0
             if k[0] != 0:
@@ -476,15 +489,13 @@ class KiwoomStrategyMin(KiwoomStrategyTick):
             MOM, OBV, PPO, ROC, RSI, SAR, STOCHSK, STOCHSD, STOCHFK, STOCHFD, WILLR
         ]
 
-        if 종목코드 not in self.dict_arry.keys():
-            self.dict_arry[종목코드] = np.array([new_data_tick])
+        if 종목코드 not in self.dict_arry.keys() or 체결시간 != self.dict_arry[종목코드][-1, 0]:
+            self.dict_arry[종목코드] = self.buffers.Append(종목코드, new_data_tick)
         else:
-            if 체결시간 != self.dict_arry[종목코드][-1, 0]:
-                self.dict_arry[종목코드] = np.r_[self.dict_arry[종목코드], np.array([new_data_tick])]
-            else:
-                self.dict_arry[종목코드][-1, :] = np.array([new_data_tick])
+            self.dict_arry[종목코드][-1, :] = np.array([new_data_tick])
 
         데이터길이 = len(self.dict_arry[종목코드])
+        self.datalen = 데이터길이
         self.indexn = 데이터길이 - 1
 
         if self.dict_condition and 전략연산:
@@ -492,23 +503,23 @@ class KiwoomStrategyMin(KiwoomStrategyTick):
                 self.dict_cond_indexn[종목코드] = {}
             for k, v in self.dict_condition.items():
                 try:
-                    exec(v)
+                    exec(v, self.stg_globals, locals())
                 except:
                     print_exc()
                     self.kwzservQ.put(('window', (ui_num['S단순텍스트'], '시스템 명령 오류 알림 - 경과틱수 연산오류')))
 
         if 체결강도평균_ != 0 and not (매수잔량5 == 0 and 매도잔량5 == 0) and 전략연산:
-            if 종목코드 in self.df_jg.index:
+            if 종목코드 in self.dict_jg.keys():
                 if 종목코드 not in self.dict_buy_num.keys():
                     self.dict_buy_num[종목코드] = len(self.dict_arry[종목코드]) - 1
                 매수틱번호 = self.dict_buy_num[종목코드]
-                매입가 = self.df_jg['매입가'][종목코드]
-                보유수량 = self.df_jg['보유수량'][종목코드]
-                매입금액 = self.df_jg['매입금액'][종목코드]
-                분할매수횟수 = int(self.df_jg['분할매수횟수'][종목코드])
-                분할매도횟수 = int(self.df_jg['분할매도횟수'][종목코드])
+                매입가 = self.dict_jg[종목코드]['매입가']
+                보유수량 = self.dict_jg[종목코드]['보유수량']
+                매입금액 = self.dict_jg[종목코드]['매입금액']
+                분할매수횟수 = int(self.dict_jg[종목코드]['분할매수횟수'])
+                분할매도횟수 = int(self.dict_jg[종목코드]['분할매도횟수'])
                 _, 수익금, 수익률 = GetKiwoomPgSgSp(매입금액, 보유수량 * 현재가)
-                매수시간 = strp_time('%Y%m%d%H%M%S', self.df_jg['매수시간'][종목코드])
+                매수시간 = self.dict_jg[종목코드]['매수시간']
                 보유시간 = (now() - 매수시간).total_seconds()
                 if 종목코드 not in self.dict_hilo.keys():
                     self.dict_hilo[종목코드] = [수익률, 수익률]
@@ -536,19 +547,19 @@ class KiwoomStrategyMin(KiwoomStrategyTick):
                 매수수량 = 0
 
                 if A or (B and C) or C:
-                    매수수량 = self.SetBuyCount(분할매수횟수, 매입가, 현재가, 고가, 저가, 등락율각도(30), 당일거래대금각도(30), 전일비, 회전율, 전일동시간비)
+                    매수수량 = self.SetBuyCount(분할매수횟수, 매입가, 현재가, 고가, 저가, self.dict_func['등락율각도'](30), self.dict_func['당일거래대금각도'](30), 전일비, 회전율, 전일동시간비)
 
                 if A or (B and C) or D:
                     매수 = True
                     if self.buystrategy is not None:
                         try:
-                            exec(self.buystrategy)
+                            exec(self.buystrategy, self.stg_globals, locals())
                         except:
                             print_exc()
                             self.kwzservQ.put(('window', (ui_num['S단순텍스트'], '시스템 명령 오류 알림 - BuyStrategy')))
                 elif C:
                     매수 = False
-                    분할매수기준수익률 = round((현재가 / 현재가N(-1) - 1) * 100, 2) if self.dict_set['주식매수분할고정수익률'] else 수익률
+                    분할매수기준수익률 = round((현재가 / self.dict_func['현재가N'](-1) - 1) * 100, 2) if self.dict_set['주식매수분할고정수익률'] else 수익률
                     if self.dict_set['주식매수분할하방'] and 분할매수기준수익률 < -self.dict_set['주식매수분할하방수익률']:
                         매수 = True
                     elif self.dict_set['주식매수분할상방'] and 분할매수기준수익률 > self.dict_set['주식매수분할상방수익률']:
@@ -576,12 +587,12 @@ class KiwoomStrategyMin(KiwoomStrategyTick):
                 if A or E or F:
                     매도수량 = 보유수량
                 elif (B and C) or C:
-                    매도수량 = self.SetSellCount(분할매도횟수, 보유수량, 매입가, 고가, 저가, 등락율각도(30), 당일거래대금각도(30), 전일비, 회전율, 전일동시간비)
+                    매도수량 = self.SetSellCount(분할매도횟수, 보유수량, 매입가, 고가, 저가, self.dict_func['등락율각도'](30), self.dict_func['당일거래대금각도'](30), 전일비, 회전율, 전일동시간비)
 
                 if A or (B and C) or D:
                     if self.sellstrategy is not None:
                         try:
-                            exec(self.sellstrategy)
+                            exec(self.sellstrategy, self.stg_globals, locals())
                         except:
                             print_exc()
                             self.kwzservQ.put(('window', (ui_num['S단순텍스트'], '시스템 명령 오류 알림 - SellStrategy')))
@@ -598,10 +609,10 @@ class KiwoomStrategyMin(KiwoomStrategyTick):
                         self.Sell(종목코드, 종목명, 매도수량, 현재가, 매도호가1, 매수호가1, 강제청산)
 
         if 관심종목 and 전략연산:
-            self.df_gj.loc[종목코드] = 종목명, 등락율, 고저평균대비등락율, 분당거래대금, 분당거래대금평균_, 당일거래대금, 체결강도, 체결강도평균_, 최고체결강도_
+            self.gj_table.Update(종목코드, (종목명, 등락율, 고저평균대비등락율, 분당거래대금, 분당거래대금평균_, 당일거래대금, 체결강도, 체결강도평균_, 최고체결강도_))
 
         if len(self.dict_arry[종목코드]) >= 평균값계산틱수 and self.chart_code == 종목코드:
-            self.kwzservQ.put(('window', (ui_num['실시간차트'], 종목명, self.dict_arry[종목코드])))
+            self.PutRealChart(종목코드, 종목명)
 
         if 틱수신시간 != 0:
             gap = (now() - 틱수신시간).total_seconds()
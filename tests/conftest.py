@@ -0,0 +1,16 @@
+import importlib
+import pytest
+
+
+@pytest.fixture
+def stom_import():
+    """
+    utility.setting, utility.static, back_static 처럼 윈도우 전용 모듈, talib, numba 와 설정 DB가 있어야 임포트되는 모듈을
+    임포트하고, STOM 실행 환경이 아니면 테스트를 건너뛴다.
+    """
+    def Import(name):
+        try:
+            return importlib.import_module(name)
+        except Exception as e:
+            pytest.skip(f'STOM 실행 환경이 아님: {e!r}')
+    return Import
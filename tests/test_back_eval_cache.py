@@ -0,0 +1,66 @@
+import itertools
+import pytest
+from backtester import back_eval_cache
+from backtester.back_eval_cache import BackEvalCache, GetEvalContext, GetGridCache
+
+
+class Clock:
+    def __init__(self):
+        self.count = itertools.count(1)
+
+    def time(self):
+        return float(next(self.count))
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(back_eval_cache, 'time', Clock())
+    cache = BackEvalCache(str(tmp_path / 'cache' / 'back_cache.db'), 'context', 2)
+    yield cache
+    cache.con.close()
+
+
+def test_get_put(cache):
+    assert cache.Get(20240101, 20240131, [1, 2]) is None
+    cache.Put(20240101, 20240131, [1, 2], 3.5, ('result',))
+    assert cache.Get(20240101, 20240131, [1, 2]) == 3.5
+    assert cache.Get(20240101, 20240130, [1, 2]) is None
+    assert cache.Get(20240101, 20240131, [1, 3]) is None
+
+
+def test_sample_results_are_not_stored(cache):
+    cache.SetSample(0.5)
+    cache.Put(20240101, 20240131, [1, 2], 3.5, None)
+    cache.SetSample(1)
+    assert cache.Get(20240101, 20240131, [1, 2]) is None
+
+
+def test_least_recently_used_is_evicted(cache):
+    cache.Put(1, 2, [1], 1., None)
+    cache.Put(1, 2, [2], 2., None)
+    assert cache.Get(1, 2, [1]) == 1.
+    cache.count = 0
+    cache.Put(1, 2, [3], 3., None)
+    assert cache.Get(1, 2, [2]) is None
+    assert cache.Get(1, 2, [1]) == 1.
+    assert cache.Get(1, 2, [3]) == 3.
+
+
+def test_context_depends_on_result_settings(tmp_path):
+    db = str(tmp_path / 'none.db')
+    dict_set = {'백테커널모드': True, '백테피처캐시': True, '백테일괄로딩': True}
+    context = GetEvalContext(dict_set, 'C', db, 1000)
+    assert GetEvalContext(dict(dict_set, 백테일괄로딩=False), 'C', db, 1000) == context
+    assert GetEvalContext(dict(dict_set, 백테커널모드=False), 'C', db, 1000) != context
+    assert GetEvalContext(dict(dict_set, 백테피처캐시=False), 'C', db, 1000) != context
+    assert GetEvalContext(dict_set, 'C', db, 2000) != context
+
+
+def test_grid_cache_skips_cached_values(cache):
+    vars_ = [[[10, 20, 30], 20], [[1], 1]]
+    cache.Put(1, 2, [10, 1], 5., None)
+    cache.Put(1, 2, [30, 1], 7., None)
+    vars_send, cache_list = GetGridCache(cache, vars_, 1, 2)
+    # 연산할 값이 20 하나만 남으므로 캐시된 값 10 을 함께 전송하고, 30 의 기준값은 캐시에서 전달한다.
+    assert vars_send == [[[10, 20], 20], [[1], 1]]
+    assert cache_list == [(0, 30, 7.)]
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+from backtester.back_kernel import GetKernel, KernelStrategy
+
+
+class Self:
+    def __init__(self, vars_):
+        self.vars = vars_
+
+
+def MakeEnv(length, prices):
+    def 현재가N(pre):
+        return prices[pre] if pre < len(prices) else 0
+    return {'데이터길이': length, '현재가': prices[0], '현재가N': 현재가N, '등락율': 3.5, '체결강도': 120.0}
+
+
+def RunExec(stgtxt, env, vars_, results):
+    run_env = dict(env)
+    run_env['self'] = Self(vars_)
+    exec(stgtxt, run_env)
+    return [run_env[name] for name in results]
+
+
+def RunKernel(stgtxt, env, vars_lists, results):
+    kernel = GetKernel(stgtxt, results, (), 0)
+    assert isinstance(kernel, KernelStrategy)
+    _vars = [np.array([vars_[i] for vars_ in vars_lists]) for i in range(len(vars_lists[0]))]
+    return kernel.Run(env, _vars)
+
+
+def AssertSame(stgtxt, env, vars_lists, results=('매수',)):
+    kernel_values = RunKernel(stgtxt, env, vars_lists, results)
+    for lane, vars_ in enumerate(vars_lists):
+        exec_values = RunExec(stgtxt, env, vars_, results)
+        for kernel_value, exec_value in zip(kernel_values, exec_values):
+            if isinstance(kernel_value, np.ndarray):
+                kernel_value = kernel_value[lane]
+            assert kernel_value == exec_value
+
+
+VARS_LISTS = [[100, 1.0, 110.0], [200, 3.0, 130.0], [300, 5.0, 90.0], [400, 4.0, 150.0]]
+
+STRATEGIES = [
+    # 데이터길이 조건이 거짓이면 오른쪽의 N() 나눗셈은 연산되지 않아야 한다.
+    '매수 = True\nif 데이터길이 > 200 and 현재가N(100) / 현재가N(200) > 1.01:\n    매수 = False\n',
+    '매수 = True\nif 데이터길이 < 200 or 현재가N(100) / 현재가N(200) > 1.01:\n    매수 = False\n',
+    '매수 = True\nif 데이터길이 > 200:\n    if 현재가N(100) / 현재가N(200) > 1.01:\n        매수 = False\n',
+    '매수 = True\n비율 = 현재가N(100) / 현재가N(200) if 데이터길이 > 200 else 1.0\nif 비율 > 1.01:\n    매수 = False\n',
+    '매수 = True\nif not (self.vars[1] < 등락율 < self.vars[1] + 2):\n    매수 = False\nelif 체결강도 < self.vars[2]:\n    매수 = False\n',
+    '매수 = True\n기준 = self.vars[2]\nif 등락율 > self.vars[1]:\n    기준 = 기준 * 2\nelse:\n    기준 += 10\nif 체결강도 < 기준 or 등락율 > self.vars[1] and 체결강도 > 100:\n    매수 = False\n',
+]
+
+
+@pytest.mark.parametrize('stgtxt', STRATEGIES)
+@pytest.mark.parametrize('length', [100, 300])
+def test_kernel_matches_exec(stgtxt, length):
+    env = MakeEnv(length, [1000.0 + i for i in range(length)])
+    AssertSame(stgtxt, env, VARS_LISTS)
+
+
+def test_guarded_division_does_not_raise():
+    stgtxt = STRATEGIES[0]
+    values = RunKernel(stgtxt, MakeEnv(150, [1000.0] * 150), VARS_LISTS, ('매수',))
+    assert values[0] is True
+
+
+def test_unguarded_division_raises_like_exec():
+    stgtxt = '매수 = True\nif 현재가N(100) / 현재가N(200) > 1.01:\n    매수 = False\n'
+    env = MakeEnv(300, [1000.0] * 150)
+    with pytest.raises(ZeroDivisionError):
+        RunExec(stgtxt, env, VARS_LISTS[0], ('매수',))
+    with pytest.raises(ZeroDivisionError):
+        RunKernel(stgtxt, env, VARS_LISTS, ('매수',))
+
+
+def test_conditional_name_falls_back_to_exec():
+    stgtxt = '매수 = True\nif 등락율 > self.vars[1]:\n    기준 = 1\nif 기준 > 0:\n    매수 = False\n'
+    assert GetKernel(stgtxt, ('매수',), (), 1) is None
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+from backtester.back_subtotal import BackSubTotal, GetArrayTsg
+
+
+def MakeSubTotal(arry_bct_):
+    subtotal = object.__new__(BackSubTotal)
+    subtotal.arry_bct_ = arry_bct_
+    subtotal.bct_order = np.argsort(arry_bct_[:, 0], kind='stable')
+    subtotal.bct_times = arry_bct_[subtotal.bct_order, 0]
+    return subtotal
+
+
+def GetArrayBctLoop(arry_bct_, list_hold):
+    arry_bct = arry_bct_.copy()
+    for 매수시간, 매도시간, 잔량없음, 매수금액 in list_hold:
+        arry_bool = (매수시간 <= arry_bct[:, 0]) & (arry_bct[:, 0] <= 매도시간)
+        arry_bct[arry_bool, 2] += 매수금액
+        if 잔량없음: arry_bct[arry_bool, 1] += 1
+    return arry_bct
+
+
+@pytest.mark.parametrize('integer_amount', [True, False])
+def test_array_bct_matches_loop(integer_amount):
+    rng = np.random.default_rng(1)
+    times = np.unique(20240102090000 + rng.integers(0, 60000, 3000))
+    arry_bct_ = np.zeros((len(times), 3), dtype=np.float64)
+    arry_bct_[:, 0] = rng.permutation(times)
+    list_hold = []
+    for _ in range(500):
+        start = int(times[rng.integers(len(times))])
+        end = start + int(rng.integers(0, 3000))
+        amount = float(rng.integers(1, 10 ** 7)) if integer_amount else float(rng.uniform(1, 10 ** 4))
+        list_hold.append((start, end, int(rng.integers(0, 2)), amount))
+    arry_bct = MakeSubTotal(arry_bct_).GetArrayBct(list_hold)
+    arry_ref = GetArrayBctLoop(arry_bct_, list_hold)
+    assert np.array_equal(arry_bct[:, :2], arry_ref[:, :2])
+    if integer_amount:
+        assert np.array_equal(arry_bct[:, 2], arry_ref[:, 2])
+    else:
+        assert np.allclose(arry_bct[:, 2], arry_ref[:, 2], rtol=1e-12)
+
+
+def test_array_tsg_matches_dataframe_sort():
+    rng = np.random.default_rng(2)
+    list_data = [[str(20240102090000 + int(x)), 10., 1., 0.5, float(rng.integers(-100, 100))] for x in rng.integers(0, 500, 300)]
+    df_tsg = pd.DataFrame(list_data, columns=['index', '보유시간', '매도시간', '수익률', '수익금'])
+    df_tsg.set_index('index', inplace=True)
+    df_tsg.sort_index(inplace=True)
+    df_tsg['수익금합계'] = df_tsg['수익금'].cumsum()
+    assert np.array_equal(GetArrayTsg(list_data), np.array(df_tsg, dtype='float64'))
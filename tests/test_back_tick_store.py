@@ -0,0 +1,155 @@
+import os
+import sqlite3
+import numpy as np
+import pandas as pd
+import pytest
+from backtester import back_tick_store
+
+
+@pytest.fixture
+def store(tmp_path):
+    db_path = str(tmp_path / 'coin_tick_back.db')
+    rows = []
+    for day in (20240102, 20240103, 20240105):
+        for i, time in enumerate(range(90000, 90000 + 300, 3)):
+            rows.append((day * 1000000 + time, 100.0 + i % 7, 1.5 * i, 30.0 + i % 11))
+    df = pd.DataFrame(rows, columns=['index', '현재가', '등락율', '체결강도'])
+    con = sqlite3.connect(db_path)
+    df.sample(frac=1, random_state=1).to_sql('KRW-BTC', con, index=False)
+    df.to_sql('KRW-ETH', con, index=False)
+    con.close()
+    return str(tmp_path / 'back_store'), db_path
+
+
+def ReadQuery(back_static, db_path, code, days, starttime, endtime):
+    con = sqlite3.connect(db_path)
+    df = pd.read_sql(back_static.GetBackloadCodeQuery(code, days, starttime, endtime), con)
+    con.close()
+    return df.sort_values('index', kind='stable').reset_index(drop=True)
+
+
+@pytest.mark.parametrize('days, starttime, endtime', [
+    ([20240102, 20240103], 90000, 235959),
+    ([20240102, 20240105], 90000, 235959),
+    ([20240103], 90030, 90200),
+    ([20240104], 90000, 235959),
+    ([20240102, 20240103], 30, 130),
+])
+def test_round_trip_matches_query(stom_import, store, days, starttime, endtime):
+    back_static = stom_import('backtester.back_static')
+    store, db_path = store
+    con = sqlite3.connect(db_path)
+    for _ in range(2):
+        arry, info = back_tick_store.UpdateTickStore(con, store, db_path, 'KRW-BTC')
+        arry_day, columns = back_tick_store.LoadTickStore(arry, info, days, starttime, endtime)
+        df = ReadQuery(back_static, db_path, 'KRW-BTC', days, starttime, endtime)
+        assert columns == list(df.columns)
+        assert np.array_equal(arry_day, df.to_numpy(dtype=np.float64))
+        assert back_tick_store.CountTickStore(arry, info, days, starttime, endtime) == len(df)
+        for day in days:
+            count = back_tick_store.CountTickStore(arry, info, [day], starttime, endtime)
+            assert count == len(ReadQuery(back_static, db_path, 'KRW-BTC', [day], starttime, endtime))
+    con.close()
+
+
+def test_contiguous_days_are_memmap_view(store):
+    store, db_path = store
+    con = sqlite3.connect(db_path)
+    back_tick_store.UpdateTickStore(con, store, db_path, 'KRW-BTC')
+    arry, info = back_tick_store.UpdateTickStore(con, store, db_path, 'KRW-BTC')
+    con.close()
+    for days, starttime, endtime in (([20240102, 20240103], 90000, 235959), ([20240103], 90030, 90200)):
+        arry_day, _ = back_tick_store.LoadTickStore(arry, info, days, starttime, endtime)
+        assert isinstance(arry_day.base, np.memmap) or isinstance(arry_day, np.memmap)
+
+
+def test_invalidation_is_per_code(store):
+    store, db_path = store
+    con = sqlite3.connect(db_path)
+    back_tick_store.UpdateTickStore(con, store, db_path, 'KRW-BTC')
+    back_tick_store.UpdateTickStore(con, store, db_path, 'KRW-ETH')
+    con.execute("INSERT INTO 'KRW-BTC' VALUES (20240105091000, 200.0, 1.0, 50.0)")
+    con.commit()
+    arry_btc, _ = back_tick_store.UpdateTickStore(con, store, db_path, 'KRW-BTC')
+    arry_eth, _ = back_tick_store.UpdateTickStore(con, store, db_path, 'KRW-ETH')
+    con.close()
+    assert not isinstance(arry_btc, np.memmap) and arry_btc[-1, 0] == 20240105091000
+    assert isinstance(arry_eth, np.memmap)
+
+
+def test_clean_removes_dropped_codes(store):
+    store, db_path = store
+    con = sqlite3.connect(db_path)
+    back_tick_store.UpdateTickStore(con, store, db_path, 'KRW-BTC')
+    back_tick_store.UpdateTickStore(con, store, db_path, 'KRW-ETH')
+    con.execute("DROP TABLE 'KRW-ETH'")
+    con.commit()
+    con.close()
+    back_tick_store.CleanTickStore(store, db_path)
+    assert os.path.isfile(back_tick_store.GetStoreFile(store, db_path, 'KRW-BTC') + '.npy')
+    assert not os.path.isfile(back_tick_store.GetStoreFile(store, db_path, 'KRW-ETH') + '.npy')
+    assert not os.path.isfile(back_tick_store.GetStoreFile(store, db_path, 'KRW-ETH') + '.pkl')
+
+
+def MakeTickData(days, length):
+    rng = np.random.default_rng(0)
+    count = length * len(days)
+    return pd.DataFrame({
+        'index': [day * 1000000 + 90000 + i for day in days for i in range(length)],
+        '현재가': np.round(100 + rng.standard_normal(count).cumsum(), 2),
+        '등락율': np.round(rng.standard_normal(count), 2),
+        '당일거래대금': rng.integers(1, 10 ** 9, count).astype(np.float64),
+        '체결강도': np.round(rng.uniform(50, 150, count), 2),
+        '초당매수수량': np.round(rng.uniform(0, 10, count), 8),
+        '초당매도수량': np.round(rng.uniform(0, 10, count), 8),
+        '초당거래대금': np.round(rng.uniform(0, 10 ** 6, count), 3),
+    })
+
+
+def CountGroups(groups, calls):
+    def Count(name, func):
+        def Wrapper(df):
+            calls.append((name, int(df['index'].iloc[-1]) // 1000000))
+            return func(df)
+        return Wrapper
+    return [(name, window, Count(name, func)) for name, window, func in groups]
+
+
+@pytest.mark.parametrize('avg_list', [[30], [30, 60]])
+def test_feature_cache_matches_add_avg_data(stom_import, tmp_path, avg_list):
+    back_static = stom_import('backtester.back_static')
+    df = MakeTickData([20240102, 20240103, 20240104], 1500)
+    df_add = back_static.AddAvgData(df, 8, True, avg_list)
+    groups = back_static.GetAvgDataGroups(8, True, avg_list)
+    df_first = back_tick_store.LoadAvgData(df, str(tmp_path), 'coin_tick_back.db', 'KRW-BTC', 8, groups)
+    df_load = back_tick_store.LoadAvgData(df, str(tmp_path), 'coin_tick_back.db', 'KRW-BTC', 8, groups)
+    assert list(df_load.columns) == list(df_add.columns)
+    assert np.array_equal(df_load.to_numpy(), df_first.to_numpy(), equal_nan=True)
+    # 반올림 전 상대오차 1e-12 이내이며, 반올림 컬럼의 마지막 자리(최대 1, 초당거래대금평균) 차이를 허용한다.
+    arry_load, arry_add = df_load.to_numpy(dtype=np.float64), df_add.to_numpy(dtype=np.float64)
+    assert np.array_equal(np.isnan(arry_load), np.isnan(arry_add))
+    assert np.allclose(arry_load, arry_add, rtol=1e-12, atol=1, equal_nan=True)
+
+
+def test_feature_cache_is_incremental_by_day(stom_import, tmp_path):
+    back_static = stom_import('backtester.back_static')
+    days = [20240102, 20240103, 20240104, 20240105]
+    df = MakeTickData(days, 1500)
+    calls = []
+    groups = CountGroups(back_static.GetAvgDataGroups(8, True, [30, 60]), calls)
+
+    def Load(days_):
+        df_ = df[(df['index'] // 1000000).isin(days_)].reset_index(drop=True)
+        return back_tick_store.LoadAvgData(df_, str(tmp_path), 'coin_tick_back.db', 'KRW-BTC', 8, groups)
+
+    df_first = Load(days[:3])
+    assert len(calls) == 4 * 3
+    calls.clear()
+    df_next = Load(days)
+    assert sorted(set(day for _, day in calls)) == [20240105]
+    assert np.array_equal(df_next.iloc[:len(df_first)].to_numpy(), df_first.to_numpy(), equal_nan=True)
+    calls.clear()
+    # 첫 일자는 앞에 붙는 행이 없어졌으므로 다시 계산하고 나머지 일자는 재사용한다.
+    df_last = Load(days[1:])
+    assert sorted(set(day for _, day in calls)) == [20240103]
+    assert np.array_equal(df_last.iloc[1500:].to_numpy(), df_next.iloc[3000:].to_numpy(), equal_nan=True)
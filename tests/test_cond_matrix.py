@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def back_static(stom_import):
+    return stom_import('backtester.back_static')
+
+
+def GetBlockedLoop(list_conds, env):
+    list_blocked = []
+    for conds in list_conds:
+        blocked = False
+        for cond in conds:
+            try:
+                if eval(cond, {}, env):
+                    blocked = True
+                    break
+            except Exception:
+                pass
+        list_blocked.append(blocked)
+    return np.array(list_blocked)
+
+
+def test_cond_blocked_matches_lane_loop(back_static):
+    list_conds = [
+        ['현재가 > 100', '등락율 < 0'],
+        ['등락율 < 0'],
+        ['체결강도 > 150', '현재가 < 50'],
+        ['체결강도 > 150'],
+        ['없는변수 > 0'],
+        ['없는변수 > 0', '현재가 > 100'],
+    ] * 4
+    cond_matrix = back_static.GetCondMatrix(list_conds, 1)
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        env = {'현재가': int(rng.integers(0, 200)), '등락율': float(rng.normal()), '체결강도': float(rng.integers(50, 250))}
+        blocked = back_static.GetCondBlocked(cond_matrix, {}, env)
+        assert (blocked == GetBlockedLoop(list_conds, env)).all()
+
+
+def test_cond_matrix_returns_none_on_syntax_error(back_static):
+    assert back_static.GetCondMatrix([['현재가 >']], 1) is None
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('talib')
+
+
+def GetRandomIndicator(rng):
+    def period(low=2, high=60):
+        return int(rng.integers(low, high))
+
+    def matype():
+        return int(rng.integers(0, 9))
+
+    fast = period(2, 30)
+    k = [fast, fast + period(1, 30), period(), period(2, 30)]
+    k += [k[3] + period(1, 30), matype(), period(), period(), period(), 2, 2, matype(), period(), period()]
+    fast = period(2, 30)
+    k += [fast, fast + period(1, 30), period(2, 20), period(), period(), period(2, 30)]
+    k += [k[19] + period(1, 30), matype(), period(), period(), 0.02, 0.2]
+    k += [period(2, 30), period(1, 10), matype(), period(1, 10), matype(), period(2, 30), period(1, 10), matype(), period()]
+    return k
+
+
+def GetBars(rng, length):
+    mc = 1000 + np.round(rng.standard_normal(length).cumsum() * 5, 0)
+    mh = mc + rng.integers(0, 20, length)
+    ml = mc - rng.integers(0, 20, length)
+    mv = rng.integers(1, 10 ** 6, length).astype(np.float64)
+    return mc, mh, ml, mv
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_window_matches_full_array(stom_import, seed):
+    GetIndicatorWindow = stom_import('utility.static').GetIndicatorWindow
+    GetIndicator = stom_import('backtester.back_static').GetIndicator
+    rng = np.random.default_rng(seed)
+    k = GetRandomIndicator(rng) if seed else [0] * 35
+    window = GetIndicatorWindow(k)
+    assert window is not None and window >= 1
+    for length in (window, window + 1, 1000):
+        mc, mh, ml, mv = GetBars(rng, length)
+        full = np.array(GetIndicator(mc, mh, ml, mv, k), dtype=np.float64)
+        tail = np.array(GetIndicator(mc[-window:], mh[-window:], ml[-window:], mv[-window:], k), dtype=np.float64)
+        assert np.array_equal(full, tail, equal_nan=True)
+        assert not np.isnan(tail).any()
+
+
+def test_window_is_max_lookback(stom_import):
+    GetIndicatorWindow = stom_import('utility.static').GetIndicatorWindow
+    k = [0] * 35
+    k[23] = 14
+    assert GetIndicatorWindow(k) == 15
+    k[18] = 30
+    assert GetIndicatorWindow(k) == 31
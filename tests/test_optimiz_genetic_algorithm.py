@@ -0,0 +1,121 @@
+import random
+import itertools
+import pytest
+
+
+class ListQueue(list):
+    def put(self, data):
+        self.append(data)
+
+
+class NoCheckpoint:
+    def Load(self):
+        return None
+
+    def Save(self, state, force=False):
+        pass
+
+
+def MakeOptimize(ga, vars_list, high_list, size=20):
+    optimize = object.__new__(ga.OptimizeGeneticAlgorithm)
+    optimize.wq          = ListQueue()
+    optimize.tq          = ListQueue()
+    optimize.backname    = 'GA최적화'
+    optimize.ui_gubun    = 'C'
+    optimize.vars_list   = vars_list
+    optimize.high_list   = high_list
+    optimize.visited     = set()
+    optimize.result      = {}
+    optimize.checkpoint  = NoCheckpoint()
+    optimize.dict_set    = {'백테GA개체수': size}
+    optimize.total_count = 1
+    for value in vars_list:
+        optimize.total_count *= len(value)
+    return optimize
+
+
+def IsValid(optimize, genes):
+    return len(genes) == len(optimize.vars_list) and all(0 <= x < len(v) for x, v in zip(genes, optimize.vars_list))
+
+
+@pytest.fixture
+def ga(stom_import, monkeypatch):
+    optimiz_genetic_algorithm = stom_import('backtester.optimiz_genetic_algorithm')
+    monkeypatch.setattr(optimiz_genetic_algorithm, 'threading_timer', lambda *args: None)
+    monkeypatch.setattr(optimiz_genetic_algorithm, 'ui_num', {'C백테스트': 0})
+    random.seed(0)
+    return optimiz_genetic_algorithm
+
+
+def test_first_population_starts_from_high_values(ga):
+    optimize = MakeOptimize(ga, [list(range(10)), list(range(0, 100, 10)), [1, 2, 3]], [5, 30, 9])
+    genes_list = optimize.GetFirstPopulation(20)
+    assert len(genes_list) == 20 == len(set(genes_list))
+    assert genes_list[0][:2] == (5, 3)
+    assert all(IsValid(optimize, x) for x in genes_list)
+    assert optimize.visited == set(genes_list)
+
+
+def test_offspring_are_new_valid_genes(ga):
+    optimize = MakeOptimize(ga, [list(range(10))] * 4, [0] * 4)
+    population = [(-sum(x), x) for x in optimize.GetFirstPopulation(20)]
+    visited = set(optimize.visited)
+    genes_list = optimize.GetOffspring(population, 20)
+    assert len(genes_list) == 20 == len(set(genes_list))
+    assert all(IsValid(optimize, x) and x not in visited for x in genes_list)
+    assert optimize.visited == visited | set(genes_list)
+
+
+def test_offspring_return_all_remaining_genes(ga):
+    optimize = MakeOptimize(ga, [list(range(5))] * 2, [0] * 2)
+    optimize.visited = set(list(itertools.product(range(5), range(5)))[:10])
+    genes_list = optimize.GetOffspring([(0, (0, 0))], 20)
+    assert len(genes_list) == 15
+    assert len(optimize.visited) == optimize.total_count
+
+
+def test_selection_prefers_higher_std(ga):
+    optimize = MakeOptimize(ga, [list(range(10))] * 4, [0] * 4)
+    population = [(float(sum(x)), x) for x in optimize.GetFirstPopulation(20)]
+    mean_parent = sum(x[0] for x in population) / len(population)
+    mean_child  = sum(sum(x) for x in optimize.GetOffspring(population, 20)) / 20
+    assert mean_child > mean_parent
+
+
+def Evaluate(std_func):
+    def GetStdGenes(mq, genes_list, startday, endday, optistandard, buystg, sellstg):
+        return [(std_func(x), x) for x in genes_list]
+    return GetStdGenes
+
+
+def test_evolve_finds_optimum_and_stops_after_stall(ga):
+    optimize = MakeOptimize(ga, [list(range(10))] * 5, [0] * 5)
+    optimize.GetStdGenes = Evaluate(lambda x: -sum((y - 7) ** 2 for y in x))
+    optimize.Evolve(None, optimize.total_count, 1, 2, 'TP', 'buy', 'sell')
+    assert max(optimize.result) == 0
+    assert optimize.result[0] == [7] * 5
+    assert len(optimize.visited) < optimize.total_count
+
+
+def test_evolve_stops_after_five_generations_without_improvement(ga):
+    optimize = MakeOptimize(ga, [list(range(10))] * 5, [0] * 5)
+    calls = []
+
+    def GetStdGenes(mq, genes_list, startday, endday, optistandard, buystg, sellstg):
+        calls.append(len(genes_list))
+        return [(1. if len(calls) == 1 else 0., x) for x in genes_list]
+
+    optimize.GetStdGenes = GetStdGenes
+    optimize.Evolve(None, optimize.total_count, 1, 2, 'TP', 'buy', 'sell')
+    # 첫 세대에서 최고 기준값이 정해지고 이후 5세대 동안 갱신되지 않으면 종료한다.
+    assert len(calls) == 6
+    assert calls == [20] * 6
+
+
+def test_evolve_stops_when_all_genes_are_visited(ga):
+    optimize = MakeOptimize(ga, [list(range(4))] * 3, [0] * 3)
+    count = itertools.count()
+    optimize.GetStdGenes = Evaluate(lambda x: float(next(count)))
+    optimize.Evolve(None, optimize.total_count, 1, 2, 'TP', 'buy', 'sell')
+    assert len(optimize.visited) == optimize.total_count == 64
+    assert len(optimize.result) == 64
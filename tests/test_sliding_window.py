@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+from backtester.back_kernel import GetWindowArray
+from utility.sliding_window import SlidingWindow, SlidingWindows
+
+
+GUBUNS = ('max', 'min', 'sum', 'mean')
+
+
+def SliceArray(arry_col, tick, gubun):
+    return np.array([getattr(arry_col[i:i + tick], gubun)() for i in range(len(arry_col) - tick + 1)])
+
+
+@pytest.mark.parametrize('gubun', GUBUNS)
+@pytest.mark.parametrize('tick', [1, 2, 7, 30, 100, 999, 1000])
+def test_window_array_matches_slices(gubun, tick):
+    rng = np.random.default_rng(tick)
+    arry_col = np.round(rng.standard_normal(1000) * 1000, 2)
+    arry_win = GetWindowArray(arry_col, tick, gubun)
+    arry_ref = SliceArray(arry_col, tick, gubun)
+    assert len(arry_win) == len(arry_ref)
+    if gubun in ('max', 'min'):
+        assert np.array_equal(arry_win, arry_ref)
+    else:
+        assert np.allclose(arry_win, arry_ref, rtol=1e-12, atol=1e-9)
+
+
+@pytest.mark.parametrize('gubun', GUBUNS)
+def test_window_array_nan_stays_in_its_windows(gubun):
+    arry_col = np.arange(50, dtype=np.float64)
+    arry_col[23] = np.nan
+    arry_win = GetWindowArray(arry_col, 10, gubun)
+    arry_ref = SliceArray(arry_col, 10, gubun)
+    assert np.array_equal(np.isnan(arry_win), np.isnan(arry_ref))
+
+
+def test_window_array_shorter_than_tick():
+    assert len(GetWindowArray(np.arange(5, dtype=np.float64), 10, 'max')) == 0
+
+
+@pytest.mark.parametrize('gubun', GUBUNS)
+@pytest.mark.parametrize('tick', [1, 3, 60])
+def test_sliding_window_matches_slices(gubun, tick):
+    rng = np.random.default_rng(tick)
+    values = np.round(rng.uniform(0, 10 ** 6, 2000), 3)
+    window = SlidingWindow(values[:tick].tolist(), tick, gubun)
+    for i in range(tick, len(values) + 1):
+        expected = getattr(values[i - tick:i], gubun)()
+        if gubun in ('max', 'min'):
+            assert window.Value() == expected
+        else:
+            assert window.Value() == pytest.approx(expected, rel=1e-12)
+        if i < len(values):
+            window.Push(values[i])
+
+
+def test_sliding_windows_update_and_short_tick():
+    arry = np.arange(40, dtype=np.float64).reshape(20, 2)
+    windows = SlidingWindows()
+    assert windows.Get('A', arry, 1, 5, 'max') == arry[-5:, 1].max()
+    arry = np.r_[arry, [[0., 100.]]]
+    windows.Update('A', arry[-1])
+    assert windows.Get('A', arry, 1, 5, 'max') == 100.
+    assert windows.Get('A', arry, 0, 0, 'sum') == arry[:, 0].sum()
+    windows.Delete('A')
+    assert 'A' not in windows.dict_window
@@ -0,0 +1,63 @@
+import numpy as np
+from utility.tick_buffer import TickBuffer, TickBuffers
+
+
+def test_matches_concatenation():
+    rng = np.random.default_rng(0)
+    buffers = TickBuffers(capacity=4)
+    dict_ref = {}
+    dict_total = {}
+    for _ in range(5000):
+        code = f'C{rng.integers(3)}'
+        r = rng.random()
+        if r < 0.8 or code not in dict_ref:
+            row = rng.standard_normal(5)
+            arry = buffers.Append(code, row)
+            dict_ref[code] = np.r_[dict_ref[code], [row]] if code in dict_ref else np.array([row])
+            dict_total[code] = dict_total.get(code, 0) + 1
+        elif r < 0.95:
+            arry = buffers.PopFront(code)
+            if len(dict_ref[code]) > 1:
+                dict_ref[code] = np.delete(dict_ref[code], 0, 0)
+        else:
+            row = rng.standard_normal(5)
+            arry = buffers.Append(code, row)
+            arry[-1, :] = row * 2
+            dict_ref[code] = np.r_[dict_ref[code], [row * 2]]
+            dict_total[code] += 1
+        assert np.array_equal(arry, dict_ref[code])
+        assert buffers.Total(code) == dict_total[code]
+
+
+def test_integer_rows_are_stored_as_float():
+    buffer = TickBuffer((1, 2, 3), 2)
+    assert buffer.View().dtype == np.float64
+    assert np.array_equal(buffer.Append((4, 5, 6.5)), [[1, 2, 3], [4, 5, 6.5]])
+
+
+def test_growth_does_not_overwrite_previous_views():
+    buffer = TickBuffer((0., 0.), 4)
+    views = []
+    for i in range(1, 40):
+        views.append((buffer.Append((i, i)).copy(), buffer.View()))
+        buffer.KeepLast(3)
+    for copy, view in views:
+        assert np.array_equal(copy, view)
+
+
+def test_extend_and_keep_last():
+    buffer = TickBuffer((0.,), 2)
+    arry = buffer.Extend(np.arange(1, 10, dtype=np.float64).reshape(-1, 1))
+    assert np.array_equal(arry[:, 0], np.arange(10))
+    assert np.array_equal(buffer.KeepLast(4)[:, 0], [6, 7, 8, 9])
+    assert np.array_equal(buffer.Extend([[10.], [11.]])[:, 0], [6, 7, 8, 9, 10, 11])
+    assert buffer.total == 12
+
+
+def test_delete():
+    buffers = TickBuffers()
+    buffers.Append('A', (1., 2.))
+    buffers.Delete('A')
+    buffers.Delete('B')
+    assert 'A' not in buffers.dict_buffer
+    assert len(buffers.Append('A', (3., 4.))) == 1
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+from utility.watch_table import WatchTable, MergeWatchDelta
+
+
+COLUMNS = ['종목명', 'per', 'hlml_per', 's_money', 'sm_avg', 'd_money', 'ch', 'ch_avg', 'ch_high']
+
+
+def test_delta_is_none_without_changes():
+    table = WatchTable(COLUMNS)
+    assert table.GetDelta() is None
+    table.Update('A', ('A',) + (1.,) * 8)
+    assert table.GetDelta() is not None
+    assert table.GetDelta() is None
+
+
+def test_slots_are_reused_and_grown():
+    table = WatchTable(COLUMNS, capacity=2)
+    for code in ('A', 'B', 'C'):
+        table.Update(code, (code,) + (1.,) * 8)
+    assert len(table.arry) == 4
+    table.Keep(['A', 'C'])
+    slot_b = 1
+    assert 'B' not in table.dict_slot and slot_b in table.list_free
+    table.Update('D', ('D',) + (2.,) * 8)
+    assert table.dict_slot['D'] == slot_b
+
+
+def test_merged_deltas_match_full_table():
+    rng = np.random.default_rng(0)
+    table = WatchTable(COLUMNS, capacity=4)
+    codes = [f'KRW-C{i}' for i in range(40)]
+    df_ref = pd.DataFrame(columns=COLUMNS)
+    df_ui = None
+    for _ in range(2000):
+        r = rng.random()
+        if r < 0.85:
+            code = codes[rng.integers(40)]
+            row = (code,) + tuple(float(x) for x in rng.integers(0, 1000, 8))
+            table.Update(code, row)
+            df_ref.loc[code] = row
+        elif r < 0.9:
+            keep = list(rng.choice(codes, 30, replace=False))
+            table.Keep(keep)
+            df_ref = df_ref[df_ref.index.isin(keep)]
+        else:
+            delta = table.GetDelta()
+            if delta is None:
+                continue
+            df_ui = MergeWatchDelta(df_ui, *delta)
+            assert set(df_ui.index) == set(df_ref.index)
+            assert (df_ui['종목명'] == df_ui.index).all()
+            assert df_ui['d_money'].is_monotonic_decreasing
+            values_ui = df_ui.loc[df_ref.index, COLUMNS[1:]].to_numpy(dtype=np.float64)
+            values_ref = df_ref[COLUMNS[1:]].to_numpy(dtype=np.float64)
+            assert np.array_equal(values_ui, values_ref)
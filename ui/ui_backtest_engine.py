@@ -5,6 +5,7 @@ import pandas as pd
 from multiprocessing import Process, Queue
 from backtester.back_code_test import BackCodeTest
 from backtester.back_static import GetMoneytopQuery
+from backtester.back_tick_store import CleanTickStore
 from backtester.backengine_kiwoom_tick import BackEngineKiwoomTick
 from backtester.backengine_kiwoom_tick2 import BackEngineKiwoomTick2
 from backtester.backengine_kiwoom_min import BackEngineKiwoomMin
@@ -20,7 +21,7 @@ from backtester.backengine_binance_min2 import BackEngineBinanceMin2
 from backtester.back_subtotal import BackSubTotal
 from ui.set_style import style_bc_dk
 from utility.static import thread_decorator, qtest_qwait
-from utility.setting import DB_STOCK_BACK_TICK, DB_COIN_BACK_TICK, ui_num, BACK_TEMP, DB_STOCK_BACK_MIN, \
+from utility.setting import DB_STOCK_BACK_TICK, DB_COIN_BACK_TICK, ui_num, BACK_TEMP, BACK_STORE, DB_STOCK_BACK_MIN, \
     DB_COIN_BACK_MIN
 
 
@@ -193,6 +194,9 @@ def start_backengine(ui, gubun):
 
     ui.wdzservQ.put(('manager', '백테엔진구동'))
 
+    if ui.dict_set['백테컬럼저장소']:
+        CleanTickStore(BACK_STORE, db)
+
     for i in range(multi):
         if gubun == '주식':
             ui.back_eques[i].put(('종목명', ui.dict_cn))
@@ -1,4 +1,5 @@
 import os
+import time
 import random
 import sqlite3
 import pandas as pd
@@ -48,10 +49,16 @@ def bebutton_clicked_01(ui):
 
 def backtest_engine_kill(ui):
     ui.ClearBacktestQ()
+    for q in ui.back_eques:
+        q.put(('엔진종료',))
+    # 각 엔진이 소유한 공유메모리를 스스로 해제하고 종료할 시간을 준 후 남은 프로세스를 종료한다.
+    deadline = time.time() + 2
+    for p in ui.back_eprocs:
+        p.join(max(deadline - time.time(), 0))
     for p in ui.back_sprocs:
         p.kill()
     for p in ui.back_eprocs:
-        p.kill()
+        if p.is_alive(): p.kill()
     for q in ui.back_sques:
         q.close()
     for q in ui.back_eques:
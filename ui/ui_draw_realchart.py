@@ -12,6 +12,8 @@ class DrawRealChart:
         self.ui = ui
         self.crosshair = CrossHair(self.ui)
         self.chart_item_index = 0
+        self.dict_xticks = {}
+        self.data_key = None
 
     @error_decorator
     def draw_realchart(self, data):
@@ -123,7 +125,9 @@ class DrawRealChart:
             else:
                 self.ui.ctpg_data[i] = tick_arry[tick_arry != 0]
 
-        self.ui.ctpg_xticks = [strp_time('%Y%m%d%H%M%S', f'{str(int(x))}00' if is_min else str(int(x))).timestamp() for x in self.ui.ctpg_data[0]]
+        if self.ui.ctpg_name != name:
+            self.dict_xticks = {}
+        self.ui.ctpg_xticks = [self.get_xtick(int(x), is_min) for x in self.ui.ctpg_data[0]]
         xmin, xmax = self.ui.ctpg_xticks[0], self.ui.ctpg_xticks[-1]
         hms = from_timestamp(xmax).strftime('%H:%M' if is_min else '%H:%M:%S')
 
@@ -132,7 +136,10 @@ class DrawRealChart:
         for data in list(self.ui.ctpg_data.values()):
             len_list.append(tlen - len(data))
 
-        if self.ui.ctpg_name != name or self.ui.ctpg_last_xtick != xmax:
+        # 틱차트는 새 틱이 추가되어도 기존 아이템에 데이터만 갱신하고, 종목 변경 또는 표시할 데이터 유무가 바뀔 때만 다시 그린다.
+        data_key = tuple(len(x) > 0 for x in self.ui.ctpg_data.values())
+        if self.ui.ctpg_name != name or self.ui.database_chart or self.data_key != data_key or (is_min and self.ui.ctpg_last_xtick != xmax):
+            self.data_key = data_key
             for i, factor in enumerate(self.ui.ctpg_factors):
                 self.ui.ctpg[i].clear()
                 ymax, ymin = 0, 0
@@ -316,6 +323,7 @@ class DrawRealChart:
 
             self.ui.ctpg_name, self.ui.ctpg_last_xtick = name, xmax
         else:
+            self.ui.ctpg_last_xtick = xmax
             for i, factor in enumerate(self.ui.ctpg_factors):
                 ymax, ymin = 0, 0
                 if factor == '현재가':
@@ -445,3 +453,10 @@ class DrawRealChart:
                 if i == chart_count - 1: break
 
         if self.ui.database_chart: self.ui.database_chart = False
+
+    def get_xtick(self, x, is_min):
+        xtick = self.dict_xticks.get(x)
+        if xtick is None:
+            xtick = strp_time('%Y%m%d%H%M%S', f'{x}00' if is_min else str(x)).timestamp()
+            self.dict_xticks[x] = xtick
+        return xtick
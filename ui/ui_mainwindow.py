@@ -16,6 +16,8 @@ from ui.set_mainmenu import SetMainMenu
 from ui.set_dialog_etc import SetDialogEtc
 from ui.set_dialog_back import SetDialogBack
 from ui.set_dialog_chart import SetDialogChart
+from utility.tick_buffer import TickBuffer
+from utility.watch_table import MergeWatchDelta
 
 from ui.ui_etc import *
 from ui.ui_draw_chart import *
@@ -294,9 +296,11 @@ class Writer(QThread):
         self.windowQ = _windowQ
         self.df_list = [None, None, None, None, None, None, None, None]
         self.test    = None
+        self.chart_name   = None
+        self.chart_buffer = None
+        self.df_cgj       = None
 
     def run(self):
-        gsjm_count = 0
         while True:
             try:
                 data = self.windowQ.get()
@@ -305,25 +309,35 @@ class Writer(QThread):
                         self.signal1.emit(data)
                     elif ui_num['S실현손익'] <= data[0] <= ui_num['C상세기록']:
                         if data[0] == ui_num['S관심종목']:
+                            index = data[1]
+                            self.df_list[index] = MergeWatchDelta(self.df_list[index], data[2], data[3])
                             if not self.test:
-                                index = data[1]
-                                self.df_list[index] = data[2]
-                                gsjm_count += 1
-                                if gsjm_count == 8:
-                                    gsjm_count = 0
-                                    df_list = [x for x in self.df_list if x is not None]
-                                    # noinspection PyTypeChecker
-                                    df = pd.concat(df_list)
-                                    df.sort_values(by=['d_money'], ascending=False, inplace=True)
-                                    self.signal2.emit((ui_num['S관심종목'], df))
+                                df_list = [x for x in self.df_list if x is not None]
+                                # noinspection PyTypeChecker
+                                df = pd.concat(df_list)
+                                df.sort_values(by=['d_money'], ascending=False, inplace=True)
+                                self.signal2.emit((ui_num['S관심종목'], df))
                             else:
-                                self.signal2.emit((ui_num['S관심종목'], data[2]))
+                                self.signal2.emit((ui_num['S관심종목'], self.df_list[index]))
+                        elif data[0] == ui_num['C관심종목']:
+                            self.df_cgj = MergeWatchDelta(self.df_cgj, data[1], data[2])
+                            self.signal2.emit((ui_num['C관심종목'], self.df_cgj))
                         else:
                             self.signal2.emit(data)
                     elif data[0] == ui_num['차트']:
                         self.signal3.emit(data)
                     elif data[0] == ui_num['실시간차트']:
-                        self.signal4.emit(data)
+                        if len(data) == 3:
+                            self.chart_name   = data[1]
+                            self.chart_buffer = TickBuffer(data[2][0], max(len(data[2]) * 2, 1024))
+                            self.chart_buffer.Extend(data[2][1:])
+                        elif data[1] == self.chart_name:
+                            self.chart_buffer.View()[-1] = data[2][0]
+                            self.chart_buffer.Extend(data[2][1:])
+                            self.chart_buffer.KeepLast(data[3])
+                        else:
+                            continue
+                        self.signal4.emit((data[0], self.chart_name, self.chart_buffer.View().copy()))
                     elif data[0] == ui_num['풍경사진']:
                         self.signal7.emit(data)
                     elif data[0] in (ui_num['코스피'], ui_num['코스닥']):
@@ -21,6 +21,8 @@ ICON_PATH          = './icon'
 LOGIN_PATH         = './stock/login_kiwoom'
 GRAPH_PATH         = './backtester/graph'
 BACK_TEMP          = './backtester/temp'
+BACK_STORE         = './_database/back_store'
+BACK_CHECKPOINT    = './_database/back_checkpoint'
 DB_PATH            = './_database'
 DB_SETTING         = './_database/setting.db'
 DB_BACKTEST        = './_database/backtest.db'
@@ -35,6 +37,7 @@ DB_COIN_BACK_TICK  = './_database/coin_tick_back.db'
 DB_COIN_BACK_MIN   = './_database/coin_min_back.db'
 DB_STRATEGY        = './_database/strategy.db'
 DB_OPTUNA          = 'sqlite:///./_database/optuna.db'
+DB_BACK_CACHE      = './_database/back_cache.db'
 
 
 def database_load():
@@ -354,7 +357,21 @@ try:
         '리시버프로파일링':  False,
         '트레이더프로파일링': False,
         '전략연산프로파일링': False,
-        '백테엔진프로파일링': False
+        '백테엔진프로파일링': False,
+        '백테커널모드':      True,
+        '백테컬럼저장소':    True,
+        '백테공유메모리':    True,
+        '백테작업분배':      True,
+        '백테피처캐시':      True,
+        '백테옵튜나배치':    20,
+        '백테평가캐시':      1_000_000,
+        '백테다단계평가':    0,
+        '백테구간병렬':      0,
+        '백테체크포인트':    60,
+        '백테GA개체수':      1000,
+        '백테조건행렬':      True,
+        '백테결과묶음':      1000,
+        '차트갱신간격':      0.2
     }
 except fernet.InvalidToken:
     print('이 컴퓨터의 암호키로 생성된 계정이 아닙니다. setting.db를 삭제 후 재실행 하십시오.')
@@ -0,0 +1,75 @@
+import math
+from collections import deque
+
+
+class SlidingWindow:
+    """
+    배열 마지막 tick 개 값의 최고값, 최저값, 합계, 평균을 행이 추가될 때마다 상수 시간에 갱신한다.
+    최고, 최저값은 단조 덱을 사용하고, 합계는 tick 번 갱신될 때마다 math.fsum 으로 다시 더하여 부동소수점 오차가 누적되지 않도록 한다.
+    갱신 사이의 합계는 파이썬 실수 누적값이므로 슬라이스의 numpy 합계와 마지막 자리가 다를 수 있다.
+    """
+    def __init__(self, values, tick, gubun):
+        self.tick   = tick
+        self.gubun  = gubun
+        self.count  = 0
+        self.total  = 0.
+        self.values = deque()
+        for value in values:
+            self.Push(value)
+
+    def Push(self, value):
+        if self.gubun == 'max':
+            while self.values and self.values[-1][1] <= value:
+                self.values.pop()
+            self.values.append((self.count, value))
+            if self.values[0][0] <= self.count - self.tick:
+                self.values.popleft()
+        elif self.gubun == 'min':
+            while self.values and self.values[-1][1] >= value:
+                self.values.pop()
+            self.values.append((self.count, value))
+            if self.values[0][0] <= self.count - self.tick:
+                self.values.popleft()
+        else:
+            self.values.append(value)
+            self.total += value
+            if len(self.values) > self.tick:
+                self.total -= self.values.popleft()
+            if (self.count + 1) % self.tick == 0:
+                self.total = math.fsum(self.values)
+        self.count += 1
+
+    def Value(self):
+        if self.gubun in ('max', 'min'):
+            return self.values[0][1]
+        elif self.gubun == 'sum':
+            return self.total
+        return self.total / self.tick
+
+
+class SlidingWindows:
+    """
+    종목별 (컬럼, 틱수, 구분) 이동 집계 모음.
+    처음 조회할 때 종목 배열의 마지막 tick 개 행으로 만들고, 이후에는 Update 로 추가되는 행만 반영한다.
+    """
+    def __init__(self):
+        self.dict_window = {}
+
+    def Get(self, code, arry, col, tick, gubun):
+        if tick < 1:
+            return getattr(arry[-tick:, col], gubun)()
+        if code not in self.dict_window.keys():
+            self.dict_window[code] = {}
+        key = (col, tick, gubun)
+        if key not in self.dict_window[code].keys():
+            self.dict_window[code][key] = SlidingWindow(arry[-tick:, col].tolist(), tick, gubun)
+        return self.dict_window[code][key].Value()
+
+    def Update(self, code, row):
+        if code in self.dict_window.keys():
+            for (col, _, _), window in self.dict_window[code].items():
+                window.Push(row[col])
+
+    def Delete(self, code):
+        if code in self.dict_window.keys():
+            del self.dict_window[code]
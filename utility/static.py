@@ -345,6 +345,47 @@ def GetUpbitHogaunit(price):
         return 1000
 
 
+def GetIndicatorWindow(k):
+    """
+    분봉 전략 지표설정값 k(list(indicator.values()))로 계산에 필요한 최소 봉 개수(최대 lookback + 1)를 반환한다.
+    talib.stream 은 마지막 봉 하나만 계산하며 그 봉의 lookback 구간만 읽으므로, 이 개수만큼의 꼬리 구간만 넘겨도 값이 같다.
+    반환값이 None 이면 전체 배열을 사용한다.
+    """
+    list_func = [
+        ('ADOSC',    0,  {'fastperiod': k[0], 'slowperiod': k[1]}),
+        ('ADXR',     2,  {'timeperiod': k[2]}),
+        ('APO',      3,  {'fastperiod': k[3], 'slowperiod': k[4], 'matype': k[5]}),
+        ('AROON',    6,  {'timeperiod': k[6]}),
+        ('ATR',      7,  {'timeperiod': k[7]}),
+        ('BBANDS',   8,  {'timeperiod': k[8], 'nbdevup': k[9], 'nbdevdn': k[10], 'matype': k[11]}),
+        ('CCI',      12, {'timeperiod': k[12]}),
+        ('MINUS_DI', 13, {'timeperiod': k[13]}),
+        ('PLUS_DI',  13, {'timeperiod': k[13]}),
+        ('MACD',     14, {'fastperiod': k[14], 'slowperiod': k[15], 'signalperiod': k[16]}),
+        ('MFI',      17, {'timeperiod': k[17]}),
+        ('MOM',      18, {'timeperiod': k[18]}),
+        ('PPO',      19, {'fastperiod': k[19], 'slowperiod': k[20], 'matype': k[21]}),
+        ('ROC',      22, {'timeperiod': k[22]}),
+        ('RSI',      23, {'timeperiod': k[23]}),
+        ('SAR',      24, {'acceleration': k[24], 'maximum': k[25]}),
+        ('STOCH',    26, {'fastk_period': k[26], 'slowk_period': k[27], 'slowk_matype': k[28], 'slowd_period': k[29], 'slowd_matype': k[30]}),
+        ('STOCHF',   31, {'fastk_period': k[31], 'fastd_period': k[32], 'fastd_matype': k[33]}),
+        ('WILLR',    34, {'timeperiod': k[34]})
+    ]
+    try:
+        from talib import abstract
+        lookback = 0
+        for name, index, params in list_func:
+            if k[index] != 0:
+                func = abstract.Function(name)
+                func.set_parameters({key: type(func.parameters[key])(value) for key, value in params.items()})
+                lookback = max(lookback, func.lookback)
+    except:
+        print_exc()
+        return None
+    return lookback + 1
+
+
 try:
     from numba import jit
 
@@ -467,6 +508,27 @@ try:
             else:
                 x = 1000
         return x
+
+
+    @jit(nopython=True, cache=True)
+    def GetOrderFill(arry, index, pcol, jcol, step, count, order):
+        """
+        arry[index] 행의 호가(pcol)와 잔량(jcol) 컬럼을 step 방향으로 count 단계까지 시장가 체결한다.
+        반환값: (체결금액, 미체결수량) - 미체결수량이 0 이하면 전량 체결, 양수면 부분 체결이다.
+        """
+        amount = 0.
+        remain = order
+        for i in range(count):
+            price = arry[index, pcol + i * step]
+            jango = arry[index, jcol + i * step]
+            if remain - jango <= 0:
+                amount += price * remain
+                remain -= jango
+                break
+            else:
+                amount += price * jango
+                remain -= jango
+        return amount, remain
 except:
     def GetKiwoomPgSgSp(bg, cg):
         texs = int(cg * 0.0018)
@@ -578,3 +640,23 @@ except:
             else:
                 x = 1000
         return x
+
+
+    def GetOrderFill(arry, index, pcol, jcol, step, count, order):
+        """
+        arry[index] 행의 호가(pcol)와 잔량(jcol) 컬럼을 step 방향으로 count 단계까지 시장가 체결한다.
+        반환값: (체결금액, 미체결수량) - 미체결수량이 0 이하면 전량 체결, 양수면 부분 체결이다.
+        """
+        amount = 0.
+        remain = order
+        for i in range(count):
+            price = arry[index, pcol + i * step]
+            jango = arry[index, jcol + i * step]
+            if remain - jango <= 0:
+                amount += price * remain
+                remain -= jango
+                break
+            else:
+                amount += price * jango
+                remain -= jango
+        return amount, remain
@@ -0,0 +1,90 @@
+import numpy as np
+
+
+class TickBuffer:
+    """
+    한 종목의 틱 배열을 용량을 두배씩 늘리는 버퍼에 보관하고, 유효한 구간 [start:end] 뷰를 반환한다.
+    행 추가는 버퍼가 가득 찼을 때만 복사하므로 분할상환 상수 시간이고, 앞쪽 행 삭제는 시작 위치만 옮긴다.
+    """
+    def __init__(self, row, capacity):
+        arry = np.array([row])
+        if arry.dtype.kind in 'iub':
+            arry = arry.astype(np.float64)
+        self.buffer = np.empty((capacity, arry.shape[1]), dtype=arry.dtype)
+        self.buffer[0] = arry[0]
+        self.start  = 0
+        self.end    = 1
+        self.total  = 1
+
+    def Append(self, row):
+        if self.end == len(self.buffer):
+            # 이전에 반환한 뷰가 큐 전송 중일 수 있으므로 제자리에서 당기지 않고 새 버퍼로 옮긴다.
+            count  = self.end - self.start
+            buffer = np.empty((len(self.buffer) * 2 if count * 2 > len(self.buffer) else len(self.buffer),
+                               self.buffer.shape[1]), dtype=self.buffer.dtype)
+            buffer[:count] = self.buffer[self.start:self.end]
+            self.buffer = buffer
+            self.start  = 0
+            self.end    = count
+        self.buffer[self.end] = row
+        self.end   += 1
+        self.total += 1
+        return self.View()
+
+    def Extend(self, rows):
+        count = len(rows)
+        if self.end + count > len(self.buffer):
+            size     = self.end - self.start
+            capacity = len(self.buffer)
+            while (size + count) * 2 > capacity:
+                capacity *= 2
+            buffer = np.empty((capacity, self.buffer.shape[1]), dtype=self.buffer.dtype)
+            buffer[:size] = self.buffer[self.start:self.end]
+            self.buffer = buffer
+            self.start  = 0
+            self.end    = size
+        self.buffer[self.end:self.end + count] = rows
+        self.end   += count
+        self.total += count
+        return self.View()
+
+    def PopFront(self):
+        if self.end - self.start > 1:
+            self.start += 1
+        return self.View()
+
+    def KeepLast(self, count):
+        self.start = max(self.start, self.end - count)
+        return self.View()
+
+    def View(self):
+        return self.buffer[self.start:self.end]
+
+
+class TickBuffers:
+    """
+    종목별 TickBuffer 모음. 전략 연산, SaveData, 차트는 종전과 같이 self.dict_arry[종목코드] 배열을 사용하며,
+    이 배열은 버퍼의 뷰이므로 마지막 행 갱신(arry[-1, :] = row)도 버퍼에 그대로 반영된다.
+    """
+    def __init__(self, capacity=1024):
+        self.capacity    = capacity
+        self.dict_buffer = {}
+
+    def Append(self, code, row):
+        if code not in self.dict_buffer.keys():
+            self.dict_buffer[code] = TickBuffer(row, self.capacity)
+            return self.dict_buffer[code].View()
+        return self.dict_buffer[code].Append(row)
+
+    def PopFront(self, code):
+        return self.dict_buffer[code].PopFront()
+
+    def Total(self, code):
+        """
+        종목 버퍼에 지금까지 추가된 행의 누적 개수. 앞쪽 행을 삭제해도 줄지 않으므로 실시간차트의 추가 행 계산에 사용한다.
+        """
+        return self.dict_buffer[code].total
+
+    def Delete(self, code):
+        if code in self.dict_buffer.keys():
+            del self.dict_buffer[code]
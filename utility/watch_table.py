@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+
+class WatchTable:
+    """
+    관심종목 표를 고정 슬롯 구조화 배열과 종목코드→슬롯 딕셔너리로 보관한다.
+    틱마다의 갱신은 슬롯 한 행의 대입뿐이고, UI로는 마지막 전송 이후 갱신된 행과 현재 종목코드 목록만 보낸다.
+    """
+    def __init__(self, columns, capacity=256):
+        self.columns   = columns
+        self.dtype     = np.dtype([(columns[0], 'U40')] + [(column, np.float64) for column in columns[1:]])
+        self.arry      = np.zeros(capacity, dtype=self.dtype)
+        self.dict_slot = {}
+        self.list_free = list(range(capacity - 1, -1, -1))
+        self.changed   = set()
+        self.dropped   = False
+
+    def Update(self, code, row):
+        slot = self.dict_slot.get(code)
+        if slot is None:
+            if not self.list_free:
+                capacity = len(self.arry)
+                arry = np.zeros(capacity * 2, dtype=self.dtype)
+                arry[:capacity] = self.arry
+                self.arry = arry
+                self.list_free = list(range(capacity * 2 - 1, capacity - 1, -1))
+            slot = self.list_free.pop()
+            self.dict_slot[code] = slot
+        self.arry[slot] = row
+        self.changed.add(code)
+
+    def Keep(self, codes):
+        for code in set(self.dict_slot.keys()) - set(codes):
+            self.list_free.append(self.dict_slot.pop(code))
+            self.changed.discard(code)
+            self.dropped = True
+
+    def GetDelta(self):
+        """
+        반환값: (갱신된 행의 데이터프레임, 현재 종목코드 목록) - UI는 목록에 없는 종목을 지우고 갱신된 행을 덮어쓴다.
+        마지막 전송 이후 갱신되거나 삭제된 종목이 없으면 None 을 반환한다.
+        """
+        if not self.changed and not self.dropped:
+            return None
+        codes = list(self.changed)
+        df = pd.DataFrame(self.arry[[self.dict_slot[code] for code in codes]], index=codes, columns=self.columns)
+        self.changed = set()
+        self.dropped = False
+        return df, list(self.dict_slot.keys())
+
+
+def MergeWatchDelta(df, df_delta, codes):
+    """
+    UI 쪽 관심종목 데이터프레임에 WatchTable.GetDelta 의 결과를 반영하고 d_money 내림차순으로 정렬한다.
+    """
+    if df is None:
+        df = df_delta
+    else:
+        df = df[df.index.isin(codes) & ~df.index.isin(df_delta.index)]
+        df = pd.concat([df, df_delta]) if len(df) > 0 else df_delta
+    return df.sort_values(by=['d_money'], ascending=False)